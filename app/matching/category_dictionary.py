@@ -0,0 +1,112 @@
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from .models import GuestRow, RoomRow
+from .price_cube import like_to_regex
+from .pricing_logic import CATEGORY_ALIASES, normalize_category, preference_phrases
+
+
+class CategoryDictionary:
+    """
+    Room category names interned to integer ids (room_categories.id when loaded
+    from the database). Each name is normalised once; preference phrases, offer
+    category phrases and ILIKE patterns are resolved to id sets once per dictionary
+    and memoised, so per-guest matching is integer set membership.
+
+    Bot category keys ("deluxe", "villa") are resolved through their titles.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[int, str]] = (), aliases: Optional[Dict[str, str]] = None):
+        self.names: Dict[int, str] = {}
+        self.ids: Dict[str, int] = {}
+        self._norms: Dict[int, str] = {}
+        self._aliases = CATEGORY_ALIASES if aliases is None else {
+            normalize_category(key): normalize_category(title) for key, title in aliases.items()
+        }
+        self._preference_cache: Dict[str, FrozenSet[int]] = {}
+        self._offer_cache: Dict[Tuple[str, ...], FrozenSet[int]] = {}
+        self._like_cache: Dict[str, FrozenSet[int]] = {}
+        for category_id, name in rows:
+            self._intern(name, category_id)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _intern(self, name: str, category_id: Optional[int] = None) -> int:
+        existing = self.ids.get(name)
+        if existing is not None:
+            return existing
+        if category_id is None:
+            category_id = max(self.names, default=0) + 1
+        self.names[category_id] = name
+        self.ids[name] = category_id
+        self._norms[category_id] = normalize_category(name)
+        # New names change every resolved phrase
+        self._preference_cache.clear()
+        self._offer_cache.clear()
+        self._like_cache.clear()
+        return category_id
+
+    def add(self, names: Iterable[str]) -> None:
+        """Names unknown to the database get ids after the largest known one."""
+        for name in names:
+            self._intern(name)
+
+    def preference_ids(self, preference: str) -> FrozenSet[int]:
+        """Categories matched by a guest preference: substring in either direction, as in match_categories_for_guest."""
+        pref = normalize_category(preference)
+        ids = self._preference_cache.get(pref)
+        if ids is None:
+            phrases = preference_phrases(pref, self._aliases)
+            ids = frozenset(
+                category_id for category_id, norm in self._norms.items()
+                if any(p in norm or norm in p for p in phrases)
+            )
+            self._preference_cache[pref] = ids
+        return ids
+
+    def offer_category_ids(self, phrases: Iterable[str]) -> FrozenSet[int]:
+        """Categories an offer applies to, with the rules of offer_matches_category (the SQL backend joins on them)."""
+        key = tuple(normalize_category(c) for c in phrases)
+        ids = self._offer_cache.get(key)
+        if ids is None:
+            if not key:
+                ids = frozenset()
+            elif "все категории" in key:
+                ids = frozenset(self._norms)
+            elif "все виллы" in key:
+                ids = frozenset(i for i, norm in self._norms.items() if "вилла" in norm)
+            else:
+                wanted = set(key)
+                ids = frozenset(i for i, norm in self._norms.items() if norm in wanted)
+            self._offer_cache[key] = ids
+        return ids
+
+    def like_ids(self, category: str) -> FrozenSet[int]:
+        """Categories hit by `ILIKE '%category%'`, as PriceCube.match_categories matches room names to prices."""
+        ids = self._like_cache.get(category)
+        if ids is None:
+            pattern = like_to_regex(f"%{category}%")
+            ids = frozenset(i for i, name in self.names.items() if pattern.fullmatch(name))
+            self._like_cache[category] = ids
+        return ids
+
+    def match_rooms(self, guest: GuestRow, rooms: List[RoomRow]) -> List[str]:
+        """match_categories_for_guest over interned room names."""
+        # Intern first: a new name would invalidate the resolved preferences
+        self.add(room.category_name for room in rooms)
+        preferred = [p for p in (guest.preferred_categories or []) if p]
+        allowed: Optional[set] = None
+        if preferred:
+            allowed = set()
+            for pref in preferred:
+                allowed |= self.preference_ids(pref)
+
+        total_people = guest.adults + guest.teens
+        matched: List[str] = []
+        for room in rooms:
+            if allowed is not None and self.ids[room.category_name] not in allowed:
+                continue
+            if total_people > room.number_of_main_beds:
+                continue
+            matched.append(room.category_name)
+        return matched
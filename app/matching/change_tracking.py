@@ -0,0 +1,57 @@
+import hashlib
+from typing import Dict, List, Optional
+
+from .models import GuestRow
+from .offer_index import OfferIndex
+from .price_cube import PriceCube
+
+# Bump when pricing rules change so that the next run reprices everything
+PRICING_LOGIC_VERSION = "1"
+
+
+def _digest(parts) -> str:
+    h = hashlib.sha1()
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else repr(part).encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def category_fingerprint(cube: PriceCube, cat_id: int, offer_index: OfferIndex) -> str:
+    """
+    Everything the priced rows of one category depend on: its regular prices and
+    the offers that can win on its dates (already filtered by the booking window
+    of the run date), with their stay segments, formulas and min_days.
+    """
+    index = offer_index.for_category(cube.categories[cat_id])
+    segments = [
+        (
+            index.bounds[seg],
+            index.bounds[seg + 1],
+            [(str(off.id), off.formula, off.min_days, off.loyalty_compatible) for off in winners],
+        )
+        for seg, winners in enumerate(index.offers)
+        if winners
+    ]
+    return _digest(
+        [PRICING_LOGIC_VERSION, *(column.tobytes() for column in cube.columns(cat_id)), segments]
+    )
+
+
+def category_fingerprints(cube: PriceCube, offer_index: OfferIndex) -> Dict[str, str]:
+    return {
+        name: category_fingerprint(cube, cat_id, offer_index)
+        for cat_id, name in enumerate(cube.categories)
+    }
+
+
+def guest_fingerprint(
+    guest: GuestRow,
+    matched_categories: List[str],
+    loyalty_discounts: Dict[str, int],
+) -> str:
+    """Guest-side inputs of pricing: matched room categories and the loyalty discount."""
+    discount: Optional[int] = None
+    if guest.loyalty_status:
+        discount = loyalty_discounts.get(guest.loyalty_status.strip().lower())
+    return _digest([PRICING_LOGIC_VERSION, matched_categories, guest.loyalty_status, discount])
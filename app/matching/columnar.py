@@ -0,0 +1,90 @@
+from array import array
+from datetime import date
+from typing import Iterable, Iterator, List, Optional
+from uuid import UUID
+
+from .models import AggregatedRow
+
+
+class AggregatedColumns:
+    """
+    AggregatedRow list of one pricing profile stored column-wise: prices and period
+    bounds (date ordinals) in int arrays, strings interned so repeated categories
+    and formulas are kept once. Shared by every guest of the profile instead of a
+    row copy per guest; guest_id is supplied when the rows are read back.
+    """
+
+    __slots__ = (
+        "category",
+        "period_start",
+        "period_end",
+        "regular_breakfast_price",
+        "new_breakfast_price",
+        "regular_full_pansion_price",
+        "new_full_pansion_price",
+        "applied_special_offer",
+        "applied_loyalty",
+        "formula_used",
+        "is_last_room",
+        "_strings",
+    )
+
+    def __init__(self):
+        self.category: List[str] = []
+        self.period_start = array("l")
+        self.period_end = array("l")
+        self.regular_breakfast_price = array("q")
+        self.new_breakfast_price = array("q")
+        self.regular_full_pansion_price = array("q")
+        self.new_full_pansion_price = array("q")
+        self.applied_special_offer: List[Optional[UUID]] = []
+        self.applied_loyalty: List[Optional[str]] = []
+        self.formula_used: List[Optional[str]] = []
+        self.is_last_room: List[str] = []
+        self._strings = {}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[AggregatedRow]) -> "AggregatedColumns":
+        columns = cls()
+        for row in rows:
+            columns.append(row)
+        columns._strings = {}
+        return columns
+
+    def _intern(self, value):
+        if value is None:
+            return None
+        return self._strings.setdefault(value, value)
+
+    def append(self, row: AggregatedRow) -> None:
+        self.category.append(self._intern(row.category))
+        self.period_start.append(row.period_start.toordinal())
+        self.period_end.append(row.period_end.toordinal())
+        self.regular_breakfast_price.append(row.regular_breakfast_price)
+        self.new_breakfast_price.append(row.new_breakfast_price)
+        self.regular_full_pansion_price.append(row.regular_full_pansion_price)
+        self.new_full_pansion_price.append(row.new_full_pansion_price)
+        self.applied_special_offer.append(row.applied_special_offer)
+        self.applied_loyalty.append(self._intern(row.applied_loyalty))
+        self.formula_used.append(self._intern(row.formula_used))
+        self.is_last_room.append(self._intern(row.is_last_room))
+
+    def __len__(self) -> int:
+        return len(self.category)
+
+    def rows(self, guest_id: int) -> Iterator[AggregatedRow]:
+        for i in range(len(self.category)):
+            yield AggregatedRow(
+                guest_id=guest_id,
+                category=self.category[i],
+                period_start=date.fromordinal(self.period_start[i]),
+                period_end=date.fromordinal(self.period_end[i]),
+                regular_breakfast_price=self.regular_breakfast_price[i],
+                new_breakfast_price=self.new_breakfast_price[i],
+                regular_full_pansion_price=self.regular_full_pansion_price[i],
+                new_full_pansion_price=self.new_full_pansion_price[i],
+                applied_special_offer=self.applied_special_offer[i],
+                applied_loyalty=self.applied_loyalty[i],
+                formula_used=self.formula_used[i],
+                is_last_room=self.is_last_room[i],
+            )
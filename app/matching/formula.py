@@ -0,0 +1,151 @@
+import ast
+import operator
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple, Union
+
+# Formulas come from offer text analysis ("N = C*0.85", "N = C - 5000", "N = C*6/7").
+# Only arithmetic over the base price C and numeric constants is accepted.
+
+_BIN_OPS: Dict[type, Callable[[float, float], float]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+_UNARY_OPS: Dict[type, Callable[[float], float]] = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+MAX_FORMULA_LENGTH = 200
+
+
+class FormulaError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class CompiledFormula:
+    text: str
+    fn: Callable[[float], float]
+    # (a, b) for formulas of the form a*C + b, None otherwise
+    linear: Optional[Tuple[float, float]]
+
+    def __call__(self, base_price: int) -> int:
+        return int(round(float(self.fn(base_price))))
+
+
+def formula_expression(formula: str) -> str:
+    """Right-hand side of "N = ..." with N removed, as apply_formula always treated it."""
+    text = formula.strip()
+    if "=" in text:
+        _, rhs = text.split("=", 1)
+    else:
+        rhs = text
+    return rhs.replace("N", "").strip()
+
+
+def _check(node: ast.AST) -> None:
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise FormulaError(f"unsupported constant {node.value!r}")
+    elif isinstance(node, ast.Name):
+        if node.id != "C":
+            raise FormulaError(f"unknown name {node.id!r}")
+    elif isinstance(node, ast.BinOp):
+        if type(node.op) not in _BIN_OPS:
+            raise FormulaError(f"operator {type(node.op).__name__} is not allowed")
+        _check(node.left)
+        _check(node.right)
+    elif isinstance(node, ast.UnaryOp):
+        if type(node.op) not in _UNARY_OPS:
+            raise FormulaError(f"operator {type(node.op).__name__} is not allowed")
+        _check(node.operand)
+    else:
+        raise FormulaError(f"{type(node).__name__} is not allowed")
+
+
+def _build(node: ast.AST) -> Tuple[Callable[[float], float], Optional[Tuple[float, float]]]:
+    """Closure for the node plus its linear form (a, b) when it is linear in C."""
+    if isinstance(node, ast.Constant):
+        value = node.value
+        return (lambda c: value), (0, value)
+    if isinstance(node, ast.Name):
+        return (lambda c: c), (1, 0)
+    if isinstance(node, ast.UnaryOp):
+        fn, lin = _build(node.operand)
+        op = _UNARY_OPS[type(node.op)]
+        return (lambda c: op(fn(c))), ((op(lin[0]), op(lin[1])) if lin else None)
+
+    left, l_lin = _build(node.left)
+    right, r_lin = _build(node.right)
+    op = _BIN_OPS[type(node.op)]
+
+    # Subtrees without C are folded into a constant once
+    if l_lin and r_lin and l_lin[0] == 0 and r_lin[0] == 0:
+        value = op(l_lin[1], r_lin[1])
+        return (lambda c: value), (0, value)
+
+    if isinstance(node.op, (ast.Add, ast.Sub)):
+        lin = (op(l_lin[0], r_lin[0]), op(l_lin[1], r_lin[1])) if l_lin and r_lin else None
+    elif isinstance(node.op, ast.Mult) and l_lin and r_lin and (l_lin[0] == 0 or r_lin[0] == 0):
+        k, other = (l_lin[1], r_lin) if l_lin[0] == 0 else (r_lin[1], l_lin)
+        lin = (k * other[0], k * other[1])
+    elif isinstance(node.op, ast.Div) and l_lin and r_lin and r_lin[0] == 0 and r_lin[1] != 0:
+        lin = (l_lin[0] / r_lin[1], l_lin[1] / r_lin[1])
+    else:
+        lin = None
+
+    if r_lin and r_lin[0] == 0:
+        k = r_lin[1]
+        return (lambda c: op(left(c), k)), lin
+    if l_lin and l_lin[0] == 0:
+        k = l_lin[1]
+        return (lambda c: op(k, right(c))), lin
+    return (lambda c: op(left(c), right(c))), lin
+
+
+def _compile(formula: str) -> CompiledFormula:
+    expr = formula_expression(formula)
+    if not expr:
+        raise FormulaError("empty formula")
+    if len(expr) > MAX_FORMULA_LENGTH:
+        raise FormulaError("formula is too long")
+    try:
+        tree = ast.parse(expr, mode="eval")
+    except SyntaxError as exc:
+        raise FormulaError(f"cannot parse formula: {exc.msg}") from None
+    _check(tree.body)
+    try:
+        fn, lin = _build(tree.body)
+    except (ArithmeticError, ValueError) as exc:
+        # Constant folding evaluates C-free subtrees: "C + 1/0" fails here, not per price
+        raise FormulaError(f"cannot evaluate formula: {exc}") from None
+    return CompiledFormula(text=formula, fn=fn, linear=lin)
+
+
+_CACHE: Dict[str, Union[CompiledFormula, FormulaError]] = {}
+
+
+def compile_formula(formula: str) -> CompiledFormula:
+    """Parses and validates the formula once per text; later calls are a dict lookup."""
+    cached = _CACHE.get(formula)
+    if cached is None:
+        try:
+            cached = _compile(formula)
+        except FormulaError as exc:
+            cached = exc
+        _CACHE[formula] = cached
+    if isinstance(cached, FormulaError):
+        raise cached
+    return cached
+
+
+def validate_formula(formula: Optional[str]) -> Optional[str]:
+    """Error text for an unusable formula, None when it compiles (or is empty)."""
+    if not formula:
+        return None
+    try:
+        compile_formula(formula)
+    except FormulaError as exc:
+        return str(exc)
+    return None
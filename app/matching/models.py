@@ -4,7 +4,7 @@ from typing import List, Optional
 from uuid import UUID
 
 
-@dataclass
+@dataclass(slots=True)
 class GuestRow:
     id: int
     first_name: str
@@ -16,14 +16,14 @@ class GuestRow:
     loyalty_status: str
 
 
-@dataclass
+@dataclass(slots=True)
 class RoomRow:
     id: int
     category_name: str
     number_of_main_beds: int
 
 
-@dataclass
+@dataclass(slots=True)
 class SpecialOfferData:
     id: UUID
     categories: List[str]
@@ -34,14 +34,14 @@ class SpecialOfferData:
     booking_end: Optional[date]
 
 
-@dataclass
+@dataclass(slots=True)
 class StayPeriodData:
     offer_id: UUID
     stay_start: date
     stay_end: date
 
 
-@dataclass
+@dataclass(slots=True)
 class PricedStay:
     guest_id: int
     category: str
@@ -56,11 +56,12 @@ class PricedStay:
     is_last_room: bool
 
 
-@dataclass
+@dataclass(slots=True)
 class AggregatedRow:
     guest_id: int
     category: str
-    period: str
+    period_start: date
+    period_end: date
     regular_breakfast_price: int
     new_breakfast_price: int
     regular_full_pansion_price: int
@@ -0,0 +1,117 @@
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from .models import SpecialOfferData, StayPeriodData
+from .pricing_logic import normalize_category, offer_matches_booking_date
+
+
+def _offer_matches_normalized_category(norm_cats: List[str], room_norm: str) -> bool:
+    """offer_matches_category over categories normalised once per run."""
+    if not norm_cats:
+        return False
+    if any(c == "все категории" for c in norm_cats):
+        return True
+    if any(c == "все виллы" for c in norm_cats):
+        return "вилла" in room_norm
+    return room_norm in norm_cats
+
+
+@dataclass
+class _CategoryIndex:
+    """
+    Elementary-interval partition of all stay periods of the offers valid for one category.
+    Segment i covers ordinals [bounds[i], bounds[i + 1]). For each segment only the offers
+    that can still win are kept: in priority order with strictly decreasing min_days,
+    so the first offer with min_days <= period_len is found by bisect.
+    """
+
+    bounds: List[int] = field(default_factory=list)
+    # per segment: min_days negated (ascending for bisect) and the matching offers
+    neg_min_days: List[List[int]] = field(default_factory=list)
+    offers: List[List[SpecialOfferData]] = field(default_factory=list)
+
+    def find(self, ordinal: int, period_len: int) -> Optional[SpecialOfferData]:
+        seg = bisect_right(self.bounds, ordinal) - 1
+        if seg < 0 or seg >= len(self.offers):
+            return None
+        pos = bisect_left(self.neg_min_days[seg], -period_len)
+        candidates = self.offers[seg]
+        return candidates[pos] if pos < len(candidates) else None
+
+
+class OfferIndex:
+    """
+    Offers prepared once per pricing run: the booking window is checked once for
+    the run date, and per normalised room category an interval index of stay
+    periods answers "first applicable offer" for (category, date, period_len)
+    with the same priority as the offers list order.
+    """
+
+    def __init__(
+        self,
+        offers: List[SpecialOfferData],
+        periods_map: Dict[UUID, List[StayPeriodData]],
+        today: date,
+    ):
+        self._offers = [
+            (off, [normalize_category(c) for c in (off.categories or [])])
+            for off in offers
+            if offer_matches_booking_date(off, today)
+        ]
+        self._periods_map = periods_map
+        self.today = today
+        self._by_category: Dict[str, _CategoryIndex] = {}
+
+    def find(self, category: str, stay_dt: date, period_len: int) -> Optional[SpecialOfferData]:
+        return self.for_category(category).find(stay_dt.toordinal(), period_len)
+
+    def for_category(self, category: str) -> _CategoryIndex:
+        room_norm = normalize_category(category)
+        index = self._by_category.get(room_norm)
+        if index is None:
+            index = self._build(room_norm)
+            self._by_category[room_norm] = index
+        return index
+
+    def _build(self, room_norm: str) -> _CategoryIndex:
+        matching = [
+            off for off, norm_cats in self._offers
+            if _offer_matches_normalized_category(norm_cats, room_norm)
+        ]
+
+        ranges = []
+        for priority, off in enumerate(matching):
+            for p in self._periods_map.get(off.id, []):
+                if p.stay_start <= p.stay_end:
+                    ranges.append((p.stay_start.toordinal(), p.stay_end.toordinal() + 1, priority))
+
+        index = _CategoryIndex()
+        if not ranges:
+            return index
+
+        index.bounds = sorted({b for start, end, _ in ranges for b in (start, end)})
+        covering: List[set] = [set() for _ in range(len(index.bounds) - 1)]
+        for start, end, priority in ranges:
+            for seg in range(bisect_left(index.bounds, start), bisect_left(index.bounds, end)):
+                covering[seg].add(priority)
+
+        for priorities in covering:
+            neg_min_days: List[int] = []
+            winners: List[SpecialOfferData] = []
+            best = None
+            for priority in sorted(priorities):
+                off = matching[priority]
+                min_days = off.min_days or 0
+                # An earlier offer with min_days <= this one always wins first
+                if best is not None and min_days >= best:
+                    continue
+                best = min_days
+                neg_min_days.append(-min_days)
+                winners.append(off)
+            index.neg_min_days.append(neg_min_days)
+            index.offers.append(winners)
+
+        return index
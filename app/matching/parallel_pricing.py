@@ -0,0 +1,62 @@
+import multiprocessing
+import os
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .models import AggregatedRow, GuestRow
+
+# representative guest, matched categories, optional subset of cube categories
+PricingJob = Tuple[GuestRow, List[str], Optional[Set[str]]]
+PriceFn = Callable[[Any, GuestRow, List[str], Optional[Set[str]]], List[AggregatedRow]]
+
+# Set in the parent right before forking: workers inherit the read-only pricing
+# context (price cube, offer index, loyalty table) instead of receiving it pickled
+_FORK_STATE: Optional[Tuple[PriceFn, Any]] = None
+
+
+def resolve_workers(value: Optional[str] = None) -> int:
+    """PRICING_WORKERS: 1 — serial, 0 — one worker per CPU core."""
+    raw = value if value is not None else os.getenv("PRICING_WORKERS", "1")
+    try:
+        workers = int(raw)
+    except ValueError:
+        print(f"[warn] PRICING_WORKERS={raw!r} is not a number, pricing serially")
+        return 1
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def can_fork() -> bool:
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def _run_job(job: PricingJob) -> List[AggregatedRow]:
+    price_fn, ctx = _FORK_STATE
+    guest, matched_categories, only_categories = job
+    return price_fn(ctx, guest, matched_categories, only_categories)
+
+
+def price_jobs(price_fn: PriceFn, ctx: Any, jobs: Sequence[PricingJob], workers: int) -> Iterator[List[AggregatedRow]]:
+    """
+    Results of price_fn(ctx, *job) in job order. With workers > 1 the jobs are
+    sharded over a fork-based process pool; results are streamed back as they
+    complete so the caller can write them while the rest are computed.
+    """
+    global _FORK_STATE
+
+    if workers <= 1 or len(jobs) < 2 or not can_fork():
+        if workers > 1 and not can_fork():
+            print("[warn] fork start method is not available, pricing serially")
+        for guest, matched_categories, only_categories in jobs:
+            yield price_fn(ctx, guest, matched_categories, only_categories)
+        return
+
+    workers = min(workers, len(jobs))
+    # Neighbouring jobs share categories, so contiguous chunks reuse per-category grids in a worker
+    chunksize = max(1, len(jobs) // (workers * 4))
+    _FORK_STATE = (price_fn, ctx)
+    try:
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            yield from pool.imap(_run_job, jobs, chunksize)
+    finally:
+        _FORK_STATE = None
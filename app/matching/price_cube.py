@@ -0,0 +1,123 @@
+import re
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Tuple
+
+from core.entities import RegularPrice
+
+
+def like_to_regex(pattern: str) -> "re.Pattern[str]":
+    """ILIKE pattern -> case-insensitive regex: % is any run, _ is one char, backslash escapes."""
+    out: List[str] = []
+    chars = iter(pattern)
+    for ch in chars:
+        if ch == "\\":
+            out.append(re.escape(next(chars, "\\")))
+        elif ch == "%":
+            out.append(".*")
+        elif ch == "_":
+            out.append(".")
+        else:
+            out.append(re.escape(ch))
+    return re.compile("".join(out), re.IGNORECASE | re.DOTALL)
+
+
+@dataclass
+class _CategoryColumns:
+    ordinals: array = field(default_factory=lambda: array("l"))
+    only_breakfast: array = field(default_factory=lambda: array("l"))
+    full_pansion: array = field(default_factory=lambda: array("l"))
+    is_last_room: array = field(default_factory=lambda: array("b"))
+
+
+class PriceCube:
+    """
+    All regular prices loaded once per pricing run, stored per category as
+    array-backed columns. Categories are kept in a dictionary (name -> id), and
+    guests read their slice through prices_for, which matches categories like
+    `room_category ILIKE '%cat%'`.
+    """
+
+    def __init__(self, rows) -> None:
+        """rows: (room_category, date, only_breakfast, full_pansion, is_last_room) ordered by category, date."""
+        self.categories: List[str] = []
+        self.category_ids: Dict[str, int] = {}
+        self._columns: List[_CategoryColumns] = []
+        self._dates = {}
+        for category, dt, ob, fp, last_room in rows:
+            cat_id = self.category_ids.get(category)
+            if cat_id is None:
+                cat_id = len(self.categories)
+                self.category_ids[category] = cat_id
+                self.categories.append(category)
+                self._columns.append(_CategoryColumns())
+            cols = self._columns[cat_id]
+            ordinal = dt.toordinal()
+            self._dates[ordinal] = dt
+            cols.ordinals.append(ordinal)
+            cols.only_breakfast.append(ob)
+            cols.full_pansion.append(fp)
+            cols.is_last_room.append(1 if last_room else 0)
+
+        self._match_cache: Dict[Tuple[str, ...], List[int]] = {}
+        self._prices_cache: Dict[int, List[RegularPrice]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(cols.ordinals) for cols in self._columns)
+
+    def match_categories(self, matched_categories: List[str]) -> List[int]:
+        """Ids of cube categories hit by any of the guest's ILIKE '%cat%' patterns, in cube order."""
+        key = tuple(matched_categories)
+        ids = self._match_cache.get(key)
+        if ids is None:
+            patterns = [like_to_regex(f"%{cat}%") for cat in matched_categories]
+            ids = [
+                cat_id for cat_id, name in enumerate(self.categories)
+                if any(p.fullmatch(name) for p in patterns)
+            ]
+            self._match_cache[key] = ids
+        return ids
+
+    def prices_for(self, matched_categories: List[str]) -> List[RegularPrice]:
+        if not matched_categories:
+            return []
+        result: List[RegularPrice] = []
+        for cat_id in self.match_categories(matched_categories):
+            result.extend(self.prices_for_category(cat_id))
+        return result
+
+    def columns(self, cat_id: int) -> Tuple[array, array, array, array]:
+        """Raw columns of one category: date ordinals, breakfast, full board, last-room flags."""
+        cols = self._columns[cat_id]
+        return cols.ordinals, cols.only_breakfast, cols.full_pansion, cols.is_last_room
+
+    def iter_rows(self, cat_ids: List[int]) -> Iterator[Tuple[str, int, int, int, bool]]:
+        """(category, date ordinal, breakfast, full board, last room) per price, ordered by category and date."""
+        for cat_id in cat_ids:
+            cols = self._columns[cat_id]
+            category = self.categories[cat_id]
+            for ordinal, ob, fp, last_room in zip(
+                cols.ordinals, cols.only_breakfast, cols.full_pansion, cols.is_last_room
+            ):
+                yield category, ordinal, ob, fp, bool(last_room)
+
+    def prices_for_category(self, cat_id: int) -> List[RegularPrice]:
+        # RegularPrice objects are built once per category and shared between guests (read-only)
+        prices = self._prices_cache.get(cat_id)
+        if prices is None:
+            cols = self._columns[cat_id]
+            category = self.categories[cat_id]
+            prices = [
+                RegularPrice(
+                    category=category,
+                    date=self._dates[ordinal],
+                    only_breakfast=ob,
+                    full_pansion=fp,
+                    is_last_room=bool(last_room),
+                )
+                for ordinal, ob, fp, last_room in zip(
+                    cols.ordinals, cols.only_breakfast, cols.full_pansion, cols.is_last_room
+                )
+            ]
+            self._prices_cache[cat_id] = prices
+        return prices
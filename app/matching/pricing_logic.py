@@ -1,9 +1,11 @@
 from datetime import date, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from uuid import UUID
 
+from core.categories import CATEGORY_MAP
 from core.entities import RegularPrice
 
+from .formula import FormulaError, compile_formula
 from .models import (
     AggregatedRow,
     GuestRow,
@@ -13,6 +15,9 @@ from .models import (
     StayPeriodData,
 )
 
+if TYPE_CHECKING:
+    from .offer_index import OfferIndex
+
 
 def normalize_category(value: str) -> str:
     """Simplified category normalization for matching."""
@@ -27,8 +32,19 @@ def normalize_category(value: str) -> str:
     )
     return cleaned
 
+
+# Bot category keys ("deluxe", "villa") are still stored in some profiles; they match through their titles
+CATEGORY_ALIASES = {normalize_category(key): normalize_category(title) for key, title in CATEGORY_MAP.items()}
+
+
+def preference_phrases(preference: str, aliases: Optional[Dict[str, str]] = None) -> Set[str]:
+    """Normalised phrases a guest preference matches room names by: itself and the title of a bot key."""
+    pref = normalize_category(preference)
+    return {pref, (CATEGORY_ALIASES if aliases is None else aliases).get(pref, pref)}
+
+
 def match_categories_for_guest(guest: GuestRow, rooms: List[RoomRow]) -> List[str]:
-    preferred = [normalize_category(p) for p in (guest.preferred_categories or []) if p]
+    preferred = [preference_phrases(p) for p in (guest.preferred_categories or []) if p]
     total_people = guest.adults + guest.teens
 
     matched: List[str] = []
@@ -39,9 +55,9 @@ def match_categories_for_guest(guest: GuestRow, rooms: List[RoomRow]) -> List[st
         # If no preferences provided, accept all categories that fit capacity.
         fits_preference = not preferred
 
-        for pref in preferred:
+        for phrases in preferred:
             # Loose matching: substring containment either direction.
-            if pref in room_name_lower or room_name_lower in pref:
+            if any(p in room_name_lower or room_name_lower in p for p in phrases):
                 fits_preference = True
                 break
 
@@ -93,23 +109,15 @@ def apply_formula(formula: Optional[str], base_price: int) -> Tuple[int, Optiona
     if not formula:
         return base_price, None
 
-    text = formula.strip()
-    if "=" in text:
-        _, rhs = text.split("=", 1)
-    else:
-        rhs = text
-
-    expr = rhs.replace("C", str(base_price)).replace("N", "").strip()
-
     try:
-        new_value = eval(expr, {"__builtins__": {}}, {})
-    except Exception:
+        compiled = compile_formula(formula)
+    except FormulaError:
         return base_price, formula
 
     try:
-        new_int = int(round(float(new_value)))
-    except Exception:
-        new_int = base_price
+        new_int = compiled(base_price)
+    except (ArithmeticError, ValueError):
+        return base_price, formula
 
     return new_int, formula
 
@@ -142,6 +150,29 @@ def calc_price_with_discounts(
     return final_price, applied_offer_id, applied_loyalty, formula_used
 
 
+def first_applicable_offer(
+    offers: List[SpecialOfferData],
+    periods_map: Dict[UUID, List[StayPeriodData]],
+    category: str,
+    stay_dt: date,
+    period_len: int,
+    today: date,
+) -> Optional[SpecialOfferData]:
+    """Reference linear scan; OfferIndex.find returns the same offer."""
+    for off in offers:
+        min_days_ok = (off.min_days or 0) <= period_len
+        if not min_days_ok:
+            continue
+        if not offer_matches_category(off, category):
+            continue
+        if not offer_matches_stay_date(off, periods_map, stay_dt):
+            continue
+        if not offer_matches_booking_date(off, today):
+            continue
+        return off
+    return None
+
+
 def build_priced_stays_for_guest(
     guest: GuestRow,
     matched_prices: List[RegularPrice],
@@ -149,26 +180,21 @@ def build_priced_stays_for_guest(
     offers: List[SpecialOfferData],
     periods_map: Dict[UUID, List[StayPeriodData]],
     today: date,
+    offer_index: Optional["OfferIndex"] = None,
 ) -> List[PricedStay]:
     stays: List[PricedStay] = []
     grouped = group_regular_prices(matched_prices)
 
     for block in grouped:
         period_len = (block["end_date"] - block["start_date"]).days + 1
+        category_index = offer_index.for_category(block["category"]) if offer_index else None
         for dt in block["dates"]:
-            applicable_offer: Optional[SpecialOfferData] = None
-            for off in offers:
-                min_days_ok = (off.min_days or 0) <= period_len
-                if not min_days_ok:
-                    continue
-                if not offer_matches_category(off, block["category"]):
-                    continue
-                if not offer_matches_stay_date(off, periods_map, dt):
-                    continue
-                if not offer_matches_booking_date(off, today):
-                    continue
-                applicable_offer = off
-                break
+            if category_index is not None:
+                applicable_offer = category_index.find(dt.toordinal(), period_len)
+            else:
+                applicable_offer = first_applicable_offer(
+                    offers, periods_map, block["category"], dt, period_len, today
+                )
 
             new_breakfast, offer_id_bf, loyalty_bf, formula_used = calc_price_with_discounts(
                 base_price=block["only_breakfast"],
@@ -294,15 +320,13 @@ def group_stays_into_periods(stays: List[PricedStay]) -> List[AggregatedRow]:
     prev_date = current.stay_date
     last_room_dates = [current.stay_date] if current.is_last_room else []
 
-    def make_period_str(start: date, end: date) -> str:
-        return f"{start.isoformat()}-{end.isoformat()}"
-
     def push_agg(stay: PricedStay, start: date, end: date, last_room_dates_block: List[date]):
         result.append(
             AggregatedRow(
                 guest_id=stay.guest_id,
                 category=stay.category,
-                period=make_period_str(start, end),
+                period_start=start,
+                period_end=end,
                 regular_breakfast_price=stay.regular_breakfast_price,
                 new_breakfast_price=stay.new_breakfast_price,
                 regular_full_pansion_price=stay.regular_full_pansion_price,
@@ -344,3 +368,104 @@ def group_stays_into_periods(stays: List[PricedStay]) -> List[AggregatedRow]:
     push_agg(current, start_date, prev_date, last_room_dates)
 
     return result
+
+
+# category, date ordinal, breakfast price, full board price, last room flag
+PriceRow = Tuple[str, int, int, int, bool]
+
+
+def stream_priced_periods(
+    guest: GuestRow,
+    rows: Iterable[PriceRow],
+    loyalty_discounts: Dict[str, int],
+    offer_index: "OfferIndex",
+) -> Iterator[AggregatedRow]:
+    """
+    Single pass over prices ordered by (category, date), as fetch_all_regular_prices
+    returns them. Yields the same periods as build_priced_stays_for_guest +
+    group_stays_into_periods, in date order instead of sorted by key, holding only
+    the current price block instead of per-day objects.
+    """
+    block: List[Tuple[int, bool]] = []
+    block_key: Optional[Tuple[str, int, int]] = None
+    done: Set[str] = set()
+    for category, ordinal, ob, fp, last_room in rows:
+        if block_key is not None:
+            if (category, ob, fp) == block_key and ordinal == block[-1][0] + 1:
+                block.append((ordinal, last_room))
+                continue
+            if category == block_key[0] and ordinal <= block[-1][0]:
+                raise ValueError(f"prices of {category!r} are not ordered by date")
+            yield from _block_periods(guest, block_key, block, loyalty_discounts, offer_index)
+            if category != block_key[0]:
+                done.add(block_key[0])
+        if category in done:
+            raise ValueError(f"prices of {category!r} are not grouped by category")
+        block_key = (category, ob, fp)
+        block = [(ordinal, last_room)]
+
+    if block_key is not None:
+        yield from _block_periods(guest, block_key, block, loyalty_discounts, offer_index)
+
+
+def _block_periods(
+    guest: GuestRow,
+    block_key: Tuple[str, int, int],
+    block: List[Tuple[int, bool]],
+    loyalty_discounts: Dict[str, int],
+    offer_index: "OfferIndex",
+) -> Iterator[AggregatedRow]:
+    """Periods of one price block: consecutive days with equal prices after offers and loyalty."""
+    category, ob, fp = block_key
+    period_len = block[-1][0] - block[0][0] + 1
+    category_index = offer_index.for_category(category)
+
+    # Prices in a block are equal, so the result depends only on the offer
+    priced: Dict[Optional[UUID], Tuple] = {}
+    run: Optional[Tuple] = None
+    run_start = run_end = 0
+    last_rooms: List[int] = []
+
+    def make_row() -> AggregatedRow:
+        new_breakfast, new_full, offer_id, loyalty, formula = run
+        return AggregatedRow(
+            guest_id=guest.id,
+            category=str(category),
+            period_start=date.fromordinal(run_start),
+            period_end=date.fromordinal(run_end),
+            regular_breakfast_price=ob,
+            new_breakfast_price=new_breakfast,
+            regular_full_pansion_price=fp,
+            new_full_pansion_price=new_full,
+            applied_special_offer=offer_id,
+            applied_loyalty=loyalty,
+            formula_used=formula,
+            is_last_room=",".join(date.fromordinal(d).isoformat() for d in last_rooms),
+        )
+
+    for ordinal, last_room in block:
+        offer = category_index.find(ordinal, period_len)
+        key = offer.id if offer is not None else None
+        values = priced.get(key)
+        if values is None:
+            new_breakfast, offer_id_bf, loyalty_bf, formula_used = calc_price_with_discounts(
+                ob, guest.loyalty_status, loyalty_discounts, offer
+            )
+            new_full, offer_id_fp, loyalty_fp, _ = calc_price_with_discounts(
+                fp, guest.loyalty_status, loyalty_discounts, offer
+            )
+            values = (new_breakfast, new_full, offer_id_bf or offer_id_fp, loyalty_bf or loyalty_fp, formula_used)
+            priced[key] = values
+
+        if values != run:
+            if run is not None:
+                yield make_row()
+            run = values
+            run_start = ordinal
+            last_rooms = []
+        run_end = ordinal
+        if last_room:
+            last_rooms.append(ordinal)
+
+    if run is not None:
+        yield make_row()
@@ -1,72 +1,421 @@
-from datetime import date
-from typing import Dict, List, Optional
+import asyncio
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
 from uuid import UUID
 
 from infrastructure.db import pricing_repository as repo
+from infrastructure.db import pricing_state_repo as state_repo
 from infrastructure.db.common_db import get_connection
+from infrastructure.db.room_categories_repo import ensure_room_categories, fetch_room_categories
 
-from .models import GuestRow, RoomRow, SpecialOfferData, StayPeriodData
-from .pricing_logic import (
-    build_priced_stays_for_guest,
-    group_stays_into_periods,
-    match_categories_for_guest,
-)
+from .category_dictionary import CategoryDictionary
+from .change_tracking import category_fingerprints, guest_fingerprint
+from .columnar import AggregatedColumns
+from .models import AggregatedRow, GuestRow, RoomRow, SpecialOfferData, StayPeriodData
+from .offer_index import OfferIndex
+from .parallel_pricing import PricingJob, price_jobs
+from .price_cube import PriceCube
+from .sql_backend import run_sql_pricing
+from .stay_windows import StayWindow, cheapest_windows
+from .pricing_logic import match_categories_for_guest, stream_priced_periods
 
+if TYPE_CHECKING:
+    from .vector_engine import VectorPricingEngine
 
-def _process_guest(
-    conn,
-    guest: GuestRow,
+# numpy — VectorPricingEngine over the whole price grid, python — per-guest pricing_logic,
+# sql — one INSERT … SELECT in Postgres (sql_backend)
+PRICING_ENGINE = os.getenv("PRICING_ENGINE", "numpy")
+# Below this many profile jobs forking costs more than it saves
+PRICING_PARALLEL_MIN_JOBS = int(os.getenv("PRICING_PARALLEL_MIN_JOBS", "200"))
+# Guests per guest_prices write transaction
+PRICING_WRITE_BATCH = int(os.getenv("PRICING_WRITE_BATCH", "500"))
+# Seconds single-guest repricing reuses the loaded price cube, offer index and loyalty table
+PRICING_CONTEXT_TTL = int(os.getenv("PRICING_CONTEXT_TTL", "600"))
+
+# Guests with equal matched categories and loyalty status get identical prices
+ProfileKey = Tuple[Tuple[str, ...], Optional[str]]
+
+
+@dataclass
+class PricingContext:
+    rooms: List[RoomRow]
+    loyalty_discounts: Dict[str, int]
+    offers: List[SpecialOfferData]
+    stay_periods: Dict[UUID, List[StayPeriodData]]
+    today: date
+    offer_index: OfferIndex
+    price_cube: PriceCube
+    categories: CategoryDictionary
+    engine: Optional["VectorPricingEngine"] = None
+
+
+def build_pricing_context(
     rooms: List[RoomRow],
     loyalty_discounts: Dict[str, int],
     offers: List[SpecialOfferData],
     stay_periods: Dict[UUID, List[StayPeriodData]],
+    price_rows,
     today: date,
-) -> None:
-    repo.delete_guest_prices(conn, guest.id)
+    category_rows=(),
+) -> PricingContext:
+    offer_index = OfferIndex(offers, stay_periods, today)
+    price_cube = PriceCube(price_rows)
+    categories = CategoryDictionary(category_rows)
+    categories.add(room.category_name for room in rooms)
+    categories.add(price_cube.categories)
 
-    matched_categories = match_categories_for_guest(guest, rooms)
-    if not matched_categories:
-        print(f"No matching categories for guest {guest.id}")
-        return
+    engine = None
+    if PRICING_ENGINE == "numpy":
+        from .vector_engine import VectorPricingEngine
 
-    regular_prices = repo.fetch_regular_prices(conn, matched_categories)
-    if not regular_prices:
-        print(f"No regular prices found for guest {guest.id}")
-        return
+        engine = VectorPricingEngine(price_cube, offer_index, loyalty_discounts, rooms)
 
-    stays = build_priced_stays_for_guest(
-        guest=guest,
-        matched_prices=regular_prices,
+    return PricingContext(
+        rooms=rooms,
         loyalty_discounts=loyalty_discounts,
         offers=offers,
-        periods_map=stay_periods,
+        stay_periods=stay_periods,
         today=today,
+        offer_index=offer_index,
+        price_cube=price_cube,
+        categories=categories,
+        engine=engine,
+    )
+
+
+def load_pricing_context(conn, today: date) -> PricingContext:
+    ctx = build_pricing_context(
+        rooms=repo.fetch_rooms(conn),
+        loyalty_discounts=repo.fetch_loyalty_discounts(conn),
+        offers=repo.fetch_special_offers(conn),
+        stay_periods=repo.fetch_stay_periods(conn),
+        price_rows=repo.fetch_all_regular_prices(conn),
+        today=today,
+        category_rows=fetch_room_categories(conn),
+    )
+    print(f"Loaded {len(ctx.price_cube)} regular prices in {len(ctx.price_cube.categories)} categories")
+    return ctx
+
+
+def migrate_pricing_tables() -> None:
+    """
+    One-time schema changes of the pricing tables. Called at bot startup, before the
+    scheduler or a request can read or write guest_prices; run_pricing repeats it for
+    the standalone scripts.
+    """
+    with get_connection() as conn:
+        repo.ensure_guest_prices_period(conn)
+        # reprice_guest saves guest fingerprints next to guest_prices
+        state_repo.ensure_pricing_state_tables(conn)
+
+
+_context_lock = threading.Lock()
+_cached_context: Optional[Tuple[float, PricingContext]] = None
+
+
+def _remember_context(ctx: PricingContext) -> None:
+    global _cached_context
+    _cached_context = (time.monotonic(), ctx)
+
+
+def cached_pricing_context(conn, today: date) -> PricingContext:
+    """
+    Shared pricing inputs for single-guest repricing. Reloaded when older than
+    PRICING_CONTEXT_TTL or loaded for another day; run_pricing in the same
+    process replaces it with the context it has just loaded. Runs on bot
+    requests, so it relies on migrate_pricing_tables having run at startup.
+    """
+    with _context_lock:
+        if _cached_context is not None:
+            loaded_at, ctx = _cached_context
+            if ctx.today == today and time.monotonic() - loaded_at < PRICING_CONTEXT_TTL:
+                return ctx
+        ctx = load_pricing_context(conn, today)
+        _remember_context(ctx)
+        return ctx
+
+
+def pricing_profile_key(guest: GuestRow, matched_categories: List[str]) -> ProfileKey:
+    return tuple(matched_categories), guest.loyalty_status
+
+
+def group_guests_by_profile(
+    guests: List[GuestRow],
+    rooms: List[RoomRow],
+    categories: Optional[CategoryDictionary] = None,
+) -> Dict[ProfileKey, List[GuestRow]]:
+    profiles: Dict[ProfileKey, List[GuestRow]] = {}
+    for guest in guests:
+        if categories is not None:
+            matched_categories = categories.match_rooms(guest, rooms)
+        else:
+            matched_categories = match_categories_for_guest(guest, rooms)
+        profiles.setdefault(pricing_profile_key(guest, matched_categories), []).append(guest)
+    return profiles
+
+
+def _price_profile(
+    ctx: PricingContext,
+    guest: GuestRow,
+    matched_categories: List[str],
+    only_categories: Optional[Set[str]] = None,
+) -> List[AggregatedRow]:
+    """Aggregated rows for a representative guest of a profile, optionally for a subset of cube categories."""
+    if not matched_categories:
+        print(f"No matching categories for guest {guest.id}")
+        return []
+
+    if ctx.engine is not None:
+        aggregated = ctx.engine.price_guest(guest, matched_categories, only_categories)
+        if not aggregated and only_categories is None:
+            print(f"No regular prices found for guest {guest.id}")
+        return aggregated
+
+    cube = ctx.price_cube
+    cat_ids = [
+        cat_id for cat_id in cube.match_categories(matched_categories)
+        if only_categories is None or cube.categories[cat_id] in only_categories
+    ]
+    aggregated = list(
+        stream_priced_periods(guest, cube.iter_rows(cat_ids), ctx.loyalty_discounts, ctx.offer_index)
+    )
+    if not aggregated and only_categories is None:
+        print(f"No regular prices found for guest {guest.id}")
+    return aggregated
+
+
+class _GuestPricesBatch:
+    """
+    Collects rewritten and patched guests and flushes them every `size` guests with
+    repo.replace_guest_prices: one COPY and one transaction per batch. Guests of a
+    profile share its AggregatedColumns instead of holding a row copy each.
+    """
+
+    def __init__(self, conn, size: int = PRICING_WRITE_BATCH):
+        self.conn = conn
+        self.size = size
+        self.profiles: List[Tuple[int, AggregatedColumns]] = []
+        self.guest_ids: List[int] = []
+        self.guest_categories: List[Tuple[int, str]] = []
+        self.fingerprints: Dict[int, str] = {}
+        self.guests = 0
+        self.rows = 0
+        self.written = 0
+        self.seconds = 0.0
+
+    def replace(self, guest: GuestRow, columns: AggregatedColumns, fingerprint: str) -> None:
+        self.guest_ids.append(guest.id)
+        self.fingerprints[guest.id] = fingerprint
+        self._added(guest, columns)
+
+    def patch(self, guest: GuestRow, categories: List[str], columns: AggregatedColumns) -> None:
+        self.guest_categories.extend((guest.id, category) for category in categories)
+        self._added(guest, columns)
+
+    def _added(self, guest: GuestRow, columns: AggregatedColumns) -> None:
+        self.profiles.append((guest.id, columns))
+        self.rows += len(columns)
+        self.guests += 1
+        if self.guests >= self.size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.guests:
+            return
+        started = time.perf_counter()
+        self.written += repo.replace_guest_prices(
+            self.conn, (), self.guest_ids, self.guest_categories, self.profiles
+        )
+        # Fingerprints only after the prices are committed: a failed batch is redone next run
+        state_repo.save_guest_fingerprints(self.conn, self.fingerprints)
+        self.seconds += time.perf_counter() - started
+        print(f"Saved {self.rows} rows for {self.guests} guests")
+        self.profiles, self.guest_ids, self.guest_categories = [], [], []
+        self.fingerprints = {}
+        self.guests = self.rows = 0
+
+
+def _stale_categories(ctx: PricingContext, matched_categories: List[str], changed: Set[str]) -> List[str]:
+    if not matched_categories:
+        return []
+    cube = ctx.price_cube
+    return sorted(
+        cube.categories[cat_id]
+        for cat_id in cube.match_categories(matched_categories)
+        if cube.categories[cat_id] in changed
     )
 
-    aggregated = group_stays_into_periods(stays)
-    repo.save_guest_prices(conn, aggregated)
 
-    print(f"Saved {len(aggregated)} rows for guest {guest.id}")
+def run_pricing(today: Optional[date] = None, full: bool = False, workers: int = 1) -> None:
+    """
+    Reprice guests whose inputs changed since the last run.
 
+    A guest whose matched categories or loyalty discount changed (or who was never
+    priced) is rewritten completely; other guests only get the categories whose
+    regular prices or applicable offers changed. full=True ignores saved state.
 
-def run_pricing(today: Optional[date] = None) -> None:
+    workers > 1 forks a process pool, which is only safe in a single-threaded
+    process without other open connections: pass it from scripts/run_pricing.py,
+    never from the bot or the scheduler thread.
+    """
     work_date = today or date.today()
 
     with get_connection() as conn:
+        state_repo.ensure_pricing_state_tables(conn)
+        repo.ensure_guest_prices_period(conn)
+        # Backfills regular_prices.category_id the SQL backend joins on
+        ensure_room_categories(conn)
+        if PRICING_ENGINE == "sql":
+            written = run_sql_pricing(conn, work_date)
+            # The SQL backend always rewrites everything; the next incremental run starts from scratch
+            state_repo.clear_pricing_state(conn)
+            print(f"SQL pricing wrote {written} guest_prices rows")
+            return
+
+        if full:
+            state_repo.clear_pricing_state(conn)
+
         guests = repo.fetch_guests(conn)
-        rooms = repo.fetch_rooms(conn)
-        loyalty_discounts = repo.fetch_loyalty_discounts(conn)
-        offers = repo.fetch_special_offers(conn)
-        stay_periods = repo.fetch_stay_periods(conn)
-
-        for guest in guests:
-            print(f"Processing guest {guest.first_name} {guest.last_name} (id={guest.id})")
-            _process_guest(
-                conn=conn,
-                guest=guest,
-                rooms=rooms,
-                loyalty_discounts=loyalty_discounts,
-                offers=offers,
-                stay_periods=stay_periods,
-                today=work_date,
-            )
+        ctx = load_pricing_context(conn, work_date)
+        _remember_context(ctx)
+
+        current_categories = category_fingerprints(ctx.price_cube, ctx.offer_index)
+        previous_categories = state_repo.get_category_fingerprints(conn)
+        previous_guests = state_repo.get_guest_fingerprints(conn)
+        changed_categories = {
+            name for name, fingerprint in current_categories.items()
+            if previous_categories.get(name) != fingerprint
+        }
+        removed_categories = sorted(set(previous_categories) - set(current_categories))
+        print(
+            f"Categories: {len(changed_categories)} changed, {len(removed_categories)} removed "
+            f"of {len(current_categories)}"
+        )
+        if removed_categories:
+            repo.delete_prices_for_categories(conn, removed_categories)
+
+        profiles = group_guests_by_profile(guests, ctx.rooms, ctx.categories)
+        print(f"Pricing {len(guests)} guests in {len(profiles)} profiles")
+
+        # Plan: which profiles need a full computation and which only a category patch
+        jobs: List[PricingJob] = []
+        writes: List[Tuple[str, List[Tuple[GuestRow, str]], List[str]]] = []
+        for (matched_categories, _), members in profiles.items():
+            matched = list(matched_categories)
+            representative = members[0]
+            stale_categories = _stale_categories(ctx, matched, changed_categories)
+
+            rewrite: List[Tuple[GuestRow, str]] = []
+            patch: List[Tuple[GuestRow, str]] = []
+            for guest in members:
+                fingerprint = guest_fingerprint(guest, matched, ctx.loyalty_discounts)
+                if previous_guests.get(guest.id) != fingerprint:
+                    rewrite.append((guest, fingerprint))
+                elif stale_categories:
+                    patch.append((guest, fingerprint))
+
+            if rewrite:
+                jobs.append((representative, matched, None))
+                writes.append(("replace", rewrite, stale_categories))
+            if patch:
+                jobs.append((representative, matched, set(stale_categories)))
+                writes.append(("patch", patch, stale_categories))
+
+        if len(jobs) < PRICING_PARALLEL_MIN_JOBS:
+            workers = 1
+        print(f"Computing {len(jobs)} profile jobs with {workers} worker(s)")
+
+        batch = _GuestPricesBatch(conn)
+        repriced = patched = 0
+        results = price_jobs(_price_profile, ctx, jobs, workers)
+        for (mode, members, stale_categories), rows in zip(writes, results):
+            columns = AggregatedColumns.from_rows(rows)
+            for guest, fingerprint in members:
+                if mode == "replace":
+                    batch.replace(guest, columns, fingerprint)
+                    repriced += 1
+                else:
+                    batch.patch(guest, stale_categories, columns)
+                    patched += 1
+        batch.flush()
+
+        state_repo.save_category_fingerprints(conn, current_categories, removed_categories)
+        print(f"Repriced {repriced} guests, patched {patched}, unchanged {len(guests) - repriced - patched}")
+        if batch.written:
+            # seconds can be 0 on a coarse clock for a tiny batch
+            rate = f" ({batch.written / batch.seconds:.0f} rows/s)" if batch.seconds > 0 else ""
+            print(f"Wrote {batch.written} guest_prices rows in {batch.seconds:.2f}s{rate}")
+
+
+def reprice_guest(guest_id: int, today: Optional[date] = None) -> int:
+    """
+    Recompute and store guest_prices of one guest, e.g. right after a profile edit,
+    from the cached shared inputs. Returns the number of rows written.
+    """
+    work_date = today or date.today()
+    started = time.perf_counter()
+    with get_connection() as conn:
+        if PRICING_ENGINE == "sql":
+            written = run_sql_pricing(conn, work_date, [guest_id])
+        else:
+            guests = repo.fetch_guests(conn, [guest_id])
+            if not guests:
+                print(f"[warn] guest {guest_id} not found, nothing to price")
+                return 0
+            guest = guests[0]
+            ctx = cached_pricing_context(conn, work_date)
+            matched = ctx.categories.match_rooms(guest, ctx.rooms)
+            rows = _price_profile(ctx, guest, matched)
+
+            batch = _GuestPricesBatch(conn)
+            batch.replace(guest, AggregatedColumns.from_rows(rows), guest_fingerprint(guest, matched, ctx.loyalty_discounts))
+            batch.flush()
+            written = batch.written
+    print(f"Repriced guest {guest_id}: {written} rows in {time.perf_counter() - started:.3f}s")
+    return written
+
+
+async def price_guest(guest_id: int) -> int:
+    """reprice_guest for the bot: runs in a worker thread so the event loop is not blocked."""
+    return await asyncio.to_thread(reprice_guest, guest_id)
+
+
+def find_cheapest_stays(
+    guest_id: int,
+    nights: int,
+    horizon_days: int = 60,
+    top: int = 5,
+    board: str = "breakfast",
+    today: Optional[date] = None,
+) -> List[StayWindow]:
+    """
+    Cheapest stays of `nights` nights in the guest's categories within the next
+    `horizon_days` days, with the offers and loyalty discount the guest would get.
+    """
+    work_date = today or date.today()
+    with get_connection() as conn:
+        guests = repo.fetch_guests(conn, [guest_id])
+        if not guests:
+            return []
+        guest = guests[0]
+        ctx = cached_pricing_context(conn, work_date)
+
+    matched = ctx.categories.match_rooms(guest, ctx.rooms)
+    if not matched:
+        return []
+    return cheapest_windows(
+        guest,
+        ctx.price_cube,
+        ctx.price_cube.match_categories(matched),
+        ctx.offer_index,
+        ctx.loyalty_discounts,
+        nights,
+        work_date,
+        work_date + timedelta(days=horizon_days),
+        top,
+        board,
+    )
@@ -0,0 +1,111 @@
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from infrastructure.db import pricing_repository as repo
+from infrastructure.db import sql_pricing_repo as sql_repo
+from infrastructure.db.room_categories_repo import fetch_room_categories
+
+from .category_dictionary import CategoryDictionary
+from .formula import FormulaError, compile_formula
+from .models import AggregatedRow, RoomRow, SpecialOfferData
+from .pricing_logic import apply_formula
+
+Coefficient = Tuple[UUID, float, float]
+OfferValue = Tuple[UUID, int, int]
+
+
+def _linear_price(a: float, b: float, base_price: int) -> Optional[int]:
+    try:
+        return int(round(a * base_price + b))
+    except (ArithmeticError, ValueError):
+        return None
+
+
+def offer_formula_tables(
+    offers: Iterable[SpecialOfferData],
+    base_prices: List[int],
+) -> Tuple[List[Coefficient], List[OfferValue]]:
+    """
+    Per-offer formula data for the SQL backend. A formula becomes coefficients
+    (a, b) for round(a*C + b) when that reproduces apply_formula exactly on every
+    base price present in regular_prices; otherwise (non-linear, failing or not
+    bit-identical in float64) its results are tabulated per base price.
+    """
+    coefficients: List[Coefficient] = []
+    values: List[OfferValue] = []
+    for offer in offers:
+        if not offer.formula:
+            continue
+        try:
+            linear = compile_formula(offer.formula).linear
+        except FormulaError:
+            # apply_formula keeps the base price for formulas that do not compile
+            linear = (1.0, 0.0)
+
+        expected = [apply_formula(offer.formula, base)[0] for base in base_prices]
+        if linear is not None:
+            a, b = float(linear[0]), float(linear[1])
+            if all(_linear_price(a, b, base) == new for base, new in zip(base_prices, expected)):
+                coefficients.append((offer.id, a, b))
+                continue
+        values.extend((offer.id, base, new) for base, new in zip(base_prices, expected))
+    return coefficients, values
+
+
+def category_id_tables(
+    categories: CategoryDictionary,
+    offers: Iterable[SpecialOfferData],
+    rooms: Iterable[RoomRow],
+) -> Tuple[List[Tuple[UUID, int]], List[Tuple[str, int]]]:
+    """
+    Category matching for the SQL backend resolved to room_categories ids with the
+    rules of the Python engines: offer categories as in OfferIndex, room names to
+    price categories by ILIKE '%room%' as in PriceCube.match_categories.
+    """
+    offer_categories = [
+        (offer.id, category_id)
+        for offer in offers
+        for category_id in sorted(categories.offer_category_ids(offer.categories or []))
+    ]
+    room_names = {room.category_name for room in rooms if room.category_name is not None}
+    room_categories = [
+        (name, category_id) for name in sorted(room_names) for category_id in sorted(categories.like_ids(name))
+    ]
+    return offer_categories, room_categories
+
+
+def _prepare(conn) -> None:
+    sql_repo.begin_snapshot(conn)
+    base_prices = sql_repo.fetch_base_prices(conn)
+    offers = repo.fetch_special_offers(conn)
+    coefficients, values = offer_formula_tables(offers, base_prices)
+    sql_repo.load_formula_tables(conn, coefficients, values)
+    categories = CategoryDictionary(fetch_room_categories(conn))
+    sql_repo.load_category_tables(conn, *category_id_tables(categories, offers, repo.fetch_rooms(conn)))
+    print(
+        f"SQL pricing: {len(coefficients)} offers by coefficients, "
+        f"{len({offer_id for offer_id, _, _ in values})} tabulated over {len(base_prices)} base prices, "
+        f"{len(categories)} categories"
+    )
+
+
+def fetch_sql_priced_rows(conn, today: date, guest_ids: Optional[List[int]] = None) -> List[AggregatedRow]:
+    """Rows the SQL backend would write, without touching guest_prices."""
+    try:
+        _prepare(conn)
+        return sql_repo.fetch_priced_rows(conn, today, guest_ids)
+    finally:
+        conn.rollback()
+
+
+def run_sql_pricing(conn, today: date, guest_ids: Optional[List[int]] = None) -> int:
+    """Reprice guests (all by default) with one INSERT … SELECT in a single transaction."""
+    try:
+        _prepare(conn)
+        written = sql_repo.rewrite_guest_prices(conn, today, guest_ids)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return written
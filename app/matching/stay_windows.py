@@ -0,0 +1,170 @@
+import heapq
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from .models import GuestRow
+from .offer_index import OfferIndex
+from .price_cube import PriceCube
+from .pricing_logic import calc_price_with_discounts
+
+BOARDS = ("breakfast", "full_pansion")
+
+
+@dataclass(slots=True)
+class StayWindow:
+    category: str
+    check_in: date
+    nights: int
+    regular_breakfast_total: int
+    breakfast_total: int
+    regular_full_pansion_total: int
+    full_pansion_total: int
+    applied_special_offers: List[UUID] = field(default_factory=list)
+    applied_loyalty: Optional[str] = None
+
+    @property
+    def check_out(self) -> date:
+        return self.check_in + timedelta(days=self.nights)
+
+
+@dataclass(slots=True)
+class _NightlyPrices:
+    """Per-night prices of one category for stays of a fixed length, with prefix sums of the ranked board."""
+
+    category: str
+    ordinals: List[int]
+    regular_breakfast: List[int]
+    breakfast: List[int]
+    regular_full_pansion: List[int]
+    full_pansion: List[int]
+    offers: List[Optional[UUID]]
+    loyalty: List[Optional[str]]
+    prefix: List[int]
+
+
+def _nightly_prices(
+    guest: GuestRow,
+    cube: PriceCube,
+    cat_id: int,
+    offer_index: OfferIndex,
+    loyalty_discounts: Dict[str, int],
+    nights: int,
+    first: int,
+    last: int,
+    board: str,
+) -> _NightlyPrices:
+    """
+    Nights in [first, last] priced like stream_priced_periods, except that the
+    stay length is the period length offers' min_days is checked against.
+    """
+    category = cube.categories[cat_id]
+    ordinals, only_breakfast, full_pansion, _ = cube.columns(cat_id)
+    lo, hi = bisect_left(ordinals, first), bisect_right(ordinals, last)
+    category_index = offer_index.for_category(category)
+
+    nightly = _NightlyPrices(category, list(ordinals[lo:hi]), [], [], [], [], [], [], [])
+    # Few distinct (price, offer) pairs per category: price each pair once
+    priced: Dict[Tuple[int, int, Optional[UUID]], Tuple] = {}
+    for i in range(lo, hi):
+        ob, fp = only_breakfast[i], full_pansion[i]
+        offer = category_index.find(ordinals[i], nights)
+        key = (ob, fp, offer.id if offer is not None else None)
+        values = priced.get(key)
+        if values is None:
+            new_breakfast, offer_bf, loyalty_bf, _ = calc_price_with_discounts(
+                ob, guest.loyalty_status, loyalty_discounts, offer
+            )
+            new_full, offer_fp, loyalty_fp, _ = calc_price_with_discounts(
+                fp, guest.loyalty_status, loyalty_discounts, offer
+            )
+            values = (new_breakfast, new_full, offer_bf or offer_fp, loyalty_bf or loyalty_fp)
+            priced[key] = values
+        nightly.regular_breakfast.append(ob)
+        nightly.regular_full_pansion.append(fp)
+        nightly.breakfast.append(values[0])
+        nightly.full_pansion.append(values[1])
+        nightly.offers.append(values[2])
+        nightly.loyalty.append(values[3])
+
+    ranked = nightly.breakfast if board == "breakfast" else nightly.full_pansion
+    nightly.prefix = list(accumulate(ranked, initial=0))
+    return nightly
+
+
+def _window_totals(nightly: _NightlyPrices, nights: int, last_check_in: int) -> Iterator[Tuple[int, int, int]]:
+    """(total, check-in ordinal, index) of every run of `nights` consecutive priced nights."""
+    ordinals, prefix = nightly.ordinals, nightly.prefix
+    for i in range(len(ordinals) - nights + 1):
+        if ordinals[i] > last_check_in:
+            break
+        # Ordinals are strictly increasing: the slice is consecutive iff it spans nights - 1 days
+        if ordinals[i + nights - 1] - ordinals[i] == nights - 1:
+            yield prefix[i + nights] - prefix[i], ordinals[i], i
+
+
+def cheapest_windows(
+    guest: GuestRow,
+    cube: PriceCube,
+    cat_ids: List[int],
+    offer_index: OfferIndex,
+    loyalty_discounts: Dict[str, int],
+    nights: int,
+    first_check_in: date,
+    last_check_out: date,
+    top: int = 5,
+    board: str = "breakfast",
+) -> List[StayWindow]:
+    """
+    The `top` cheapest stays of `nights` consecutive nights in the given categories
+    between first_check_in and last_check_out, ranked by the total of `board`.
+    Each category is one pass over its nights: prices per night, prefix sums,
+    then every window total in O(1); the best windows are kept in a heap of size
+    `top`, so the whole search is linear in the number of priced nights.
+    """
+    if nights < 1 or top < 1:
+        return []
+    if board not in BOARDS:
+        raise ValueError(f"unknown board {board!r}, expected one of {BOARDS}")
+
+    first = first_check_in.toordinal()
+    last_night = last_check_out.toordinal() - 1
+    last_check_in = last_night - nights + 1
+    if last_check_in < first:
+        return []
+
+    by_category = [
+        _nightly_prices(guest, cube, cat_id, offer_index, loyalty_discounts, nights, first, last_night, board)
+        for cat_id in cat_ids
+    ]
+    candidates = (
+        (total, check_in, nightly.category, position, i)
+        for position, nightly in enumerate(by_category)
+        for total, check_in, i in _window_totals(nightly, nights, last_check_in)
+    )
+
+    windows: List[StayWindow] = []
+    for _, check_in, category, position, i in heapq.nsmallest(top, candidates):
+        nightly = by_category[position]
+        stay = slice(i, i + nights)
+        offers: List[UUID] = []
+        for offer_id in nightly.offers[stay]:
+            if offer_id is not None and offer_id not in offers:
+                offers.append(offer_id)
+        windows.append(
+            StayWindow(
+                category=category,
+                check_in=date.fromordinal(check_in),
+                nights=nights,
+                regular_breakfast_total=sum(nightly.regular_breakfast[stay]),
+                breakfast_total=sum(nightly.breakfast[stay]),
+                regular_full_pansion_total=sum(nightly.regular_full_pansion[stay]),
+                full_pansion_total=sum(nightly.full_pansion[stay]),
+                applied_special_offers=offers,
+                applied_loyalty=next((loyalty for loyalty in nightly.loyalty[stay] if loyalty), None),
+            )
+        )
+    return windows
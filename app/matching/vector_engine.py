@@ -0,0 +1,324 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from .formula import FormulaError, compile_formula
+from .models import AggregatedRow, GuestRow, RoomRow, SpecialOfferData
+from .offer_index import OfferIndex
+from .price_cube import PriceCube
+from .pricing_logic import (
+    build_priced_stays_for_guest,
+    group_stays_into_periods,
+    match_categories_for_guest,
+)
+
+# Aggregated period without guest_id: category, start, end, prices, offer, loyalty, formula, last rooms
+_Row = Tuple[str, date, date, int, int, int, int, Optional[SpecialOfferData], Optional[str], Optional[str], str]
+
+
+@dataclass
+class _CategoryGrid:
+    """Guest-independent part of pricing for one category: offers and offer prices per date."""
+
+    ordinals: np.ndarray
+    only_breakfast: np.ndarray
+    full_pansion: np.ndarray
+    is_last_room: np.ndarray
+    # -1 when no offer applies, otherwise index into offers
+    offer_codes: np.ndarray
+    offers: List[SpecialOfferData]
+    breakfast_after_offer: np.ndarray
+    full_after_offer: np.ndarray
+    # offer applied with a formula: its id and formula go to the output
+    offer_applied: np.ndarray
+    loyalty_allowed: np.ndarray
+
+
+def _apply_formula_array(formula: str, base: np.ndarray) -> np.ndarray:
+    """Vectorised apply_formula: same float64 arithmetic and half-even rounding, failures keep the base."""
+    try:
+        compiled = compile_formula(formula)
+    except FormulaError:
+        return base.copy()
+    with np.errstate(all="ignore"):
+        values = np.broadcast_to(
+            np.asarray(compiled.fn(base.astype(np.float64)), dtype=np.float64), base.shape
+        )
+        rounded = np.rint(values)
+    ok = np.isfinite(rounded)
+    return np.where(ok, rounded, base).astype(np.int64)
+
+
+class VectorPricingEngine:
+    """
+    Same results as build_priced_stays_for_guest + group_stays_into_periods, computed
+    with array operations over the category x date grid of a PriceCube.
+
+    Offers, offer prices and price blocks depend only on the category, so they are
+    computed once per category; loyalty is applied per (category, loyalty status), and
+    guests with the same status reuse the aggregated periods.
+    """
+
+    def __init__(
+        self,
+        cube: PriceCube,
+        offer_index: OfferIndex,
+        loyalty_discounts: Dict[str, int],
+        rooms: List[RoomRow],
+    ):
+        self.cube = cube
+        self.offer_index = offer_index
+        self.loyalty_discounts = loyalty_discounts
+        self.rooms = rooms
+        self._grids: Dict[int, Optional[_CategoryGrid]] = {}
+        self._rows: Dict[Tuple[int, Optional[str]], List[_Row]] = {}
+
+    def price_guest(
+        self,
+        guest: GuestRow,
+        matched_categories: Optional[List[str]] = None,
+        only_categories: Optional[Set[str]] = None,
+    ) -> List[AggregatedRow]:
+        """only_categories limits the result to these cube categories (incremental repricing)."""
+        if matched_categories is None:
+            matched_categories = match_categories_for_guest(guest, self.rooms)
+        if not matched_categories:
+            return []
+
+        rows: List[_Row] = []
+        for cat_id in self.cube.match_categories(matched_categories):
+            if only_categories is not None and self.cube.categories[cat_id] not in only_categories:
+                continue
+            rows.extend(self._category_rows(cat_id, guest.loyalty_status))
+
+        # Same order as group_stays_into_periods
+        rows.sort(
+            key=lambda r: (
+                r[0],
+                str(r[7].id if r[7] is not None else None),
+                r[8] or "",
+                r[9] or "",
+                r[3], r[4], r[5], r[6],
+                r[1],
+            )
+        )
+        return [
+            AggregatedRow(
+                guest_id=guest.id,
+                category=category,
+                period_start=start,
+                period_end=end,
+                regular_breakfast_price=rbp,
+                new_breakfast_price=nbp,
+                regular_full_pansion_price=rfp,
+                new_full_pansion_price=nfp,
+                applied_special_offer=offer.id if offer is not None else None,
+                applied_loyalty=loyalty,
+                formula_used=formula,
+                is_last_room=last_rooms,
+            )
+            for category, start, end, rbp, nbp, rfp, nfp, offer, loyalty, formula, last_rooms in rows
+        ]
+
+    # ---------- per category ----------
+
+    def _category_rows(self, cat_id: int, loyalty_status: Optional[str]) -> List[_Row]:
+        key = (cat_id, loyalty_status)
+        rows = self._rows.get(key)
+        if rows is None:
+            grid = self._grid(cat_id)
+            if grid is None:
+                rows = self._python_rows(cat_id, loyalty_status)
+            else:
+                rows = self._aggregate(self.cube.categories[cat_id], grid, loyalty_status)
+            self._rows[key] = rows
+        return rows
+
+    def _grid(self, cat_id: int) -> Optional[_CategoryGrid]:
+        if cat_id in self._grids:
+            return self._grids[cat_id]
+
+        ordinals, ob, fp, last_room = (
+            np.array(column, dtype=dtype)
+            for column, dtype in zip(self.cube.columns(cat_id), (np.int64, np.int64, np.int64, bool))
+        )
+        order = np.argsort(ordinals, kind="stable")
+        ordinals, ob, fp, last_room = ordinals[order], ob[order], fp[order], last_room[order]
+        if ordinals.size and np.any(np.diff(ordinals) == 0):
+            # Several prices for one date: leave such categories to the reference implementation
+            self._grids[cat_id] = None
+            return None
+
+        n = ordinals.size
+        # Price blocks as in group_regular_prices: same prices on consecutive dates
+        breaks = np.ones(n, dtype=bool)
+        if n > 1:
+            breaks[1:] = (np.diff(ordinals) != 1) | (ob[1:] != ob[:-1]) | (fp[1:] != fp[:-1])
+        block_starts = np.flatnonzero(breaks)
+        block_ends = np.append(block_starts[1:], n)
+
+        category_index = self.offer_index.for_category(self.cube.categories[cat_id])
+        bounds = np.asarray(category_index.bounds, dtype=np.int64)
+        segments = np.searchsorted(bounds, ordinals, side="right") - 1
+
+        offers: List[SpecialOfferData] = []
+        offer_pos: Dict[UUID, int] = {}
+        offer_codes = np.full(n, -1, dtype=np.int64)
+        for start, end in zip(block_starts.tolist(), block_ends.tolist()):
+            period_len = ordinals[end - 1] - ordinals[start] + 1
+            block_segments = segments[start:end]
+            for seg in np.unique(block_segments).tolist():
+                if seg < 0 or seg >= len(category_index.offers):
+                    continue
+                offer = category_index.find(int(bounds[seg]), int(period_len))
+                if offer is None:
+                    continue
+                code = offer_pos.setdefault(offer.id, len(offers))
+                if code == len(offers):
+                    offers.append(offer)
+                offer_codes[start:end][block_segments == seg] = code
+
+        breakfast_after = ob.copy()
+        full_after = fp.copy()
+        offer_applied = np.zeros(n, dtype=bool)
+        loyalty_allowed = offer_codes == -1
+        for code, offer in enumerate(offers):
+            mask = offer_codes == code
+            if offer.loyalty_compatible:
+                loyalty_allowed |= mask
+            if not offer.formula:
+                continue
+            offer_applied |= mask
+            breakfast_after[mask] = _apply_formula_array(offer.formula, ob[mask])
+            full_after[mask] = _apply_formula_array(offer.formula, fp[mask])
+
+        grid = _CategoryGrid(
+            ordinals=ordinals,
+            only_breakfast=ob,
+            full_pansion=fp,
+            is_last_room=last_room,
+            offer_codes=offer_codes,
+            offers=offers,
+            breakfast_after_offer=breakfast_after,
+            full_after_offer=full_after,
+            offer_applied=offer_applied,
+            loyalty_allowed=loyalty_allowed,
+        )
+        self._grids[cat_id] = grid
+        return grid
+
+    def _aggregate(self, category: str, grid: _CategoryGrid, loyalty_status: Optional[str]) -> List[_Row]:
+        n = grid.ordinals.size
+        if n == 0:
+            return []
+
+        discount = None
+        if loyalty_status:
+            status_norm = loyalty_status.strip().lower()
+            discount = None if status_norm == "none" else self.loyalty_discounts.get(status_norm)
+
+        new_breakfast = grid.breakfast_after_offer
+        new_full = grid.full_after_offer
+        loyalty_applied = np.zeros(n, dtype=bool)
+        if discount:
+            loyalty_applied = grid.loyalty_allowed
+            factor = 100 - discount
+            new_breakfast = np.where(
+                loyalty_applied, np.rint(new_breakfast * factor / 100), new_breakfast
+            ).astype(np.int64)
+            new_full = np.where(
+                loyalty_applied, np.rint(new_full * factor / 100), new_full
+            ).astype(np.int64)
+
+        applied_codes = np.where(grid.offer_applied, grid.offer_codes, -1)
+
+        # Run-length encoding into periods, as group_stays_into_periods merges consecutive equal days
+        breaks = np.ones(n, dtype=bool)
+        if n > 1:
+            breaks[1:] = (
+                (np.diff(grid.ordinals) != 1)
+                | (grid.only_breakfast[1:] != grid.only_breakfast[:-1])
+                | (new_breakfast[1:] != new_breakfast[:-1])
+                | (grid.full_pansion[1:] != grid.full_pansion[:-1])
+                | (new_full[1:] != new_full[:-1])
+                | (applied_codes[1:] != applied_codes[:-1])
+                | (loyalty_applied[1:] != loyalty_applied[:-1])
+            )
+        starts = np.flatnonzero(breaks)
+        ends = np.append(starts[1:], n)
+
+        ordinals = grid.ordinals.tolist()
+        last_room = grid.is_last_room.tolist()
+        ob, nbp = grid.only_breakfast.tolist(), new_breakfast.tolist()
+        fp, nfp = grid.full_pansion.tolist(), new_full.tolist()
+        codes, loyal = applied_codes.tolist(), loyalty_applied.tolist()
+
+        rows: List[_Row] = []
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            offer = grid.offers[codes[start]] if codes[start] >= 0 else None
+            last_rooms = ",".join(
+                date.fromordinal(ordinals[i]).isoformat() for i in range(start, end) if last_room[i]
+            )
+            rows.append(
+                (
+                    category,
+                    date.fromordinal(ordinals[start]),
+                    date.fromordinal(ordinals[end - 1]),
+                    ob[start],
+                    nbp[start],
+                    fp[start],
+                    nfp[start],
+                    offer,
+                    loyalty_status if loyal[start] else None,
+                    offer.formula if offer is not None else None,
+                    last_rooms,
+                )
+            )
+        return rows
+
+    def _python_rows(self, cat_id: int, loyalty_status: Optional[str]) -> List[_Row]:
+        category = self.cube.categories[cat_id]
+        guest = GuestRow(
+            id=0,
+            first_name="",
+            last_name="",
+            adults=0,
+            teens=0,
+            infant=0,
+            preferred_categories=[],
+            loyalty_status=loyalty_status,
+        )
+        stays = build_priced_stays_for_guest(
+            guest=guest,
+            matched_prices=self.cube.prices_for_category(cat_id),
+            loyalty_discounts=self.loyalty_discounts,
+            offers=[],
+            periods_map={},
+            today=self.offer_index.today,
+            offer_index=self.offer_index,
+        )
+        offers_by_id = {}
+        for seg_offers in self.offer_index.for_category(category).offers:
+            for offer in seg_offers:
+                offers_by_id[offer.id] = offer
+        rows: List[_Row] = []
+        for agg in group_stays_into_periods(stays):
+            rows.append(
+                (
+                    agg.category,
+                    agg.period_start,
+                    agg.period_end,
+                    agg.regular_breakfast_price,
+                    agg.new_breakfast_price,
+                    agg.regular_full_pansion_price,
+                    agg.new_full_pansion_price,
+                    offers_by_id.get(agg.applied_special_offer),
+                    agg.applied_loyalty,
+                    agg.formula_used,
+                    agg.is_last_room,
+                )
+            )
+        return rows
@@ -5,15 +5,16 @@ from typing import List, Optional
 from psycopg2.extensions import connection
 from psycopg2.errors import UndefinedTable
 
-from app.matching.pricing_logic import normalize_category
+from app.matching.category_dictionary import CategoryDictionary
 
 
-@dataclass
+@dataclass(slots=True)
 class GuestPriceNotification:
     id: int
     guest_id: int
     category: str
-    period: str
+    period_start: date
+    period_end: date
     regular_breakfast_price: Optional[int]
     new_breakfast_price: Optional[int]
     regular_full_pansion_price: Optional[int]
@@ -28,7 +29,7 @@ class GuestPriceNotification:
     is_last_room: Optional[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class CategoryNotification:
     category: str
     items: List[GuestPriceNotification]
@@ -53,14 +54,19 @@ def filter_offers_by_preferences(conn: connection, guest_id: int, offers: List[C
     if not row or not row[0]:
         return offers
 
-    prefs = [normalize_category(str(p)) for p in row[0] if p]
+    prefs = [str(p) for p in row[0] if p]
     if not prefs:
         return offers
 
+    categories = CategoryDictionary()
+    categories.add(cat.category or "" for cat in offers)
+    allowed = set()
+    for pref in prefs:
+        allowed |= categories.preference_ids(pref)
+
     filtered: List[CategoryNotification] = []
     for cat in offers:
-        cat_norm = normalize_category(cat.category or "")
-        if any(pref in cat_norm or cat_norm in pref for pref in prefs):
+        if categories.ids[cat.category or ""] in allowed:
             filtered.append(cat)
 
     return filtered
@@ -82,20 +88,31 @@ def load_all_guests(conn: connection) -> list[tuple[int, int, str]]:
     return cur.fetchall()
 
 
-def load_offers_for_guest(conn: connection, guest_id: int) -> List[CategoryNotification]:
+def load_offers_for_guest(
+    conn: connection,
+    guest_id: int,
+    stay_start: Optional[date] = None,
+    stay_end: Optional[date] = None,
+) -> List[CategoryNotification]:
     """
     Берём категории, где есть хотя бы один период с ценой <= desired_price гостя,
     но для каждой такой категории возвращаем все её периоды.
+    С датами поездки [stay_start, stay_end] — только пересекающиеся с ними периоды
+    (GiST-индекс guest_prices по (guest_id, period)).
     """
+    period_filter = ""
+    if stay_start and stay_end:
+        period_filter = "AND gp.period && daterange(%(stay_start)s, %(stay_end)s, '[]')"
 
     cur = conn.cursor()
     cur.execute(
-        """
+        f"""
         WITH desired_categories AS (
             SELECT DISTINCT gp.category
             FROM guest_prices gp
             JOIN guest_details gd ON gd.id = gp.guest_id
-            WHERE gp.guest_id = %s
+            WHERE gp.guest_id = %(guest_id)s
+              {period_filter}
               AND (
                     (gp.new_breakfast_price IS NOT NULL
                      AND gp.new_breakfast_price <= gd.desired_price_per_night)
@@ -107,7 +124,8 @@ def load_offers_for_guest(conn: connection, guest_id: int) -> List[CategoryNotif
             gp.id,
             gp.guest_id,
             gp.category,
-            gp.period,
+            lower(gp.period) AS period_start,
+            upper(gp.period) - 1 AS period_end,
             gp.regular_breakfast_price,
             gp.new_breakfast_price,
             gp.regular_full_pansion_price,
@@ -126,10 +144,11 @@ def load_offers_for_guest(conn: connection, guest_id: int) -> List[CategoryNotif
             ON so.id = gp.applied_special_offer
         LEFT JOIN loyalty_discounts ld
             ON ld.level = gp.applied_loyalty
-        WHERE gp.guest_id = %s
+        WHERE gp.guest_id = %(guest_id)s
+          {period_filter}
         ORDER BY gp.category, gp.period;
         """,
-        (guest_id, guest_id),
+        {"guest_id": guest_id, "stay_start": stay_start, "stay_end": stay_end},
     )
 
     rows = cur.fetchall()
@@ -140,19 +159,20 @@ def load_offers_for_guest(conn: connection, guest_id: int) -> List[CategoryNotif
             id=r[0],
             guest_id=r[1],
             category=r[2],
-            period=r[3],
-            regular_breakfast_price=r[4],
-            new_breakfast_price=r[5],
-            regular_full_pansion_price=r[6],
-            new_full_pansion_price=r[7],
-            applied_special_offer_id=r[8],
-            applied_special_offer_title=r[9],
-            applied_special_offer_text=r[10],
-            applied_special_offer_min_days=r[11],
-            applied_loyalty=r[12],
-            loyalty_discount_percent=r[13],
-            formula_used=r[14],
-            is_last_room=r[15],
+            period_start=r[3],
+            period_end=r[4],
+            regular_breakfast_price=r[5],
+            new_breakfast_price=r[6],
+            regular_full_pansion_price=r[7],
+            new_full_pansion_price=r[8],
+            applied_special_offer_id=r[9],
+            applied_special_offer_title=r[10],
+            applied_special_offer_text=r[11],
+            applied_special_offer_min_days=r[12],
+            applied_loyalty=r[13],
+            loyalty_discount_percent=r[14],
+            formula_used=r[15],
+            is_last_room=r[16],
         )
         by_cat.setdefault(item.category, []).append(item)
 
@@ -174,7 +194,8 @@ def load_single_offer(conn: connection, guest_id: int, category: str) -> Optiona
             gp.id,
             gp.guest_id,
             gp.category,
-            gp.period,
+            lower(gp.period) AS period_start,
+            upper(gp.period) - 1 AS period_end,
             gp.regular_breakfast_price,
             gp.new_breakfast_price,
             gp.regular_full_pansion_price,
@@ -208,19 +229,20 @@ def load_single_offer(conn: connection, guest_id: int, category: str) -> Optiona
                 id=r[0],
                 guest_id=r[1],
                 category=r[2],
-                period=r[3],
-                regular_breakfast_price=r[4],
-                new_breakfast_price=r[5],
-                regular_full_pansion_price=r[6],
-                new_full_pansion_price=r[7],
-                applied_special_offer_id=r[8],
-                applied_special_offer_title=r[9],
-                applied_special_offer_text=r[10],
-                applied_special_offer_min_days=r[11],
-                applied_loyalty=r[12],
-                loyalty_discount_percent=r[13],
-                formula_used=r[14],
-                is_last_room=r[15],
+                period_start=r[3],
+                period_end=r[4],
+                regular_breakfast_price=r[5],
+                new_breakfast_price=r[6],
+                regular_full_pansion_price=r[7],
+                new_full_pansion_price=r[8],
+                applied_special_offer_id=r[9],
+                applied_special_offer_title=r[10],
+                applied_special_offer_text=r[11],
+                applied_special_offer_min_days=r[12],
+                applied_loyalty=r[13],
+                loyalty_discount_percent=r[14],
+                formula_used=r[15],
+                is_last_room=r[16],
             )
         )
 
@@ -1,3 +1,6 @@
+from typing import Optional
+
+from core.entities import OfferSyncResult
 from core.ports import OffersSiteGateway, OffersRepository
 
 class OfferParsingService:
@@ -5,11 +8,19 @@ class OfferParsingService:
         self.gateway = gateway
         self.repo = repo
 
-    def parse_offers(self):
+    def parse_offers(self) -> Optional[OfferSyncResult]:
         print("[trace] OfferParsingService.parse_offers start")
         offers = self.gateway.get_all_offers()
         print(f"[trace] parsed {len(offers)} offers")
-        for offer in offers:
-            self.repo.save_offer(offer)
+        if not offers:
+            # Пустой результат скорее означает сбой сбора, чем отмену всех акций — не снимаем офферы
+            print("[warn] no offers parsed, keeping current offers")
+            return None
+        result = self.repo.sync_offers(offers)
+        print(
+            f"[trace] offers synced: inserted={len(result.inserted)} updated={len(result.updated)} "
+            f"retired={len(result.retired)} unchanged={len(result.unchanged)}"
+        )
         print("[trace] OfferParsingService.parse_offers done")
+        return result
             
\ No newline at end of file
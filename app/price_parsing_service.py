@@ -1,6 +1,37 @@
+import traceback
+from dataclasses import dataclass, field
 from datetime import date, timedelta
+from enum import Enum
+from typing import List, Optional
+
 from core.ports import PriceRepository, HotelSiteGateway
 
+MAX_DATE_ATTEMPTS = 3
+
+
+class DateStatus(str, Enum):
+    SUCCESS = "success"
+    EMPTY = "empty"
+    FAILED = "failed"
+
+
+@dataclass
+class DateOutcome:
+    date: date
+    status: DateStatus
+    prices: int = 0
+    attempts: int = 1
+    reason: Optional[str] = None
+
+
+@dataclass
+class PeriodSummary:
+    outcomes: List[DateOutcome] = field(default_factory=list)
+
+    @property
+    def failed(self) -> List[DateOutcome]:
+        return [o for o in self.outcomes if o.status == DateStatus.FAILED]
+
 
 class PriceParsingService:
     def __init__(self, repo: PriceRepository, gateway: HotelSiteGateway):
@@ -8,13 +39,66 @@ class PriceParsingService:
         self.repo = repo
         self.gateway = gateway
 
-    def parse_period(self, start_date: date, days: int, progress_cb=None):
+    def parse_period(
+        self,
+        start_date: date,
+        days: int,
+        progress_cb=None,
+        outcome_cb=None,
+        max_date_attempts: int = MAX_DATE_ATTEMPTS,
+    ) -> PeriodSummary:
+        """
+        Парсит цены за каждую дату периода. Ошибка на одной дате не прерывает период:
+        после каждой неудачной попытки состояние браузера восстанавливается, дата
+        повторяется, а после исчерпания попыток помечается как failed, и парсер
+        переходит к следующей дате уже с восстановленной страницы.
+        """
         print(f"[trace] parse_period start start_date={start_date}, days={days}")
+        summary = PeriodSummary()
         d = start_date
         for idx in range(days):
             print(f"[trace] parse_period processing date={d}")
-            prices = self.gateway.get_regular_prices_for_date(d)
-            self.repo.save_regular_prices(prices)
+            outcome = self._parse_date(d, max_date_attempts)
+            summary.outcomes.append(outcome)
+            if outcome_cb:
+                outcome_cb(outcome)
+            print(
+                f"[trace] parse_period date={d} status={outcome.status.value} "
+                f"prices={outcome.prices} attempts={outcome.attempts}"
+            )
             if progress_cb:
                 progress_cb(idx + 1, days)
             d += timedelta(days=1)
+        return summary
+
+    def _parse_date(self, dt: date, max_attempts: int) -> DateOutcome:
+        reason = None
+        for attempt in range(1, max_attempts + 1):
+            try:
+                prices = self.gateway.get_regular_prices_for_date(dt)
+                self.repo.save_regular_prices(prices)
+            except Exception as exc:
+                reason = f"{type(exc).__name__}: {exc}".strip()
+                print(
+                    f"[error] parse_period date={dt} attempt {attempt}/{max_attempts} failed\n"
+                    f"{traceback.format_exc()}"
+                )
+                # И после последней попытки: следующая дата не должна начинаться со сломанной страницы
+                self._recover()
+                continue
+
+            status = DateStatus.SUCCESS if prices else DateStatus.EMPTY
+            return DateOutcome(date=dt, status=status, prices=len(prices), attempts=attempt)
+
+        return DateOutcome(
+            date=dt,
+            status=DateStatus.FAILED,
+            attempts=max_attempts,
+            reason=reason,
+        )
+
+    def _recover(self) -> None:
+        try:
+            self.gateway.recover()
+        except Exception as exc:
+            print(f"[error] gateway recovery failed: {exc}")
@@ -0,0 +1,112 @@
+import os
+from datetime import datetime
+
+from psycopg2.extras import execute_values
+
+from infrastructure.db import common_db
+from infrastructure.db.postgres_offers_repo import PostgresOfferRepository
+from infrastructure.db.room_categories_repo import ensure_room_categories
+
+from .synthetic import SyntheticData
+
+# Schema in the local database that receives the synthetic data; dropped and recreated on every run
+BENCH_SCHEMA = os.getenv("BENCH_SCHEMA", "pricing_bench")
+# Tables copied from public with LIKE ... INCLUDING ALL: the benchmark runs against the real schema
+BENCH_TABLES = (
+    "guest_details",
+    "room_characteristics",
+    "regular_prices",
+    "loyalty_discounts",
+    "special_offers",
+    "special_offer_stay_periods",
+    "guest_prices",
+)
+
+
+def use_bench_schema(schema: str = BENCH_SCHEMA) -> None:
+    """
+    Every get_connection() in this process now resolves tables in `schema` only,
+    so run_pricing and the notification loaders read and write the synthetic data.
+    """
+    if schema == "public":
+        raise ValueError("benchmark schema must not be public")
+    common_db.DB_PARAMS["options"] = f"-c search_path={schema}"
+
+
+def create_bench_schema(conn, schema: str = BENCH_SCHEMA) -> None:
+    """
+    Empty copies of the pricing tables in `schema`. Serial columns get their own
+    sequences there, so benchmark inserts do not advance the sequences of public.
+    """
+    if schema == "public":
+        raise ValueError("benchmark schema must not be public")
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        cur.execute(f"CREATE SCHEMA {schema}")
+        for table in BENCH_TABLES:
+            cur.execute(f"CREATE TABLE {schema}.{table} (LIKE public.{table} INCLUDING ALL)")
+
+        cur.execute(
+            """
+            SELECT table_name, column_name FROM information_schema.columns
+            WHERE table_schema = %s AND column_default LIKE 'nextval(%%'
+            """,
+            (schema,),
+        )
+        for table, column in cur.fetchall():
+            sequence = f"{schema}.{table}_{column}_seq"
+            cur.execute(f"CREATE SEQUENCE {sequence} OWNED BY {schema}.{table}.{column}")
+            cur.execute(f"ALTER TABLE {schema}.{table} ALTER COLUMN {column} SET DEFAULT nextval('{sequence}')")
+    conn.commit()
+
+
+def seed(conn, data: SyntheticData) -> None:
+    """Writes the synthetic hotel and guests through the same paths the parsers and the bot use."""
+    now = datetime.now()
+    with conn.cursor() as cur:
+        execute_values(
+            cur,
+            "INSERT INTO room_characteristics (id, room_category, number_of_main_beds) VALUES %s",
+            [(room.id, room.category_name, room.number_of_main_beds) for room in data.rooms],
+        )
+        execute_values(
+            cur,
+            """
+            INSERT INTO regular_prices (room_category, date, only_breakfast, full_pansion, is_last_room)
+            VALUES %s
+            """,
+            data.price_rows,
+            page_size=1000,
+        )
+        execute_values(
+            cur,
+            "INSERT INTO loyalty_discounts (level, discount_percent) VALUES %s",
+            list(data.loyalty_discounts.items()),
+        )
+        execute_values(
+            cur,
+            """
+            INSERT INTO guest_details (
+                id, telegram_id, first_name, last_name, adults, teens, infant,
+                preferred_categories, loyalty_status, desired_price_per_night, created_at
+            ) VALUES %s
+            """,
+            [
+                (
+                    g.id, 10_000_000 + g.id, g.first_name, g.last_name, g.adults, g.teens, g.infant,
+                    g.preferred_categories, g.loyalty_status, data.desired_prices[g.id], now,
+                )
+                for g in data.guests
+            ],
+            page_size=1000,
+        )
+    conn.commit()
+
+    PostgresOfferRepository(conn).sync_offers(data.offers)
+    # Fills room_categories and regular_prices.category_id from the rows above
+    ensure_room_categories(conn)
+
+    with conn.cursor() as cur:
+        for table in BENCH_TABLES:
+            cur.execute(f"ANALYZE {table}")
+    conn.commit()
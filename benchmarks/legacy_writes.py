@@ -0,0 +1,74 @@
+from datetime import datetime
+from typing import List
+
+from psycopg2.extensions import connection
+
+from app.matching.models import AggregatedRow
+
+# Per-guest guest_prices writes used before the batched COPY path (replace_guest_prices).
+# Production no longer calls them; scripts/bench_guest_prices_write.py times them as the baseline.
+
+
+def delete_guest_prices(conn: connection, guest_id: int) -> None:
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM guest_prices WHERE guest_id = %s", (guest_id,))
+    conn.commit()
+
+
+def save_guest_prices(conn: connection, rows: List[AggregatedRow]) -> None:
+    if not rows:
+        return
+
+    insert_sql = """
+        INSERT INTO guest_prices (
+            guest_id,
+            category,
+            period,
+            regular_breakfast_price,
+            new_breakfast_price,
+            regular_full_pansion_price,
+            new_full_pansion_price,
+            applied_special_offer,
+            applied_loyalty,
+            formula_used,
+            is_last_room,
+            created_at
+        )
+        VALUES (
+            %(guest_id)s,
+            %(category)s,
+            daterange(%(period_start)s, %(period_end)s, '[]'),
+            %(regular_breakfast_price)s,
+            %(new_breakfast_price)s,
+            %(regular_full_pansion_price)s,
+            %(new_full_pansion_price)s,
+            %(applied_special_offer)s,
+            %(applied_loyalty)s,
+            %(formula_used)s,
+            %(is_last_room)s,
+            %(created_at)s
+        )
+    """
+    now = datetime.now()
+    data = []
+    for r in rows:
+        data.append(
+            {
+                "guest_id": r.guest_id,
+                "category": r.category,
+                "period_start": r.period_start,
+                "period_end": r.period_end,
+                "regular_breakfast_price": r.regular_breakfast_price,
+                "new_breakfast_price": r.new_breakfast_price,
+                "regular_full_pansion_price": r.regular_full_pansion_price,
+                "new_full_pansion_price": r.new_full_pansion_price,
+                "applied_special_offer": r.applied_special_offer,
+                "applied_loyalty": r.applied_loyalty,
+                "formula_used": r.formula_used,
+                "is_last_room": r.is_last_room,
+                "created_at": now,
+            }
+        )
+    with conn.cursor() as cur:
+        cur.executemany(insert_sql, data)
+    conn.commit()
@@ -0,0 +1,174 @@
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from app.matching import pricing_service
+from app.matching.parallel_pricing import resolve_workers
+from app.notifications.service import filter_offers_by_preferences, load_offers_for_guest, load_single_offer
+from infrastructure.db.common_db import get_connection
+
+from . import database
+from .synthetic import make_data
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# guests, days, offers: the same scale names give comparable results across commits
+SCALES = {
+    "small": (1_000, 30, 5),
+    "medium": (10_000, 180, 30),
+    "large": (100_000, 365, 100),
+}
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{revision}-dirty" if dirty else revision
+
+
+def _peak_rss_mb() -> Dict[str, float]:
+    # ru_maxrss is in kilobytes on Linux; children are the pricing worker processes
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }
+
+
+def _latency(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+def _count_guest_prices() -> int:
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT count(*) FROM guest_prices")
+            return cur.fetchone()[0]
+
+
+def _timed_pricing(data, full: bool, workers: int) -> Dict[str, float]:
+    started = time.perf_counter()
+    pricing_service.run_pricing(today=data.today, full=full, workers=workers)
+    seconds = time.perf_counter() - started
+    rows = _count_guest_prices()
+    result = {"seconds": round(seconds, 3), "guest_prices_rows": rows}
+    if full:
+        result["rows_per_sec"] = round(rows / seconds) if seconds else None
+    return result
+
+
+def _notification_loaders(data, sample: int, seed: int) -> Dict[str, dict]:
+    rng = random.Random(seed)
+    guest_ids = rng.sample([g.id for g in data.guests], min(sample, len(data.guests)))
+    horizon = (data.price_rows[-1][1] - data.today).days if data.price_rows else 0
+    offers_s, single_s, dates_s = [], [], []
+    with get_connection() as conn:
+        for guest_id in guest_ids:
+            started = time.perf_counter()
+            offers = filter_offers_by_preferences(conn, guest_id, load_offers_for_guest(conn, guest_id))
+            offers_s.append(time.perf_counter() - started)
+
+            if offers:
+                started = time.perf_counter()
+                load_single_offer(conn, guest_id, offers[0].category)
+                single_s.append(time.perf_counter() - started)
+
+            # A week's trip somewhere in the priced horizon
+            stay_start = data.today + timedelta(days=rng.randint(0, horizon))
+            started = time.perf_counter()
+            load_offers_for_guest(conn, guest_id, stay_start, stay_start + timedelta(days=7))
+            dates_s.append(time.perf_counter() - started)
+            conn.rollback()
+    return {
+        "load_offers_for_guest": _latency(offers_s),
+        "load_single_offer": _latency(single_s),
+        "load_offers_for_dates": _latency(dates_s),
+    }
+
+
+def run_suite(
+    guests: int,
+    days: int,
+    offers: int,
+    categories: int = 40,
+    seed: int = 1,
+    sample: int = 200,
+    output: Optional[str] = None,
+) -> dict:
+    """
+    Seeds the benchmark schema with synthetic data, prices every guest (full run,
+    then an incremental run with nothing changed) and times the notification
+    loaders on a sample of guests. The result is printed as one JSON line and
+    appended to `output` when given.
+    """
+    database.use_bench_schema()
+    started_at = datetime.now()
+
+    started = time.perf_counter()
+    data = make_data(guests=guests, days=days, offers=offers, categories=categories, seed=seed)
+    generate_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with get_connection() as conn:
+        database.create_bench_schema(conn)
+        database.seed(conn, data)
+    seed_s = time.perf_counter() - started
+
+    # A standalone process like scripts/run_pricing.py, so PRICING_WORKERS applies
+    workers = resolve_workers()
+    full = _timed_pricing(data, full=True, workers=workers)
+    incremental = _timed_pricing(data, full=False, workers=workers)
+    loaders = _notification_loaders(data, sample, seed)
+
+    result = {
+        "revision": _git_revision(),
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "engine": pricing_service.PRICING_ENGINE,
+        "workers": workers,
+        "scale": {
+            "guests": guests,
+            "days": days,
+            "offers": offers,
+            "categories": categories,
+            "seed": seed,
+            "regular_prices_rows": len(data.price_rows),
+        },
+        "generate_seconds": round(generate_s, 3),
+        "seed_seconds": round(seed_s, 3),
+        "pricing_full": full,
+        "pricing_incremental": incremental,
+        "notifications": loaders,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+    line = json.dumps(result, ensure_ascii=False)
+    print(line)
+    if output:
+        with open(output, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    return result
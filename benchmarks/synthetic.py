@@ -0,0 +1,160 @@
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from app.matching import pricing_service
+from app.matching.models import GuestRow, RoomRow, SpecialOfferData, StayPeriodData
+from core.categories import CATEGORY_MAP
+from core.entities import BookingPeriod, SpecialOffer, StayPeriod
+
+FORMULAS = ["N = C*0.85", "N = C*0.9", "N = C - 1500", "N = C*6/7", "N = (C*3 + C*0.5)/4"]
+LOYALTY_DISCOUNTS = {"gold": 5, "platinum": 10, "diamond": 15}
+
+
+@dataclass
+class SyntheticData:
+    """
+    Hotel of `categories` room categories priced for `days` days from `today`, its
+    special offers and guests. The same arguments and seed give the same data, with
+    dates relative to `today`, so runs on different days and commits are comparable.
+    """
+
+    today: date
+    categories: List[str]
+    rooms: List[RoomRow]
+    # (room_category, date, only_breakfast, full_pansion, is_last_room), ordered by category and date
+    price_rows: List[Tuple[str, date, int, int, bool]]
+    offers: List[SpecialOffer]
+    loyalty_discounts: Dict[str, int]
+    guests: List[GuestRow]
+    desired_prices: Dict[int, int]
+
+    def offer_data(self) -> Tuple[List[SpecialOfferData], Dict[uuid.UUID, List[StayPeriodData]]]:
+        """Offers as fetch_special_offers / fetch_stay_periods would return them."""
+        offers, stay_periods = [], {}
+        for offer in self.offers:
+            offers.append(
+                SpecialOfferData(
+                    id=offer.id,
+                    categories=offer.categories,
+                    formula=offer.formula,
+                    min_days=offer.min_days,
+                    loyalty_compatible=offer.loyalty_compatible,
+                    booking_start=offer.booking_period.start if offer.booking_period else None,
+                    booking_end=offer.booking_period.end if offer.booking_period else None,
+                )
+            )
+            stay_periods[offer.id] = [
+                StayPeriodData(offer_id=offer.id, stay_start=p.start, stay_end=p.end) for p in offer.stay_periods
+            ]
+        return offers, stay_periods
+
+    def context(self) -> pricing_service.PricingContext:
+        offers, stay_periods = self.offer_data()
+        return pricing_service.build_pricing_context(
+            self.rooms, self.loyalty_discounts, offers, stay_periods, self.price_rows, self.today
+        )
+
+
+def make_categories(count: int) -> List[str]:
+    """Category names built from the bot's categories, so preference keys and titles match them."""
+    titles = list(CATEGORY_MAP.values())
+    return [f"{titles[i % len(titles)]} {i // len(titles) + 1}" for i in range(count)]
+
+
+def make_prices(rng: random.Random, names: List[str], days: int, today: date) -> List[tuple]:
+    rows = []
+    for name in names:
+        price = rng.randrange(9000, 30000, 500)
+        for d in range(days):
+            # Prices hold for a few days, then jump: blocks as in real regular_prices
+            if rng.random() < 0.2:
+                price = rng.randrange(9000, 30000, 500)
+            rows.append((name, today + timedelta(days=d), price, price + 4000, rng.random() < 0.05))
+    rows.sort(key=lambda r: (r[0], r[1]))
+    return rows
+
+
+def make_offers(rng: random.Random, names: List[str], count: int, days: int, today: date) -> List[SpecialOffer]:
+    offers = []
+    for i in range(count):
+        start = today + timedelta(days=rng.randint(0, days))
+        periods = [StayPeriod(start=start, end=start + timedelta(days=rng.randint(5, 60)))]
+        if rng.random() < 0.3:
+            start = today + timedelta(days=rng.randint(0, days))
+            periods.append(StayPeriod(start=start, end=start + timedelta(days=rng.randint(5, 30))))
+        min_days = rng.choice([None, 2, 3, 5, 7])
+        offers.append(
+            SpecialOffer(
+                id=uuid.UUID(int=rng.getrandbits(128)),
+                title=f"Спецпредложение {i}",
+                text=f"Скидка при проживании от {min_days or 1} ночей",
+                categories=rng.choice([["Все категории"], ["Все виллы"], rng.sample(names, min(3, len(names)))]),
+                stay_periods=periods,
+                booking_period=BookingPeriod(start=today - timedelta(days=10), end=today + timedelta(days=30)),
+                formula=rng.choice(FORMULAS),
+                min_days=min_days,
+                loyalty_compatible=rng.random() < 0.5,
+            )
+        )
+    return offers
+
+
+def make_guests(rng: random.Random, names: List[str], count: int) -> List[GuestRow]:
+    # The bot stores category titles in lower case; older profiles still hold the keys
+    preferences = sorted({name.rsplit(" ", 1)[0].lower() for name in names})
+    keys = list(CATEGORY_MAP)
+    guests = []
+    for i in range(count):
+        preferred = rng.sample(preferences, rng.randint(1, min(3, len(preferences))))
+        if rng.random() < 0.1:
+            preferred[0] = rng.choice(keys)
+        guests.append(
+            GuestRow(
+                id=i + 1,
+                first_name=f"Гость {i + 1}",
+                last_name="",
+                adults=rng.randint(1, 3),
+                teens=rng.randint(0, 1),
+                infant=rng.randint(0, 1),
+                preferred_categories=preferred,
+                loyalty_status=rng.choice([None, "gold", "platinum", "diamond"]),
+            )
+        )
+    return guests
+
+
+def make_data(
+    guests: int = 1000,
+    days: int = 30,
+    offers: int = 5,
+    categories: int = 40,
+    seed: int = 1,
+    today: Optional[date] = None,
+) -> SyntheticData:
+    rng = random.Random(seed)
+    today = today or date.today()
+    names = make_categories(categories)
+    rooms = [RoomRow(id=i + 1, category_name=name, number_of_main_beds=1 + i % 4) for i, name in enumerate(names)]
+    price_rows = make_prices(rng, names, days, today)
+    offer_list = make_offers(rng, names, offers, days, today)
+    guest_rows = make_guests(rng, names, guests)
+    return SyntheticData(
+        today=today,
+        categories=names,
+        rooms=rooms,
+        price_rows=price_rows,
+        offers=offer_list,
+        loyalty_discounts=dict(LOYALTY_DISCOUNTS),
+        guests=guest_rows,
+        desired_prices={g.id: rng.randrange(8000, 30000, 1000) for g in guest_rows},
+    )
+
+
+def make_context(categories: int, days: int, offers_count: int, seed: int):
+    """Pricing context without guests for the in-memory benchmarks, plus an rng for the caller's guests."""
+    data = make_data(guests=0, days=days, offers=offers_count, categories=categories, seed=seed)
+    rng = random.Random(seed + 1)
+    return data.context(), data.categories, rng
@@ -34,6 +34,8 @@ async def on_startup(bot: Bot):
     commands = [
         BotCommand(command="start", description="Запуск регистрации"),
         BotCommand(command="profile", description="Мой профиль"),
+        BotCommand(command="dates", description="Цены на даты поездки"),
+        BotCommand(command="cheapest", description="Самые дешёвые проживания"),
         BotCommand(command="send_notifications", description="Тестовая отправка уведомлений"),
     ]
 
@@ -4,6 +4,7 @@ import asyncio
 
 from aiogram import Router, F
 from aiogram.enums import ParseMode
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery
 
@@ -14,6 +15,10 @@ from infrastructure.db.system_event_log_repo import (
     list_events,
     count_events,
 )
+from infrastructure.db.parser_progress_repo import (
+    ensure_parser_progress_table,
+    list_parser_progress,
+)
 from infrastructure.db.admin_notifications_repo import (
     ensure_admin_notifications_table,
     list_admin_notifications,
@@ -24,6 +29,7 @@ from bot.keyboards.admin_users_kb import users_list_keyboard, back_to_users_keyb
 from bot.keyboards.admin_logs_kb import admin_logs_keyboard
 from bot.keyboards.admin_system_kb import admin_system_keyboard
 from bot.keyboards.admin_notifications_kb import admin_notifications_menu_keyboard
+from bot.keyboards.admin_parser_progress_kb import parser_progress_keyboard
 from bot.keyboards.categories_kb import CATEGORY_MAP
 from scripts import run_price_parser, run_offers_parser, run_price_matching
 
@@ -38,9 +44,11 @@ USERS_PER_PAGE = 8
 LOGS_PER_PAGE = 10
 SYSTEM_ACTION_PRICE_PARSER = "\u25B6\ufe0f \u0417\u0430\u043F\u0443\u0441\u0442\u0438\u0442\u044C \u043F\u0430\u0440\u0441\u0435\u0440 \u0446\u0435\u043D"
 SYSTEM_ACTION_OFFERS_PARSER = "\u25B6\ufe0f \u0417\u0430\u043F\u0443\u0441\u0442\u0438\u0442\u044C \u043F\u0430\u0440\u0441\u0435\u0440 \u043E\u0444\u0444\u0435\u0440\u043E\u0432"
+SYSTEM_ACTION_PARSER_PROGRESS = "\U0001F4C8 \u041f\u0440\u043e\u0433\u0440\u0435\u0441\u0441 \u043f\u0430\u0440\u0441\u0435\u0440\u0430"
 SYSTEM_ACTION_REPRICE = "\U0001F504 \u041F\u0435\u0440\u0435\u0441\u0447\u0438\u0442\u0430\u0442\u044C \u0446\u0435\u043D\u044B"
 SYSTEM_ACTION_BACK = "\u2B05\ufe0f \u041D\u0430\u0437\u0430\u0434 \u0432 \u0430\u0434\u043C\u0438\u043D \u043C\u0435\u043D\u044E"
 NOTIFICATIONS_BACK_TEXT = "\u2B05\ufe0f \u041D\u0430\u0437\u0430\u0434 \u0432 \u043C\u0435\u043D\u044E"
+PARSER_STALL_SECONDS = 300
 
 
 def _get_admin_ids() -> set[int]:
@@ -154,6 +162,64 @@ def _format_admin_notifications_text(rows) -> str:
     return header + "\n\n".join(lines)
 
 
+def _format_duration(seconds: float | None) -> str:
+    if seconds is None:
+        return "-"
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds} \u0441"
+    minutes, _ = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes} \u043c\u0438\u043d"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours} \u0447 {minutes} \u043c\u0438\u043d"
+
+
+def _format_parser_progress_text(rows) -> str:
+    header = "<b>\u041f\u0440\u043e\u0433\u0440\u0435\u0441\u0441 \u043f\u0430\u0440\u0441\u0435\u0440\u0430 \u0446\u0435\u043d</b>\n\n"
+    if not rows:
+        return f"{header}\u041f\u0430\u0440\u0441\u0435\u0440 \u0435\u0449\u0451 \u043d\u0435 \u0437\u0430\u043f\u0443\u0441\u043a\u0430\u043b\u0441\u044f."
+
+    total = sum(row["days_total"] for row in rows)
+    done = sum(row["dates_done"] for row in rows)
+    failed = sum(row["dates_failed"] for row in rows)
+    retries = sum(row["retries"] for row in rows)
+    running = [row for row in rows if row["status"] in ("pending", "running")]
+    if running:
+        elapsed = max(float(row["elapsed_s"] or 0) for row in rows)
+    else:
+        elapsed = max(float(row["elapsed_s"] or 0) - float(row["idle_s"] or 0) for row in rows)
+
+    rate = done / (elapsed / 60) if elapsed > 0 and done else None
+    if not running:
+        eta = "\u0437\u0430\u0432\u0435\u0440\u0448\u0435\u043d\u043e"
+    elif rate:
+        eta = f"~{_format_duration((total - done) / rate * 60)}"
+    else:
+        eta = "-"
+
+    lines = [
+        f"\u0421\u043e\u0431\u0440\u0430\u043d\u043e \u0434\u0430\u0442: {done}/{total} (\u043e\u0448\u0438\u0431\u043e\u043a: {failed}, \u043f\u043e\u0432\u0442\u043e\u0440\u043e\u0432: {retries})",
+        f"\u0421\u043a\u043e\u0440\u043e\u0441\u0442\u044c: {rate:.2f} \u0434\u0430\u0442/\u043c\u0438\u043d" if rate else "\u0421\u043a\u043e\u0440\u043e\u0441\u0442\u044c: -",
+        f"\u041f\u0440\u043e\u0448\u043b\u043e: {_format_duration(elapsed)}, \u043e\u0441\u0442\u0430\u043b\u043e\u0441\u044c: {eta}",
+    ]
+
+    stalled = [row for row in running if float(row["idle_s"] or 0) > PARSER_STALL_SECONDS]
+    if stalled:
+        idle = max(float(row["idle_s"]) for row in stalled)
+        lines.append(f"\u26a0\ufe0f \u041d\u0435\u0442 \u043e\u0431\u043d\u043e\u0432\u043b\u0435\u043d\u0438\u0439 {_format_duration(idle)} \u2014 \u0432\u043e\u0437\u043c\u043e\u0436\u043d\u043e, \u043f\u0430\u0440\u0441\u0435\u0440 \u0437\u0430\u0432\u0438\u0441.")
+
+    lines.append("")
+    for row in rows:
+        current_day = row["current_day"].strftime("%d.%m.%Y") if row["current_day"] else "-"
+        lines.append(
+            f"\u0412\u043e\u0440\u043a\u0435\u0440 {row['worker_id']} [{html.escape(row['status'])}, \u043f\u043e\u043f\u044b\u0442\u043a\u0430 {row['attempt']}]: "
+            f"{row['dates_done']}/{row['days_total']}, \u0442\u0435\u043a\u0443\u0449\u0430\u044f \u0434\u0430\u0442\u0430 {current_day}"
+        )
+
+    return header + "\n".join(lines)
+
+
 async def _send_users_page(message: Message, page: int) -> None:
     with get_connection() as conn:
         repo = PostgresGuestRepository(conn)
@@ -227,6 +293,13 @@ async def _send_admin_notifications(message: Message) -> None:
     )
 
 
+async def _load_parser_progress_text() -> str:
+    with get_connection() as conn:
+        ensure_parser_progress_table(conn)
+        rows = list_parser_progress(conn)
+    return _format_parser_progress_text(rows)
+
+
 @router.message(Command("admin"))
 async def admin_menu(message: Message) -> None:
     if not _is_admin(message.from_user.id):
@@ -287,6 +360,17 @@ async def admin_run_offers_parser(message: Message) -> None:
     await _run_system_job(message, run_offers_parser.run, SYSTEM_ACTION_OFFERS_PARSER)
 
 
+@router.message(F.text == SYSTEM_ACTION_PARSER_PROGRESS)
+async def admin_parser_progress(message: Message) -> None:
+    if not _is_admin(message.from_user.id):
+        return
+    await message.answer(
+        await _load_parser_progress_text(),
+        reply_markup=parser_progress_keyboard(),
+        parse_mode=ParseMode.HTML,
+    )
+
+
 @router.message(F.text == SYSTEM_ACTION_REPRICE)
 async def admin_run_reprice(message: Message) -> None:
     if not _is_admin(message.from_user.id):
@@ -351,6 +435,24 @@ async def admin_logs_noop(call: CallbackQuery) -> None:
     await call.answer()
 
 
+@router.callback_query(F.data == "admin_parser_progress")
+async def admin_parser_progress_refresh(call: CallbackQuery) -> None:
+    if not _is_admin(call.from_user.id):
+        await call.answer("\u0412\u044b \u043d\u0435 \u0430\u0434\u043c\u0438\u043d\u0438\u0441\u0442\u0440\u0430\u0442\u043e\u0440.", show_alert=True)
+        return
+    text = await _load_parser_progress_text()
+    try:
+        await call.message.edit_text(
+            text,
+            reply_markup=parser_progress_keyboard(),
+            parse_mode=ParseMode.HTML,
+        )
+    except TelegramBadRequest:
+        # Telegram rejects an edit that does not change the message
+        pass
+    await call.answer()
+
+
 @router.callback_query(F.data.startswith("admin_notif_view:"))
 async def admin_notification_view(call: CallbackQuery) -> None:
     if not _is_admin(call.from_user.id):
@@ -1,3 +1,5 @@
+import asyncio
+
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from datetime import datetime
@@ -5,11 +7,13 @@ from datetime import datetime
 from infrastructure.db.common_db import get_connection
 from app.notifications.service import (
     CategoryNotification,
+    GuestPriceNotification,
     load_offers_for_guest,
     filter_offers_by_preferences,
     load_parser_status,
 )
 from app.notifications.notifier import send_notifications
+from app.matching.pricing_service import find_cheapest_stays
 from bot.keyboards.notifications_kb import (
     notifications_keyboard,
     notification_details_keyboard,
@@ -38,22 +42,8 @@ def _format_date_str(raw: str) -> str:
     return dt.strftime("%d.%m.%y") if dt else raw
 
 
-def _format_period(period: str) -> str:
-    try:
-        clean = period.replace(" ", "")
-        parts = clean.split("-")
-        if len(parts) >= 6:
-            start_raw = "-".join(parts[:3])
-            end_raw = "-".join(parts[3:6])
-        else:
-            start_raw, end_raw = clean.split("-", 1)
-        start = _parse_date(start_raw)
-        end = _parse_date(end_raw)
-        if start and end:
-            return f"{start:%d.%m.%y} - {end:%d.%m.%y}"
-    except Exception:
-        pass
-    return period
+def _format_period(item: GuestPriceNotification) -> str:
+    return f"{item.period_start:%d.%m.%y} - {item.period_end:%d.%m.%y}"
 
 
 def _format_last_rooms(value) -> str | None:
@@ -76,7 +66,7 @@ def _format_last_rooms(value) -> str | None:
     return ", ".join(formatted) if formatted else None
 
 
-async def _send_user_offers(bot, chat_id: int, user_id: int):
+async def send_user_offers(bot, chat_id: int, user_id: int):
     parser_status = None
     with get_connection() as conn:
         cur = conn.cursor()
@@ -122,7 +112,88 @@ router = Router()
 # Вспомогательная команда: посмотреть свои актуальные категории вручную
 @router.message(F.text == "/my_offers")
 async def cmd_my_offers(message: Message):
-    await _send_user_offers(message.bot, message.chat.id, message.from_user.id)
+    await send_user_offers(message.bot, message.chat.id, message.from_user.id)
+
+# Периоды, пересекающиеся с датами поездки: /dates 20.12.2025 27.12.2025
+@router.message(F.text.startswith("/dates"))
+async def cmd_dates(message: Message):
+    parts = message.text.split()[1:]
+    dates = [_parse_date(part) for part in parts]
+    if len(dates) != 2 or not all(dates) or dates[0] > dates[1]:
+        await message.answer("Укажите даты заезда и выезда: /dates 20.12.2025 27.12.2025")
+        return
+    stay_start, stay_end = dates[0].date(), dates[1].date()
+
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT id FROM guest_details WHERE telegram_id = %s", (message.from_user.id,))
+        row = cur.fetchone()
+        if not row:
+            await message.answer("Похоже, вы ещё не зарегистрированы. Нажмите /start для регистрации.")
+            return
+        guest_id = row[0]
+        offers = filter_offers_by_preferences(
+            conn, guest_id, load_offers_for_guest(conn, guest_id, stay_start, stay_end)
+        )
+
+    if not offers:
+        await message.answer(f"На даты {stay_start:%d.%m.%y} - {stay_end:%d.%m.%y} подходящих номеров нет.")
+        return
+
+    max_items = 5
+    lines = [f"Варианты на {stay_start:%d.%m.%y} - {stay_end:%d.%m.%y}:"]
+    for category in sorted(offers, key=_best_price):
+        lines.append(f"\n<b>{category.category}</b>")
+        for item in category.items[:max_items]:
+            lines.append(
+                f"• {_format_period(item)}: завтрак {item.new_breakfast_price} ₽, "
+                f"полный пансион {item.new_full_pansion_price} ₽"
+            )
+        if len(category.items) > max_items:
+            lines.append(f"… ещё {len(category.items) - max_items} периодов")
+    await message.answer("\n".join(lines), parse_mode="HTML")
+
+
+# Самые дешёвые проживания: /cheapest 7 [60] — ночей и горизонт поиска в днях
+@router.message(F.text.startswith("/cheapest"))
+async def cmd_cheapest(message: Message):
+    parts = message.text.split()[1:]
+    try:
+        nights = int(parts[0]) if parts else 3
+        horizon = int(parts[1]) if len(parts) > 1 else 60
+        if not 1 <= nights <= 30 or not nights <= horizon <= 365:
+            raise ValueError
+    except ValueError:
+        await message.answer("Укажите число ночей (1–30) и, по желанию, горизонт в днях: /cheapest 7 60")
+        return
+
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT id FROM guest_details WHERE telegram_id = %s", (message.from_user.id,))
+        row = cur.fetchone()
+    if not row:
+        await message.answer("Похоже, вы ещё не зарегистрированы. Нажмите /start для регистрации.")
+        return
+
+    windows = await asyncio.to_thread(find_cheapest_stays, row[0], nights, horizon)
+    if not windows:
+        await message.answer(f"В ближайшие {horizon} дней нет свободных дат на {nights} ноч. подряд в ваших категориях.")
+        return
+
+    lines = [f"Самые выгодные проживания на {nights} ноч. в ближайшие {horizon} дней:"]
+    for window in windows:
+        lines.append(
+            f"\n<b>{window.category}</b>\n"
+            f"{window.check_in:%d.%m.%y} - {window.check_out:%d.%m.%y}\n"
+            f"• завтрак: {window.breakfast_total} ₽ (обычная {window.regular_breakfast_total} ₽)\n"
+            f"• полный пансион: {window.full_pansion_total} ₽ (обычная {window.regular_full_pansion_total} ₽)"
+        )
+        if window.applied_special_offers:
+            lines.append("🎁 Со спецпредложением")
+        if window.applied_loyalty:
+            lines.append(f"💎 Лояльность: {window.applied_loyalty}")
+    await message.answer("\n".join(lines), parse_mode="HTML")
+
 
 @router.message(F.text == "/send_notifications")
 async def cmd_send_notifications(message: Message):
@@ -132,7 +203,7 @@ async def cmd_send_notifications(message: Message):
 # Нажатие на конкретную категорию – показать детали
 @router.callback_query(F.data == "show_available")
 async def on_show_available(call: CallbackQuery):
-    await _send_user_offers(call.bot, call.message.chat.id, call.from_user.id)
+    await send_user_offers(call.bot, call.message.chat.id, call.from_user.id)
     await call.answer()
 
 
@@ -159,7 +230,7 @@ async def on_notification_item(call: CallbackQuery):
     total_items = len(category.items)
 
     for item in category.items[:max_items]:
-        lines.append(f"\nПериод: {_format_period(item.period)}")
+        lines.append(f"\nПериод: {_format_period(item)}")
         lines.append("💰 <b>Завтрак:</b>")
         lines.append(f"• обычная: {item.regular_breakfast_price} ₽")
         lines.append(f"• со скидками: {item.new_breakfast_price} ₽")
@@ -19,6 +19,8 @@ from infrastructure.db.admin_notifications_repo import (
     insert_admin_notification,
 )
 from infrastructure.db.common_db import get_connection
+from app.matching.pricing_service import price_guest
+from bot.handlers.notifications import send_user_offers
 from bot.keyboards.main_menu_kb import main_menu_keyboard
 from bot.keyboards.admin_notifications_kb import new_user_notification_keyboard
 
@@ -99,6 +101,23 @@ async def _notify_admins_new_user(bot, guest) -> None:
         except Exception as exc:
             print(f"[warn] failed to notify admin {admin_id}: {exc}")
 
+
+async def _reprice_and_show_offers(bot, chat_id: int, telegram_id: int, guest_id: int | None = None) -> None:
+    """Пересчитывает цены гостя сразу после сохранения анкеты и показывает подходящие категории."""
+    if guest_id is None:
+        with get_connection() as conn:
+            guest = PostgresGuestRepository(conn).get_by_telegram_id(telegram_id)
+        if guest is None:
+            return
+        guest_id = guest.id
+    try:
+        await price_guest(guest_id)
+    except Exception as exc:
+        # Цены досчитает ежедневный прогон, анкета уже сохранена
+        print(f"[error] failed to reprice guest {guest_id}: {exc}")
+        return
+    await send_user_offers(bot, chat_id, telegram_id)
+
 router = Router()
 
 @router.message(Command("start"))
@@ -298,6 +317,7 @@ async def categories_done(call: CallbackQuery, state: FSMContext):
         )
         await state.clear()
         await call.answer()
+        await _reprice_and_show_offers(call.bot, call.message.chat.id, call.from_user.id, guest.id)
         return
 
     await call.message.answer(
@@ -369,6 +389,7 @@ async def loyalty_done(call: CallbackQuery, state: FSMContext):
         )
         await state.clear()
         await call.answer()
+        await _reprice_and_show_offers(call.bot, call.message.chat.id, call.from_user.id, guest.id)
         return
 
     await call.message.answer(f"Отлично! Ваш статус: {status}")
@@ -415,6 +436,7 @@ async def process_desired_price(message: Message, state: FSMContext):
             parse_mode=ParseMode.HTML,
         )
         await state.clear()
+        await _reprice_and_show_offers(message.bot, message.chat.id, message.from_user.id, guest.id)
         return
 
     await message.answer("Отлично! Сохраняю твою анкету…")
@@ -460,6 +482,7 @@ async def process_desired_price(message: Message, state: FSMContext):
     await message.answer(text)
     await state.clear()
     await message.answer("Готово! Чем займемся дальше?", reply_markup=main_menu_keyboard())
+    await _reprice_and_show_offers(message.bot, message.chat.id, message.from_user.id)
   
     
 
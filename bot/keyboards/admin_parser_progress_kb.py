@@ -0,0 +1,9 @@
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+
+def parser_progress_keyboard() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text="Обновить", callback_data="admin_parser_progress")]
+        ]
+    )
@@ -5,6 +5,7 @@ def admin_system_keyboard() -> ReplyKeyboardMarkup:
     keyboard = [
         [KeyboardButton(text="▶️ Запустить парсер цен")],
         [KeyboardButton(text="▶️ Запустить парсер офферов")],
+        [KeyboardButton(text="📈 Прогресс парсера")],
         [KeyboardButton(text="🔄 Пересчитать цены")],
         [KeyboardButton(text="⬅️ Назад в админ меню")],
     ]
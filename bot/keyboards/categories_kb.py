@@ -1,16 +1,7 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
-CATEGORY_MAP = {
-    "deluxe": "Делюкс",
-    "family_suite": "Семейный люкс",
-    "spa_apart": "Апартаменты СПА",
-    "elegant": "Люкс Элегант",
-    "connect_deluxe": "Коннект делюкс",
-    "shogun": "Апартаменты «имение Сёгуна»",
-    "royal": "Королевский люкс",
-    "penthouse": "Пентхаус",
-    "villa": "Вилла",
-}
+from core.categories import CATEGORY_MAP
+
 # Обратное отображение: человекочитаемое название -> ключ категории
 CATEGORY_REVERSE = {v: k for k, v in CATEGORY_MAP.items()}
 
@@ -0,0 +1,13 @@
+# Ключи категорий, которые гость выбирает в боте -> человекочитаемые названия.
+# В guest_details.preferred_categories сохраняются названия, но встречаются и ключи.
+CATEGORY_MAP = {
+    "deluxe": "Делюкс",
+    "family_suite": "Семейный люкс",
+    "spa_apart": "Апартаменты СПА",
+    "elegant": "Люкс Элегант",
+    "connect_deluxe": "Коннект делюкс",
+    "shogun": "Апартаменты «имение Сёгуна»",
+    "royal": "Королевский люкс",
+    "penthouse": "Пентхаус",
+    "villa": "Вилла",
+}
@@ -10,7 +10,7 @@ from enum import Enum
 class RoomCategory:
     name: str
     
-@dataclass
+@dataclass(slots=True)
 class RegularPrice:
     category: RoomCategory
     date: date
@@ -40,6 +40,17 @@ class SpecialOffer:
     min_days: Optional[int]
     loyalty_compatible: Optional[bool]
     
+@dataclass
+class OfferSyncResult:
+    inserted: List[uuid.UUID]
+    updated: List[uuid.UUID]
+    retired: List[uuid.UUID]
+    unchanged: List[uuid.UUID]
+
+    @property
+    def changed_ids(self) -> List[uuid.UUID]:
+        return self.inserted + self.updated + self.retired
+    
 class LoyaltyStatus(str, Enum):
     DIAMOND = "diamond"
     GOLD = "gold"
@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import List, Optional
 from datetime import date
-from core.entities import RegularPrice, SpecialOffer, GuestDetails
+from core.entities import RegularPrice, SpecialOffer, GuestDetails, OfferSyncResult
 
 
 class PriceRepository(ABC):
@@ -11,13 +11,21 @@ class PriceRepository(ABC):
         
 class OffersRepository(ABC):
     @abstractmethod
-    def save_offer(self, offer: SpecialOffer) -> None:
+    def save_offers(self, offers: List[SpecialOffer]) -> None:
+        ...
+
+    @abstractmethod
+    def sync_offers(self, offers: List[SpecialOffer]) -> OfferSyncResult:
         ...
         
 class HotelSiteGateway(ABC):
     @abstractmethod
     def get_regular_prices_for_date(self, dt: date) -> List[RegularPrice]:
         ...
+
+    def recover(self) -> None:
+        """Вернуть страницу в исходное состояние после ошибки парсинга даты."""
+        ...
         
 class OffersSiteGateway(ABC):
     @abstractmethod
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from psycopg2.extras import Json
+
+
+def ensure_offer_analysis_cache_table(conn) -> None:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS offer_analysis_cache (
+                cache_key TEXT PRIMARY KEY,
+                prompt_version INT NOT NULL,
+                model TEXT NOT NULL,
+                formula TEXT,
+                min_days INT,
+                stay_periods JSONB NOT NULL,
+                booking_periods JSONB NOT NULL,
+                created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                last_hit_at TIMESTAMP,
+                hits INT NOT NULL DEFAULT 0
+            );
+            """
+        )
+    conn.commit()
+
+
+def get_cached_analyses(conn, keys: Iterable[str]) -> dict[str, dict[str, Any]]:
+    keys = list(keys)
+    if not keys:
+        return {}
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE offer_analysis_cache
+            SET hits = hits + 1, last_hit_at = NOW()
+            WHERE cache_key = ANY(%s)
+            RETURNING cache_key, formula, min_days, stay_periods, booking_periods
+            """,
+            (keys,),
+        )
+        rows = cur.fetchall()
+    conn.commit()
+    return {row["cache_key"]: dict(row) for row in (rows or [])}
+
+
+def save_cached_analysis(
+    conn,
+    *,
+    cache_key: str,
+    prompt_version: int,
+    model: str,
+    formula: str | None,
+    min_days: int | None,
+    stay_periods: list,
+    booking_periods: list,
+) -> None:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO offer_analysis_cache (
+                cache_key, prompt_version, model, formula, min_days, stay_periods, booking_periods
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (cache_key) DO UPDATE SET
+                formula = EXCLUDED.formula,
+                min_days = EXCLUDED.min_days,
+                stay_periods = EXCLUDED.stay_periods,
+                booking_periods = EXCLUDED.booking_periods,
+                created_at = NOW()
+            """,
+            (
+                cache_key,
+                prompt_version,
+                model,
+                formula,
+                min_days,
+                Json(stay_periods),
+                Json(booking_periods),
+            ),
+        )
+    conn.commit()
+
+
+def invalidate_offer_analysis_cache(
+    conn,
+    *,
+    keep_prompt_version: int | None = None,
+    keep_model: str | None = None,
+    max_age_days: int | None = None,
+) -> int:
+    """
+    Удаляет записи кэша: другой версии промта/модели и старше max_age_days.
+    Без аргументов очищает кэш полностью. Возвращает число удалённых записей.
+    """
+    conditions = []
+    params: list[Any] = []
+    if keep_prompt_version is not None:
+        conditions.append("prompt_version <> %s")
+        params.append(keep_prompt_version)
+    if keep_model is not None:
+        conditions.append("model <> %s")
+        params.append(keep_model)
+    if max_age_days is not None:
+        conditions.append("created_at < NOW() - make_interval(days => %s)")
+        params.append(max_age_days)
+
+    where = f"WHERE {' OR '.join(conditions)}" if conditions else ""
+    with conn.cursor() as cur:
+        cur.execute(f"DELETE FROM offer_analysis_cache {where}", params)
+        deleted = cur.rowcount
+    conn.commit()
+    return deleted
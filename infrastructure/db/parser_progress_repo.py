@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, Iterable
+
+
+def ensure_parser_progress_table(conn) -> None:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS price_parser_progress (
+                worker_id INT PRIMARY KEY,
+                run_id TEXT,
+                status TEXT NOT NULL,
+                attempt INT NOT NULL DEFAULT 1,
+                chunk_start DATE NOT NULL,
+                days_total INT NOT NULL,
+                dates_done INT NOT NULL DEFAULT 0,
+                dates_failed INT NOT NULL DEFAULT 0,
+                retries INT NOT NULL DEFAULT 0,
+                current_day DATE,
+                started_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+            );
+            """
+        )
+    conn.commit()
+
+
+def reset_parser_progress(conn, run_id: str, chunks: Iterable[tuple[int, date, int]]) -> None:
+    """Очищаем прогресс прошлого прогона и заводим строку на каждого воркера."""
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM price_parser_progress")
+        for worker_id, chunk_start, days in chunks:
+            cur.execute(
+                """
+                INSERT INTO price_parser_progress (
+                    worker_id, run_id, status, chunk_start, days_total, current_day
+                )
+                VALUES (%s, %s, 'pending', %s, %s, %s)
+                """,
+                (worker_id, run_id, chunk_start, days, chunk_start),
+            )
+    conn.commit()
+
+
+def start_worker_attempt(conn, worker_id: int, attempt: int) -> None:
+    """Новая попытка воркера начинает чанк сначала, повторы копятся."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE price_parser_progress
+            SET status = 'running',
+                attempt = %s,
+                dates_done = 0,
+                dates_failed = 0,
+                current_day = chunk_start,
+                retries = retries + CASE WHEN %s > 1 THEN 1 ELSE 0 END,
+                updated_at = NOW()
+            WHERE worker_id = %s
+            """,
+            (attempt, attempt, worker_id),
+        )
+    conn.commit()
+
+
+def update_worker_progress(
+    conn,
+    worker_id: int,
+    *,
+    dates_done: int,
+    dates_failed: int,
+    retries_delta: int,
+    current_day: date | None,
+) -> None:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE price_parser_progress
+            SET dates_done = %s,
+                dates_failed = %s,
+                retries = retries + %s,
+                current_day = %s,
+                updated_at = NOW()
+            WHERE worker_id = %s
+            """,
+            (dates_done, dates_failed, retries_delta, current_day, worker_id),
+        )
+    conn.commit()
+
+
+def set_worker_status(conn, worker_id: int, status: str) -> None:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE price_parser_progress
+            SET status = %s, updated_at = NOW()
+            WHERE worker_id = %s
+            """,
+            (status, worker_id),
+        )
+    conn.commit()
+
+
+def list_parser_progress(conn) -> list[dict[str, Any]]:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT worker_id, run_id, status, attempt, chunk_start, days_total,
+                   dates_done, dates_failed, retries, current_day, started_at, updated_at,
+                   EXTRACT(EPOCH FROM NOW() - started_at) AS elapsed_s,
+                   EXTRACT(EPOCH FROM NOW() - updated_at) AS idle_s
+            FROM price_parser_progress
+            ORDER BY worker_id
+            """
+        )
+        rows = cur.fetchall()
+    return [dict(row) for row in (rows or [])]
@@ -1,51 +1,202 @@
+import hashlib
+import json
 from typing import List
-from core.entities import SpecialOffer, StayPeriod
+
+from psycopg2.extras import execute_values
+
+from core.entities import OfferSyncResult, SpecialOffer, StayPeriod
 from core.ports import OffersRepository
 
+
+def ensure_offer_sync_columns(conn) -> None:
+    """Колонки для инкрементальной синхронизации офферов вместо ежедневного TRUNCATE."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            ALTER TABLE special_offers
+                ADD COLUMN IF NOT EXISTS content_hash TEXT,
+                ADD COLUMN IF NOT EXISTS position INT,
+                ADD COLUMN IF NOT EXISTS first_seen_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                ADD COLUMN IF NOT EXISTS retired_at TIMESTAMP;
+            """
+        )
+    conn.commit()
+
+
+def offer_content_hash(offer: SpecialOffer) -> str:
+    """Хэш всего, что влияет на расчёт цен и показ оффера гостю."""
+    payload = {
+        "title": offer.title,
+        "text": offer.text,
+        "categories": sorted(offer.categories),
+        "stay_periods": sorted([p.start.isoformat(), p.end.isoformat()] for p in offer.stay_periods),
+        "booking_period": (
+            [offer.booking_period.start.isoformat(), offer.booking_period.end.isoformat()]
+            if offer.booking_period
+            else None
+        ),
+        "formula": offer.formula,
+        "min_days": offer.min_days,
+        "loyalty_compatible": offer.loyalty_compatible,
+    }
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+OFFER_COLUMNS = (
+    "id, title, text, categories, booking_start, booking_end, "
+    "min_days, formula, loyalty_compatible, content_hash, position"
+)
+OFFER_TEMPLATE = "(%s::uuid, %s, %s, %s::text[], %s::date, %s::date, %s::int, %s, %s::boolean, %s, %s::int)"
+
+
+def _offer_row(offer: SpecialOffer, content_hash: str, position) -> tuple:
+    return (
+        str(offer.id),
+        offer.title,
+        offer.text,
+        offer.categories,  # TEXT[]
+        offer.booking_period.start if offer.booking_period else None,
+        offer.booking_period.end if offer.booking_period else None,
+        offer.min_days,
+        offer.formula,
+        offer.loyalty_compatible,
+        content_hash,
+        position,
+    )
+
+
 class PostgresOfferRepository(OffersRepository):
     def __init__(self, conn):
         self.conn = conn
+        ensure_offer_sync_columns(conn)
 
     def save_offer(self, offer: SpecialOffer) -> None:
-        with self.conn.cursor() as cur:
-            # вставляем основную запись оффера
-            cur.execute(
-                """
-                INSERT INTO special_offers (
-                    id, title, text, categories,
-                    booking_start, booking_end,
-                    min_days, formula, loyalty_compatible
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (id) DO NOTHING
-                """,
-                (
-                    str(offer.id),
-                    offer.title,
-                    offer.text,
-                    offer.categories,  # TEXT[]
-                    offer.booking_period.start if offer.booking_period else None,
-                    offer.booking_period.end if offer.booking_period else None,
-                    offer.min_days,
-                    offer.formula,
-                    offer.loyalty_compatible,
-                ),
-            )
+        self.save_offers([offer])
+
+    def save_offers(self, offers: List[SpecialOffer]) -> None:
+        """Все офферы и их периоды проживания пишутся пачкой в одной транзакции."""
+        try:
+            with self.conn.cursor() as cur:
+                self._insert_offers(cur, [(o, offer_content_hash(o), None) for o in offers])
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def sync_offers(self, offers: List[SpecialOffer]) -> OfferSyncResult:
+        """
+        Сверяет собранные офферы с таблицей одной транзакцией: новые вставляет,
+        изменившиеся (по content_hash или позиции на сайте) обновляет, пропавшие
+        помечает retired_at. Неизменённые офферы не трогаются и сохраняют id.
+        Пока транзакция не закоммичена, расчёт цен видит прежний набор офферов целиком.
+        """
+        result = OfferSyncResult(inserted=[], updated=[], retired=[], unchanged=[])
+        to_insert: List[tuple] = []
+        to_update: List[tuple] = []
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute("SELECT id, content_hash, position, retired_at FROM special_offers")
+                existing = {str(row[0]): row for row in cur.fetchall()}
+
+                seen = set()
+                for position, offer in enumerate(offers):
+                    offer_id = str(offer.id)
+                    if offer_id in seen:
+                        print(f"[warn] duplicate offer id {offer_id} ('{offer.title}'), skipped")
+                        continue
+                    seen.add(offer_id)
+
+                    content_hash = offer_content_hash(offer)
+                    row = existing.get(offer_id)
+                    if row is None:
+                        to_insert.append((offer, content_hash, position))
+                        result.inserted.append(offer.id)
+                    elif row[1] != content_hash or row[2] != position or row[3] is not None:
+                        to_update.append((offer, content_hash, position))
+                        result.updated.append(offer.id)
+                    else:
+                        result.unchanged.append(offer.id)
+
+                retired = [row for offer_id, row in existing.items() if offer_id not in seen and row[3] is None]
+                result.retired.extend(row[0] for row in retired)
 
-            # вставляем периоды проживания
-            for p in offer.stay_periods:
-                cur.execute(
-                    """
-                    INSERT INTO special_offer_stay_periods (
-                        offer_id, stay_start, stay_end
+                self._insert_offers(cur, to_insert)
+                self._update_offers(cur, to_update)
+                if retired:
+                    cur.execute(
+                        """
+                        UPDATE special_offers
+                        SET retired_at = NOW(), position = NULL
+                        WHERE id = ANY(%s::uuid[])
+                        """,
+                        ([str(row[0]) for row in retired],),
                     )
-                    VALUES (%s, %s, %s)
-                    """,
-                    (
-                        str(offer.id),
-                        p.start,
-                        p.end,
-                    ),
-                )
-
-        self.conn.commit()
\ No newline at end of file
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+        return result
+
+    def _insert_offers(self, cur, items: List[tuple]) -> None:
+        if not items:
+            return
+        execute_values(
+            cur,
+            f"""
+            INSERT INTO special_offers ({OFFER_COLUMNS})
+            VALUES %s
+            ON CONFLICT (id) DO NOTHING
+            """,
+            [_offer_row(offer, content_hash, position) for offer, content_hash, position in items],
+            template=OFFER_TEMPLATE,
+        )
+        self._insert_stay_periods(cur, [offer for offer, _, _ in items])
+
+    def _update_offers(self, cur, items: List[tuple]) -> None:
+        if not items:
+            return
+        execute_values(
+            cur,
+            f"""
+            UPDATE special_offers so
+            SET title = v.title,
+                text = v.text,
+                categories = v.categories,
+                booking_start = v.booking_start,
+                booking_end = v.booking_end,
+                min_days = v.min_days,
+                formula = v.formula,
+                loyalty_compatible = v.loyalty_compatible,
+                content_hash = v.content_hash,
+                position = v.position,
+                updated_at = NOW(),
+                retired_at = NULL
+            FROM (VALUES %s) AS v ({OFFER_COLUMNS})
+            WHERE so.id = v.id
+            """,
+            [_offer_row(offer, content_hash, position) for offer, content_hash, position in items],
+            template=OFFER_TEMPLATE,
+        )
+        cur.execute(
+            "DELETE FROM special_offer_stay_periods WHERE offer_id = ANY(%s::uuid[])",
+            ([str(offer.id) for offer, _, _ in items],),
+        )
+        self._insert_stay_periods(cur, [offer for offer, _, _ in items])
+
+    def _insert_stay_periods(self, cur, offers: List[SpecialOffer]) -> None:
+        rows = [(str(offer.id), p.start, p.end) for offer in offers for p in offer.stay_periods]
+        if not rows:
+            return
+        execute_values(
+            cur,
+            """
+            INSERT INTO special_offer_stay_periods (
+                offer_id, stay_start, stay_end
+            )
+            VALUES %s
+            """,
+            rows,
+        )
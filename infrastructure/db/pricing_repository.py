@@ -1,10 +1,11 @@
-from datetime import datetime
-from typing import Dict, List
+import io
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
 from uuid import UUID
 
 from psycopg2.extensions import connection
 
-from core.entities import RegularPrice
+from app.matching.columnar import AggregatedColumns
 from app.matching.models import (
     AggregatedRow,
     GuestRow,
@@ -14,15 +15,17 @@ from app.matching.models import (
 )
 
 
-def fetch_guests(conn: connection) -> List[GuestRow]:
+def fetch_guests(conn: connection, guest_ids: Optional[List[int]] = None) -> List[GuestRow]:
+    query = """
+        SELECT 
+            id, first_name, last_name, adults, teens, infant, preferred_categories, loyalty_status
+        FROM guest_details
+    """
     with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT 
-                id, first_name, last_name, adults, teens, infant, preferred_categories, loyalty_status
-            FROM guest_details
-            """
-        )
+        if guest_ids is None:
+            cur.execute(query)
+        else:
+            cur.execute(query + " WHERE id = ANY(%s)", (list(guest_ids),))
         rows = cur.fetchall()
 
     guests: List[GuestRow] = []
@@ -88,6 +91,8 @@ def fetch_special_offers(conn: connection) -> List[SpecialOfferData]:
             """
             SELECT id, categories, formula, min_days, loyalty_compatible, booking_start, booking_end
             FROM special_offers
+            WHERE retired_at IS NULL
+            ORDER BY position NULLS LAST, id
             """
         )
         rows = cur.fetchall()
@@ -113,8 +118,10 @@ def fetch_stay_periods(conn: connection) -> Dict[UUID, List[StayPeriodData]]:
     with conn.cursor() as cur:
         cur.execute(
             """
-            SELECT offer_id, stay_start, stay_end
-            FROM special_offer_stay_periods
+            SELECT sp.offer_id, sp.stay_start, sp.stay_end
+            FROM special_offer_stay_periods sp
+            JOIN special_offers so ON so.id = sp.offer_id
+            WHERE so.retired_at IS NULL
             """
         )
         rows = cur.fetchall()
@@ -130,105 +137,217 @@ def fetch_stay_periods(conn: connection) -> Dict[UUID, List[StayPeriodData]]:
     return result
 
 
-def fetch_regular_prices(conn: connection, matched_categories: List[str]) -> List[RegularPrice]:
-    if not matched_categories:
-        return []
+def fetch_all_regular_prices(conn: connection) -> List[tuple]:
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT room_category, date, only_breakfast, full_pansion, is_last_room
+            FROM regular_prices
+            ORDER BY room_category, date
+            """
+        )
+        return [tuple(row) for row in cursor.fetchall()]
 
-    like_patterns = [f"%{cat}%" for cat in matched_categories]
-    where_clauses = " OR ".join(["room_category ILIKE %s" for _ in like_patterns])
 
-    query = f"""
-        SELECT 
-            room_category,
-            date,
-            only_breakfast,
-            full_pansion,
-            is_last_room
-        FROM regular_prices
-        WHERE {where_clauses}
-        ORDER BY room_category, date;
+def ensure_guest_prices_period(conn: connection) -> None:
+    """
+    guest_prices.period as DATERANGE (inclusive stay dates) with a GiST index on
+    (guest_id, period) for overlap queries. Text periods written before are converted
+    in place: "YYYY-MM-DD-YYYY-MM-DD" of the old writer and "[YYYY-MM-DD,YYYY-MM-DD]"
+    of the COPY writer.
     """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT udt_name FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'guest_prices' AND column_name = 'period'
+            """
+        )
+        row = cur.fetchone()
+        if row and row[0] != "daterange":
+            cur.execute(
+                """
+                ALTER TABLE guest_prices ALTER COLUMN period TYPE DATERANGE
+                USING CASE
+                    WHEN period IS NULL THEN NULL
+                    WHEN period LIKE '[%' THEN period::daterange
+                    ELSE daterange(left(period, 10)::date, right(period, 10)::date, '[]')
+                END
+                """
+            )
+        cur.execute(
+            """
+            CREATE EXTENSION IF NOT EXISTS btree_gist;
+            CREATE INDEX IF NOT EXISTS guest_prices_guest_period_idx
+                ON guest_prices USING GIST (guest_id, period);
+            """
+        )
+    conn.commit()
 
-    with conn.cursor() as cursor:
-        cursor.execute(query, like_patterns)
-        rows = cursor.fetchall()
 
-    results: List[RegularPrice] = []
+def delete_prices_for_categories(conn: connection, categories: List[str]) -> None:
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM guest_prices WHERE category = ANY(%s)", (list(categories),))
+    conn.commit()
 
-    for row in rows:
-        category, dt, ob, fp, last_room = row
 
-        rp = RegularPrice(
-            category=category,
-            date=dt,
-            only_breakfast=ob,
-            full_pansion=fp,
-            is_last_room=last_room
-        )
-        results.append(rp)
+GUEST_PRICE_COLUMNS = (
+    "guest_id",
+    "category",
+    "period",
+    "regular_breakfast_price",
+    "new_breakfast_price",
+    "regular_full_pansion_price",
+    "new_full_pansion_price",
+    "applied_special_offer",
+    "applied_loyalty",
+    "formula_used",
+    "is_last_room",
+    "created_at",
+)
 
-    return results
+# Rows per COPY chunk: bounds the text buffer held in memory
+COPY_CHUNK_ROWS = 20000
 
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
 
-def delete_guest_prices(conn: connection, guest_id: int) -> None:
-    with conn.cursor() as cur:
-        cur.execute("DELETE FROM guest_prices WHERE guest_id = %s", (guest_id,))
-    conn.commit()
 
+def _copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return str(value).translate(_COPY_ESCAPES)
 
-def save_guest_prices(conn: connection, rows: List[AggregatedRow]) -> None:
-    if not rows:
-        return
-
-    insert_sql = """
-        INSERT INTO guest_prices (
-            guest_id,
-            category,
-            period,
-            regular_breakfast_price,
-            new_breakfast_price,
-            regular_full_pansion_price,
-            new_full_pansion_price,
-            applied_special_offer,
-            applied_loyalty,
-            formula_used,
-            is_last_room,
-            created_at
-        )
-        VALUES (
-            %(guest_id)s,
-            %(category)s,
-            %(period)s,
-            %(regular_breakfast_price)s,
-            %(new_breakfast_price)s,
-            %(regular_full_pansion_price)s,
-            %(new_full_pansion_price)s,
-            %(applied_special_offer)s,
-            %(applied_loyalty)s,
-            %(formula_used)s,
-            %(is_last_room)s,
-            %(created_at)s
+
+def _copy_period(start: date, end: date) -> str:
+    return f"[{start.isoformat()},{end.isoformat()}]"
+
+
+def _copy_line(r: AggregatedRow, created_at: str) -> str:
+    return "\t".join(
+        (
+            str(r.guest_id),
+            _copy_value(r.category),
+            _copy_period(r.period_start, r.period_end),
+            str(r.regular_breakfast_price),
+            str(r.new_breakfast_price),
+            str(r.regular_full_pansion_price),
+            str(r.new_full_pansion_price),
+            _copy_value(r.applied_special_offer),
+            _copy_value(r.applied_loyalty),
+            _copy_value(r.formula_used),
+            _copy_value(r.is_last_room),
+            created_at,
         )
-    """
-    now = datetime.now()
-    data = []
+    ) + "\n"
+
+
+def _copy_tails(columns: AggregatedColumns, created_at: str) -> List[str]:
+    """COPY lines of a profile without the leading guest_id, formatted once for all its guests."""
+    return [
+        "\t".join(
+            (
+                "",
+                _copy_value(columns.category[i]),
+                _copy_period(
+                    date.fromordinal(columns.period_start[i]), date.fromordinal(columns.period_end[i])
+                ),
+                str(columns.regular_breakfast_price[i]),
+                str(columns.new_breakfast_price[i]),
+                str(columns.regular_full_pansion_price[i]),
+                str(columns.new_full_pansion_price[i]),
+                _copy_value(columns.applied_special_offer[i]),
+                _copy_value(columns.applied_loyalty[i]),
+                _copy_value(columns.formula_used[i]),
+                _copy_value(columns.is_last_room[i]),
+                created_at,
+            )
+        ) + "\n"
+        for i in range(len(columns))
+    ]
+
+
+def _copy_lines(
+    rows: Iterable[AggregatedRow],
+    profiles: Iterable[Tuple[int, AggregatedColumns]],
+    created_at: str,
+) -> Iterable[str]:
     for r in rows:
-        data.append(
-            {
-                "guest_id": r.guest_id,
-                "category": r.category,
-                "period": r.period,
-                "regular_breakfast_price": r.regular_breakfast_price,
-                "new_breakfast_price": r.new_breakfast_price,
-                "regular_full_pansion_price": r.regular_full_pansion_price,
-                "new_full_pansion_price": r.new_full_pansion_price,
-                "applied_special_offer": r.applied_special_offer,
-                "applied_loyalty": r.applied_loyalty,
-                "formula_used": r.formula_used,
-                "is_last_room": r.is_last_room,
-                "created_at": now,
-            }
-        )
-    with conn.cursor() as cur:
-        cur.executemany(insert_sql, data)
-    conn.commit()
+        yield _copy_line(r, created_at)
+    tails: Dict[int, List[str]] = {}
+    for guest_id, columns in profiles:
+        key = id(columns)
+        if key not in tails:
+            tails[key] = _copy_tails(columns, created_at)
+        prefix = str(guest_id)
+        for tail in tails[key]:
+            yield prefix + tail
+
+
+def _copy_to_stage(cur, buffer: io.StringIO, columns: str) -> None:
+    buffer.seek(0)
+    cur.copy_expert(f"COPY guest_prices_stage ({columns}) FROM STDIN", buffer)
+
+
+def replace_guest_prices(
+    conn: connection,
+    rows: Iterable[AggregatedRow],
+    guest_ids: Iterable[int] = (),
+    guest_categories: Iterable[Tuple[int, str]] = (),
+    profiles: Iterable[Tuple[int, AggregatedColumns]] = (),
+) -> int:
+    """
+    Rows of guest_ids are replaced entirely, (guest_id, category) pairs only in that
+    category. New rows come from `rows` and from `profiles`, (guest_id, columns)
+    pairs whose columns may be shared by many guests. They are streamed with COPY
+    into a staging table, then the old rows are deleted and the new ones inserted
+    in the same transaction, so readers see either the previous or the new prices
+    of a guest, never an empty or partial set.
+    Returns the number of rows written.
+    """
+    guest_ids = list(guest_ids)
+    pair_ids, pair_categories = [], []
+    for guest_id, category in guest_categories:
+        pair_ids.append(guest_id)
+        pair_categories.append(category)
+
+    columns = ", ".join(GUEST_PRICE_COLUMNS)
+    created_at = datetime.now().isoformat()
+    written = 0
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"CREATE TEMP TABLE guest_prices_stage ON COMMIT DROP AS "
+                f"SELECT {columns} FROM guest_prices WITH NO DATA"
+            )
+            buffer = io.StringIO()
+            chunk = 0
+            for line in _copy_lines(rows, profiles, created_at):
+                buffer.write(line)
+                chunk += 1
+                if chunk >= COPY_CHUNK_ROWS:
+                    _copy_to_stage(cur, buffer, columns)
+                    written += chunk
+                    buffer, chunk = io.StringIO(), 0
+            if chunk:
+                _copy_to_stage(cur, buffer, columns)
+                written += chunk
+
+            if guest_ids:
+                cur.execute("DELETE FROM guest_prices WHERE guest_id = ANY(%s)", (guest_ids,))
+            if pair_ids:
+                cur.execute(
+                    """
+                    DELETE FROM guest_prices gp
+                    USING unnest(%s::bigint[], %s::text[]) AS s(guest_id, category)
+                    WHERE gp.guest_id = s.guest_id AND gp.category = s.category
+                    """,
+                    (pair_ids, pair_categories),
+                )
+            cur.execute(f"INSERT INTO guest_prices ({columns}) SELECT {columns} FROM guest_prices_stage")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return written
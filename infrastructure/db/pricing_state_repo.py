@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+from psycopg2.extras import execute_values
+
+
+def ensure_pricing_state_tables(conn) -> None:
+    """Отпечатки входных данных последнего расчёта: по категориям цен и по гостям."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pricing_category_state (
+                category TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                priced_at TIMESTAMP NOT NULL DEFAULT NOW()
+            );
+            CREATE TABLE IF NOT EXISTS pricing_guest_state (
+                guest_id BIGINT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                priced_at TIMESTAMP NOT NULL DEFAULT NOW()
+            );
+            """
+        )
+    conn.commit()
+
+
+def get_category_fingerprints(conn) -> dict[str, str]:
+    with conn.cursor() as cur:
+        cur.execute("SELECT category, fingerprint FROM pricing_category_state")
+        return {row[0]: row[1] for row in cur.fetchall()}
+
+
+def get_guest_fingerprints(conn) -> dict[int, str]:
+    with conn.cursor() as cur:
+        cur.execute("SELECT guest_id, fingerprint FROM pricing_guest_state")
+        return {row[0]: row[1] for row in cur.fetchall()}
+
+
+def save_category_fingerprints(conn, fingerprints: dict[str, str], removed: Iterable[str] = ()) -> None:
+    removed = list(removed)
+    with conn.cursor() as cur:
+        if fingerprints:
+            execute_values(
+                cur,
+                """
+                INSERT INTO pricing_category_state (category, fingerprint)
+                VALUES %s
+                ON CONFLICT (category) DO UPDATE SET
+                    fingerprint = EXCLUDED.fingerprint,
+                    priced_at = NOW()
+                """,
+                list(fingerprints.items()),
+            )
+        if removed:
+            cur.execute("DELETE FROM pricing_category_state WHERE category = ANY(%s)", (removed,))
+    conn.commit()
+
+
+def save_guest_fingerprints(conn, fingerprints: dict[int, str]) -> None:
+    if not fingerprints:
+        return
+    with conn.cursor() as cur:
+        execute_values(
+            cur,
+            """
+            INSERT INTO pricing_guest_state (guest_id, fingerprint)
+            VALUES %s
+            ON CONFLICT (guest_id) DO UPDATE SET
+                fingerprint = EXCLUDED.fingerprint,
+                priced_at = NOW()
+            """,
+            list(fingerprints.items()),
+        )
+    conn.commit()
+
+
+def clear_pricing_state(conn) -> None:
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM pricing_category_state")
+        cur.execute("DELETE FROM pricing_guest_state")
+    conn.commit()
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+from psycopg2.extras import execute_values
+
+
+def ensure_room_categories(conn) -> None:
+    """
+    Справочник категорий номеров с целочисленными id и ссылка на него из regular_prices.
+    Уже сохранённые цены и комнаты досчитываются в справочник при первом вызове.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS room_categories (
+                id SERIAL PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE,
+                created_at TIMESTAMP NOT NULL DEFAULT NOW()
+            );
+            ALTER TABLE regular_prices ADD COLUMN IF NOT EXISTS category_id INTEGER;
+            CREATE INDEX IF NOT EXISTS regular_prices_category_id_date_idx
+                ON regular_prices (category_id, date);
+            """
+        )
+        cur.execute(
+            """
+            INSERT INTO room_categories (name)
+            SELECT DISTINCT room_category FROM regular_prices WHERE category_id IS NULL
+            UNION
+            SELECT room_category FROM room_characteristics WHERE room_category IS NOT NULL
+            ON CONFLICT (name) DO NOTHING
+            """
+        )
+        cur.execute(
+            """
+            UPDATE regular_prices rp
+            SET category_id = rc.id
+            FROM room_categories rc
+            WHERE rp.category_id IS NULL AND rc.name = rp.room_category
+            """
+        )
+    conn.commit()
+
+
+def fetch_room_categories(conn) -> list[tuple[int, str]]:
+    with conn.cursor() as cur:
+        cur.execute("SELECT id, name FROM room_categories ORDER BY id")
+        return [(row[0], row[1]) for row in cur.fetchall()]
+
+
+def get_category_ids(conn, names: Iterable[str]) -> dict[str, int]:
+    """id категорий по названиям; новые названия добавляются. Без commit — пишет в транзакции вызывающего."""
+    names = sorted(set(names))
+    if not names:
+        return {}
+    with conn.cursor() as cur:
+        execute_values(
+            cur,
+            "INSERT INTO room_categories (name) VALUES %s ON CONFLICT (name) DO NOTHING",
+            [(name,) for name in names],
+        )
+        cur.execute("SELECT name, id FROM room_categories WHERE name = ANY(%s)", (names,))
+        return {row[0]: row[1] for row in cur.fetchall()}
@@ -0,0 +1,338 @@
+from datetime import date
+from typing import List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from psycopg2.extensions import connection
+from psycopg2.extras import execute_values
+
+from app.matching.models import AggregatedRow
+from app.matching.pricing_logic import CATEGORY_ALIASES
+
+# normalize_category из pricing_logic: убрать {, }, ", типографские апострофы -> ', trim + lower
+_NORM = (
+    "lower(btrim(replace(replace(replace(replace(replace({0}, '{{', ''), '}}', ''), '\"', ''), "
+    "'’', ''''), '‘', ''''), E' \\t\\n\\r\\f'))"
+)
+
+# Те же правила, что у VectorPricingEngine / build_priced_stays_for_guest, одним запросом:
+# подбор категорий гостя, блоки одинаковых цен, первый подходящий оффер по приоритету,
+# формула через таблицу коэффициентов, лояльность, склейка дней в периоды (gaps-and-islands).
+# Цены, офферы и комнаты соединяются по regular_prices.category_id: категории офферов и
+# ILIKE-сопоставление комнат с ценами заранее разрешены в id (pricing_offer_categories,
+# pricing_room_categories). Строки остаются только в предпочтениях гостей — это свободный текст.
+PRICED_ROWS_SQL = f"""
+    WITH
+    active_offers AS (
+        SELECT
+            so.id,
+            so.formula,
+            COALESCE(so.min_days, 0) AS min_days,
+            COALESCE(so.loyalty_compatible, FALSE) AS loyalty_compatible,
+            row_number() OVER (ORDER BY so.position NULLS LAST, so.id) AS priority
+        FROM special_offers so
+        WHERE so.retired_at IS NULL
+          AND (so.booking_start IS NULL OR so.booking_start <= %(today)s)
+          AND (so.booking_end IS NULL OR %(today)s <= so.booking_end)
+    ),
+    category_days AS (
+        SELECT
+            rp.category_id,
+            rp.room_category,
+            rp.date,
+            rp.only_breakfast,
+            rp.full_pansion,
+            COALESCE(rp.is_last_room, FALSE) AS is_last_room,
+            rp.date - (row_number() OVER (
+                PARTITION BY rp.category_id, rp.only_breakfast, rp.full_pansion ORDER BY rp.date
+            ))::int AS block
+        FROM regular_prices rp
+        WHERE rp.category_id IS NOT NULL
+    ),
+    blocks AS (
+        SELECT
+            cd.*,
+            (max(cd.date) OVER w - min(cd.date) OVER w) + 1 AS period_len
+        FROM category_days cd
+        WINDOW w AS (PARTITION BY cd.category_id, cd.only_breakfast, cd.full_pansion, cd.block)
+    ),
+    day_offers AS (
+        SELECT DISTINCT ON (b.category_id, b.date, b.only_breakfast, b.full_pansion)
+            b.category_id, b.date, b.only_breakfast, b.full_pansion,
+            o.id AS offer_id, o.formula, o.loyalty_compatible
+        FROM blocks b
+        JOIN pricing_offer_categories oc ON oc.category_id = b.category_id
+        JOIN active_offers o ON o.id::text = oc.offer_id AND o.min_days <= b.period_len
+        JOIN special_offer_stay_periods sp
+          ON sp.offer_id = o.id AND b.date BETWEEN sp.stay_start AND sp.stay_end
+        ORDER BY b.category_id, b.date, b.only_breakfast, b.full_pansion, o.priority
+    ),
+    day_prices AS (
+        SELECT
+            b.category_id, b.room_category, b.date, b.only_breakfast, b.full_pansion, b.is_last_room,
+            (d.offer_id IS NULL OR d.loyalty_compatible) AS loyalty_allowed,
+            CASE WHEN d.formula <> '' THEN d.offer_id END AS applied_offer,
+            CASE WHEN d.formula <> '' THEN d.formula END AS formula_used,
+            CASE WHEN d.formula <> ''
+                 THEN COALESCE(vb.new_price, round(k.a * b.only_breakfast + k.b)::bigint)
+                 ELSE b.only_breakfast END AS offer_breakfast,
+            CASE WHEN d.formula <> ''
+                 THEN COALESCE(vf.new_price, round(k.a * b.full_pansion + k.b)::bigint)
+                 ELSE b.full_pansion END AS offer_full
+        FROM blocks b
+        LEFT JOIN day_offers d
+          ON d.category_id = b.category_id AND d.date = b.date
+         AND d.only_breakfast = b.only_breakfast AND d.full_pansion = b.full_pansion
+        LEFT JOIN pricing_offer_coefficients k ON k.offer_id = d.offer_id::text
+        LEFT JOIN pricing_offer_values vb ON vb.offer_id = d.offer_id::text AND vb.base_price = b.only_breakfast
+        LEFT JOIN pricing_offer_values vf ON vf.offer_id = d.offer_id::text AND vf.base_price = b.full_pansion
+    ),
+    guests AS (
+        SELECT
+            g.id,
+            g.loyalty_status,
+            g.adults + g.teens AS people,
+            ARRAY(
+                SELECT DISTINCT x.phrase
+                FROM unnest(g.preferred_categories) p
+                CROSS JOIN LATERAL (
+                    SELECT {_NORM.format("p")} AS phrase
+                    UNION
+                    SELECT a.title
+                    FROM unnest(%(alias_keys)s::text[], %(alias_titles)s::text[]) AS a(key, title)
+                    WHERE a.key = {_NORM.format("p")}
+                ) x
+                WHERE p <> ''
+            ) AS preferred,
+            COALESCE(ld.discount_percent, 0) AS discount
+        FROM guest_details g
+        LEFT JOIN LATERAL (
+            SELECT l.discount_percent
+            FROM loyalty_discounts l
+            WHERE lower(btrim(l.level)) = lower(btrim(g.loyalty_status))
+              AND lower(btrim(g.loyalty_status)) <> 'none'
+            LIMIT 1
+        ) ld ON TRUE
+        WHERE %(guest_ids)s::bigint[] IS NULL OR g.id = ANY(%(guest_ids)s::bigint[])
+    ),
+    guest_rooms AS (
+        SELECT DISTINCT g.id AS guest_id, rc.room_category
+        FROM guests g
+        JOIN room_characteristics rc ON g.people <= rc.number_of_main_beds
+        WHERE cardinality(g.preferred) = 0
+           OR EXISTS (
+                SELECT 1 FROM unnest(g.preferred) p
+                WHERE strpos({_NORM.format("rc.room_category")}, p) > 0
+                   OR strpos(p, {_NORM.format("rc.room_category")}) > 0
+           )
+    ),
+    guest_categories AS (
+        SELECT DISTINCT gr.guest_id, rc.category_id
+        FROM guest_rooms gr
+        JOIN pricing_room_categories rc ON rc.room_category = gr.room_category
+    ),
+    guest_days AS (
+        SELECT
+            gc.guest_id, dp.room_category, dp.date, dp.is_last_room,
+            dp.only_breakfast, dp.full_pansion, dp.applied_offer, dp.formula_used,
+            (g.discount <> 0 AND dp.loyalty_allowed) AS loyalty_applied,
+            g.discount, g.loyalty_status, dp.offer_breakfast, dp.offer_full
+        FROM guest_categories gc
+        JOIN guests g ON g.id = gc.guest_id
+        JOIN day_prices dp ON dp.category_id = gc.category_id
+    ),
+    priced_days AS (
+        SELECT
+            gd.guest_id, gd.room_category, gd.date, gd.is_last_room,
+            gd.only_breakfast, gd.full_pansion, gd.applied_offer, gd.formula_used,
+            CASE WHEN gd.loyalty_applied THEN gd.loyalty_status END AS applied_loyalty,
+            CASE WHEN gd.loyalty_applied
+                 THEN round((gd.offer_breakfast * (100 - gd.discount))::float8 / 100)::bigint
+                 ELSE gd.offer_breakfast END AS new_breakfast,
+            CASE WHEN gd.loyalty_applied
+                 THEN round((gd.offer_full * (100 - gd.discount))::float8 / 100)::bigint
+                 ELSE gd.offer_full END AS new_full
+        FROM guest_days gd
+    ),
+    islands AS (
+        SELECT
+            pd.*,
+            pd.date - (row_number() OVER (
+                PARTITION BY pd.guest_id, pd.room_category, pd.applied_offer, pd.applied_loyalty,
+                             pd.only_breakfast, pd.new_breakfast, pd.full_pansion, pd.new_full
+                ORDER BY pd.date
+            ))::int AS island
+        FROM priced_days pd
+    )
+    SELECT
+        guest_id,
+        room_category AS category,
+        daterange(min(date), max(date), '[]') AS period,
+        only_breakfast AS regular_breakfast_price,
+        new_breakfast AS new_breakfast_price,
+        full_pansion AS regular_full_pansion_price,
+        new_full AS new_full_pansion_price,
+        applied_offer AS applied_special_offer,
+        applied_loyalty,
+        formula_used,
+        COALESCE(
+            string_agg(to_char(date, 'YYYY-MM-DD'), ',' ORDER BY date) FILTER (WHERE is_last_room), ''
+        ) AS is_last_room
+    FROM islands
+    GROUP BY guest_id, room_category, applied_offer, applied_loyalty, formula_used,
+             only_breakfast, new_breakfast, full_pansion, new_full, island
+"""
+
+
+def _query_params(today: date, guest_ids: Optional[List[int]]) -> dict:
+    # Ключи категорий из бота сопоставляются по их названиям, как в preference_phrases
+    return {
+        "today": today,
+        "guest_ids": guest_ids,
+        "alias_keys": list(CATEGORY_ALIASES),
+        "alias_titles": list(CATEGORY_ALIASES.values()),
+    }
+
+
+def begin_snapshot(conn: connection) -> None:
+    """Один снимок данных на весь SQL-расчёт: базовые цены и коэффициенты офферов не должны разойтись."""
+    conn.rollback()
+    with conn.cursor() as cur:
+        cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+
+
+def fetch_base_prices(conn: connection) -> List[int]:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT only_breakfast FROM regular_prices
+            UNION
+            SELECT full_pansion FROM regular_prices
+            """
+        )
+        return [row[0] for row in cur.fetchall() if row[0] is not None]
+
+
+def load_formula_tables(
+    conn: connection,
+    coefficients: Sequence[Tuple[UUID, float, float]],
+    values: Sequence[Tuple[UUID, int, int]],
+) -> None:
+    """Временные таблицы формул офферов (живут до конца транзакции)."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            CREATE TEMP TABLE pricing_offer_coefficients (
+                offer_id TEXT PRIMARY KEY,
+                a DOUBLE PRECISION NOT NULL,
+                b DOUBLE PRECISION NOT NULL
+            ) ON COMMIT DROP;
+            CREATE TEMP TABLE pricing_offer_values (
+                offer_id TEXT NOT NULL,
+                base_price BIGINT NOT NULL,
+                new_price BIGINT NOT NULL,
+                PRIMARY KEY (offer_id, base_price)
+            ) ON COMMIT DROP;
+            """
+        )
+        if coefficients:
+            execute_values(
+                cur,
+                "INSERT INTO pricing_offer_coefficients (offer_id, a, b) VALUES %s",
+                [(str(offer_id), a, b) for offer_id, a, b in coefficients],
+            )
+        if values:
+            execute_values(
+                cur,
+                "INSERT INTO pricing_offer_values (offer_id, base_price, new_price) VALUES %s",
+                [(str(offer_id), base, new) for offer_id, base, new in values],
+            )
+        cur.execute("ANALYZE pricing_offer_coefficients; ANALYZE pricing_offer_values")
+
+
+def load_category_tables(
+    conn: connection,
+    offer_categories: Sequence[Tuple[UUID, int]],
+    room_categories: Sequence[Tuple[str, int]],
+) -> None:
+    """Временные таблицы категорий: оффер -> category_id и название комнаты -> category_id цен."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            CREATE TEMP TABLE pricing_offer_categories (
+                offer_id TEXT NOT NULL,
+                category_id INTEGER NOT NULL,
+                PRIMARY KEY (category_id, offer_id)
+            ) ON COMMIT DROP;
+            CREATE TEMP TABLE pricing_room_categories (
+                room_category TEXT NOT NULL,
+                category_id INTEGER NOT NULL,
+                PRIMARY KEY (room_category, category_id)
+            ) ON COMMIT DROP;
+            """
+        )
+        if offer_categories:
+            execute_values(
+                cur,
+                "INSERT INTO pricing_offer_categories (offer_id, category_id) VALUES %s",
+                [(str(offer_id), category_id) for offer_id, category_id in offer_categories],
+            )
+        if room_categories:
+            execute_values(
+                cur,
+                "INSERT INTO pricing_room_categories (room_category, category_id) VALUES %s",
+                list(room_categories),
+            )
+        cur.execute("ANALYZE pricing_offer_categories; ANALYZE pricing_room_categories")
+
+
+def fetch_priced_rows(conn: connection, today: date, guest_ids: Optional[List[int]] = None) -> List[AggregatedRow]:
+    with conn.cursor() as cur:
+        cur.execute(
+            f"SELECT p.*, lower(p.period), upper(p.period) - 1 FROM ({PRICED_ROWS_SQL}) p",
+            _query_params(today, guest_ids),
+        )
+        rows = cur.fetchall()
+    return [
+        AggregatedRow(
+            guest_id=r[0],
+            category=r[1],
+            period_start=r[11],
+            period_end=r[12],
+            regular_breakfast_price=r[3],
+            new_breakfast_price=r[4],
+            regular_full_pansion_price=r[5],
+            new_full_pansion_price=r[6],
+            applied_special_offer=r[7],
+            applied_loyalty=r[8],
+            formula_used=r[9],
+            is_last_room=r[10],
+        )
+        for r in rows
+    ]
+
+
+def rewrite_guest_prices(conn: connection, today: date, guest_ids: Optional[List[int]] = None) -> int:
+    """DELETE + INSERT … SELECT в текущей транзакции; коммит делает вызывающий код."""
+    with conn.cursor() as cur:
+        if guest_ids is None:
+            cur.execute("DELETE FROM guest_prices")
+        else:
+            cur.execute("DELETE FROM guest_prices WHERE guest_id = ANY(%s)", (guest_ids,))
+        cur.execute(
+            f"""
+            INSERT INTO guest_prices (
+                guest_id, category, period,
+                regular_breakfast_price, new_breakfast_price,
+                regular_full_pansion_price, new_full_pansion_price,
+                applied_special_offer, applied_loyalty, formula_used, is_last_room, created_at
+            )
+            SELECT
+                p.guest_id, p.category, p.period,
+                p.regular_breakfast_price, p.new_breakfast_price,
+                p.regular_full_pansion_price, p.new_full_pansion_price,
+                p.applied_special_offer, p.applied_loyalty, p.formula_used, p.is_last_room, NOW()
+            FROM ({PRICED_ROWS_SQL}) p
+            """,
+            _query_params(today, guest_ids),
+        )
+        return cur.rowcount
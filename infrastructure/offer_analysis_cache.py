@@ -0,0 +1,111 @@
+import hashlib
+import re
+from typing import List, Optional, Sequence
+
+from infrastructure.db.offer_analysis_cache_repo import (
+    ensure_offer_analysis_cache_table,
+    get_cached_analyses,
+    invalidate_offer_analysis_cache,
+    save_cached_analysis,
+)
+from infrastructure.openai_offer_analyzer import PROMPT_VERSION, OfferAnalysis, OpenAIOfferAnalyzer
+from infrastructure.system_event_logger import log_event
+
+# Периоды в ответе модели зависят от текущей даты, поэтому записи периодически обновляем
+CACHE_MAX_AGE_DAYS = 30
+
+
+def normalize_offer_text(text: str) -> str:
+    cleaned = (
+        text.replace('\u00a0', ' ')
+        .replace('\u2009', ' ')
+        .replace('\u2019', "'")
+        .replace('\u2018', "'")
+        .replace('\u00ab', '"')
+        .replace('\u00bb', '"')
+        .lower()
+    )
+    return re.sub(r"\s+", " ", cleaned).strip()
+
+
+def analysis_cache_key(core_text: str, offer_text: str, model: str) -> str:
+    payload = "\n".join(
+        [str(PROMPT_VERSION), model, normalize_offer_text(core_text), normalize_offer_text(offer_text)]
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CachedOfferAnalyzer:
+    """
+    Обёртка над OpenAIOfferAnalyzer с кэшем в таблице offer_analysis_cache.
+    Ключ — хэш нормализованного текста оффера, версии промта и модели; при попадании
+    модель не вызывается. Статистика попаданий пишется в system_event_log.
+    """
+
+    def __init__(self, conn, analyzer: Optional[OpenAIOfferAnalyzer] = None, run_id: Optional[str] = None):
+        self.conn = conn
+        self.analyzer = analyzer or OpenAIOfferAnalyzer()
+        self.run_id = run_id
+        ensure_offer_analysis_cache_table(conn)
+        removed = invalidate_offer_analysis_cache(
+            conn,
+            keep_prompt_version=PROMPT_VERSION,
+            keep_model=self.analyzer.model,
+            max_age_days=CACHE_MAX_AGE_DAYS,
+        )
+        if removed:
+            print(f"[trace] offer_analysis_cache: removed {removed} stale entries")
+
+    def analyze_all(self, items: Sequence[tuple[str, str]]) -> List[Optional[OfferAnalysis]]:
+        keys = [analysis_cache_key(core, text, self.analyzer.model) for core, text in items]
+        cached = get_cached_analyses(self.conn, set(keys))
+
+        results: List[Optional[OfferAnalysis]] = [None] * len(items)
+        miss_idx: List[int] = []
+        for idx, key in enumerate(keys):
+            row = cached.get(key)
+            if row is None:
+                miss_idx.append(idx)
+                continue
+            results[idx] = OfferAnalysis(
+                formula=row["formula"],
+                min_days=row["min_days"],
+                living_dates=[list(p) for p in row["stay_periods"]],
+                booking_dates=[list(p) for p in row["booking_periods"]],
+            )
+
+        if miss_idx:
+            fresh = self.analyzer.analyze_all([items[idx] for idx in miss_idx])
+            for idx, analysis in zip(miss_idx, fresh):
+                results[idx] = analysis
+                if analysis is None:
+                    continue
+                save_cached_analysis(
+                    self.conn,
+                    cache_key=keys[idx],
+                    prompt_version=PROMPT_VERSION,
+                    model=self.analyzer.model,
+                    formula=analysis.formula,
+                    min_days=analysis.min_days,
+                    stay_periods=analysis.living_dates,
+                    booking_periods=analysis.booking_dates,
+                )
+
+        hits = len(items) - len(miss_idx)
+        hit_rate = round(hits / len(items), 3) if items else None
+        print(f"[trace] offer_analysis_cache: hits={hits} misses={len(miss_idx)}")
+        log_event(
+            level="INFO",
+            source="offers_parser",
+            event="llm_cache",
+            message=f"hits={hits} misses={len(miss_idx)}",
+            meta={
+                "hits": hits,
+                "misses": len(miss_idx),
+                "hit_rate": hit_rate,
+                "prompt_version": PROMPT_VERSION,
+                "model": self.analyzer.model,
+            },
+            run_id=self.run_id,
+        )
+        return results
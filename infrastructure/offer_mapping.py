@@ -0,0 +1,125 @@
+import uuid
+from typing import List, Optional
+from urllib.parse import urlsplit
+
+from app.matching.formula import validate_formula
+from core.entities import SpecialOffer, StayPeriod, BookingPeriod
+from parser.funcs.common_funcs import parse_date
+from parser.funcs.offers_funcs import build_offer_text, build_offer_dict
+
+# Пространство имён для uuid5: один и тот же оффер получает один и тот же id в каждом прогоне
+OFFER_ID_NAMESPACE = uuid.UUID("0f6b3c1e-5d2a-4c8e-9a47-2b1d8e6f4a90")
+
+
+def canonical_offer_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip("/") + "/"
+    return f"https://{parts.netloc.lower()}{path}"
+
+
+def offer_id_for(url: Optional[str], title: str) -> uuid.UUID:
+    """Стабильный id оффера: по каноническому URL карточки, без него — по названию."""
+    if url:
+        key = canonical_offer_url(url)
+    else:
+        key = "title:" + " ".join(title.lower().split())
+    return uuid.uuid5(OFFER_ID_NAMESPACE, key)
+
+
+def analyze_raw_offers(raws: List[dict], analyzer) -> List[SpecialOffer]:
+    """Общая для всех гейтвеев часть: разбор сырых текстов офферов и маппинг в сущности."""
+    print(f"[trace] analyzing {len(raws)} offers")
+    analyses = analyzer.analyze_all(
+        [(raw["core"], build_offer_text(raw)) for raw in raws]
+    )
+
+    offers: List[SpecialOffer] = []
+    for raw, analysis in zip(raws, analyses):
+        if analysis is None:
+            print(f"[warn] offer '{raw['title']}' was not analyzed, skipped")
+            continue
+        entity = map_offer_dict_to_entity(build_offer_dict(raw, analysis))
+        formula_error = validate_formula(entity.formula)
+        if formula_error:
+            print(f"[warn] offer '{entity.title}' has invalid formula {entity.formula!r}: {formula_error}, skipped")
+        elif entity.stay_periods:
+            offers.append(entity)
+        else:
+            print("[warn] offer has no valid stay periods, skipped")
+
+    return offers
+
+
+# ---------- Маппинг dict -> SpecialOffer ----------
+
+def map_offer_dict_to_entity(data: dict) -> SpecialOffer:
+    title = data.get("Название", "").strip()
+    text = data.get("Текст предложения", "").strip()
+
+    # категории: может быть строка, список или None
+    raw_categories = data.get("Категория") or []
+    if isinstance(raw_categories, str):
+        categories = [raw_categories]
+    else:
+        categories = list(raw_categories)
+
+    # периоды проживания
+    stay_periods: List[StayPeriod] = []
+    for stay_range in data.get("Даты проживания", []):
+        try:
+            start = parse_date(stay_range[0])
+            end = parse_date(stay_range[1])
+            if start > end:
+                print(f"[warn] invalid stay period {stay_range}: {start} > {end}")
+                continue
+            stay_periods.append(StayPeriod(start=start, end=end))
+        except Exception as e:
+            print(f"[error] stay_range {stay_range}: {e}")
+
+    # период бронирования (у тебя он всегда один, если есть)
+    booking_period = extract_booking_period(data)
+
+    # формула и мин. дни
+    formula = data.get("Формула расчета")
+    min_days_raw = data.get("Минимальное количество дней")
+    min_days: Optional[int]
+    try:
+        min_days = int(str(min_days_raw).strip()) if min_days_raw is not None else None
+    except Exception:
+        min_days = None
+
+    loyalty = data.get("Суммируется с программой лояльности", None)
+    if loyalty is not None:
+        loyalty = bool(loyalty)
+
+    return SpecialOffer(
+        id=offer_id_for(data.get("Ссылка"), title),
+        title=title,
+        text=text,
+        categories=categories,
+        stay_periods=stay_periods,
+        booking_period=booking_period,
+        formula=formula,
+        min_days=min_days,
+        loyalty_compatible=loyalty,
+    )
+
+
+def extract_booking_period(data: dict) -> Optional[BookingPeriod]:
+    booking_list = data.get("Даты бронирования") or []
+    if not booking_list:
+        return None
+
+    # у тебя там список с одним диапазоном: [(start, end)] или [[start, end]]
+    raw = booking_list[0]
+    try:
+        start_str, end_str = raw
+        start = parse_date(start_str)
+        end = parse_date(end_str)
+        if start > end:
+            print(f"[warn] invalid booking period {raw}: {start} > {end}")
+            return None
+        return BookingPeriod(start=start, end=end)
+    except Exception as e:
+        print(f"[error] booking period {raw}: {e}")
+        return None
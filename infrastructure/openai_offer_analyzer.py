@@ -0,0 +1,134 @@
+import asyncio
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import date
+from typing import List, Optional, Sequence
+
+from openai import AsyncOpenAI
+
+MODEL = "gpt-4.1"
+# Увеличиваем при любом изменении промта или схемы ответа
+PROMPT_VERSION = 1
+MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "4"))
+
+_PERIOD_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "start": {"type": "string", "description": "ДД.ММ.ГГГГ"},
+        "end": {"type": "string", "description": "ДД.ММ.ГГГГ"},
+    },
+    "required": ["start", "end"],
+    "additionalProperties": False,
+}
+
+OFFER_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "formula": {"type": "string"},
+        "min_days": {"type": ["integer", "null"]},
+        "stay_periods": {"type": "array", "items": _PERIOD_SCHEMA},
+        "booking_periods": {"type": "array", "items": _PERIOD_SCHEMA},
+    },
+    "required": ["formula", "min_days", "stay_periods", "booking_periods"],
+    "additionalProperties": False,
+}
+
+
+@dataclass
+class OfferAnalysis:
+    formula: Optional[str]
+    min_days: Optional[int]
+    living_dates: List[List[str]] = field(default_factory=list)
+    booking_dates: List[List[str]] = field(default_factory=list)
+
+
+def build_prompt(core_text: str, offer_text: str, today: Optional[date] = None) -> str:
+    today = today or date.today()
+    return f'''Есть специальное предложение в отеле. Сегодня {today:%d.%m.%Y}.
+                Суть предложения: {core_text}
+                Полный текст предложения: {offer_text}
+
+                Извлеки из него:
+                1. formula — математическую формулу итоговой стоимости номера за сутки с учетом скидки по сути предложения,
+                   представив, что все его условия выполнены. C - это стоимость за сутки без учета скидки,
+                   N - это стоимость номера ЗА СУТКИ с учетом скидки. Если в формуле необходимо учесть количество дней,
+                   подставь сразу цифру - минимально необходимое для скидки количество дней. Знак умножения обозначь так: '*'.
+                   Формат: "N = ...", без пояснений.
+                2. min_days — минимальное количество суток, которое необходимо забронировать гостю, чтобы получить скидку.
+                3. stay_periods — все диапазоны дат проживания гостей.
+                4. booking_periods — все диапазоны дат бронирования (период, в который можно забронировать).
+                   Не возвращай периоды из прошлого: если из текста получается дата раньше сегодня, подбери корректный год
+                   или опусти период.
+                Все даты в формате ДД.ММ.ГГГГ, начало периода <= конца периода. Если дат нет, верни пустой список.'''
+
+
+def _periods(raw) -> List[List[str]]:
+    result = []
+    for item in raw or []:
+        if isinstance(item, dict) and item.get("start") and item.get("end"):
+            result.append([item["start"], item["end"]])
+    return result
+
+
+def parse_analysis(raw: str) -> OfferAnalysis:
+    data = json.loads(raw)
+    min_days = data.get("min_days")
+    return OfferAnalysis(
+        formula=(data.get("formula") or "").strip() or None,
+        min_days=int(min_days) if min_days is not None else None,
+        living_dates=_periods(data.get("stay_periods")),
+        booking_dates=_periods(data.get("booking_periods")),
+    )
+
+
+class OpenAIOfferAnalyzer:
+    """
+    Разбирает специальные предложения одним structured-output запросом на оффер.
+    Запросы по всем офферам идут параллельно, не больше max_concurrency одновременно.
+    """
+
+    def __init__(self, model: str = MODEL, max_concurrency: int = MAX_CONCURRENCY):
+        self.model = model
+        self.max_concurrency = max_concurrency
+
+    async def analyze(self, client: AsyncOpenAI, core_text: str, offer_text: str) -> OfferAnalysis:
+        completion = await client.chat.completions.create(
+            model=self.model,
+            temperature=0.1,
+            max_tokens=400,
+            top_p=0,
+            messages=[{"role": "system", "content": build_prompt(core_text, offer_text)}],
+            response_format={
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "offer_analysis",
+                    "strict": True,
+                    "schema": OFFER_ANALYSIS_SCHEMA,
+                },
+            },
+        )
+        return parse_analysis(completion.choices[0].message.content)
+
+    async def analyze_many(self, items: Sequence[tuple[str, str]]) -> List[Optional[OfferAnalysis]]:
+        """items — пары (суть предложения, полный текст). Для упавших запросов возвращается None."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY")) as client:
+
+            async def run_one(idx: int, core_text: str, offer_text: str) -> Optional[OfferAnalysis]:
+                async with semaphore:
+                    try:
+                        result = await self.analyze(client, core_text, offer_text)
+                        print(f"[trace] offer {idx + 1}/{len(items)} analyzed")
+                        return result
+                    except Exception as exc:
+                        print(f"[error] offer {idx + 1} analysis failed: {exc}")
+                        return None
+
+            return await asyncio.gather(
+                *(run_one(idx, core, text) for idx, (core, text) in enumerate(items))
+            )
+
+    def analyze_all(self, items: Sequence[tuple[str, str]]) -> List[Optional[OfferAnalysis]]:
+        return asyncio.run(self.analyze_many(items))
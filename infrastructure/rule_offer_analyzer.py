@@ -0,0 +1,297 @@
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from typing import List, Optional, Sequence, Tuple
+
+from infrastructure.openai_offer_analyzer import OfferAnalysis
+from infrastructure.system_event_logger import log_event
+
+# Офферы с уверенностью ниже порога отправляются в модель
+MIN_CONFIDENCE = float(os.getenv("OFFER_RULES_MIN_CONFIDENCE", "0.8"))
+
+MONTHS = {
+    "января": 1, "февраля": 2, "марта": 3, "апреля": 4, "мая": 5, "июня": 6,
+    "июля": 7, "августа": 8, "сентября": 9, "октября": 10, "ноября": 11, "декабря": 12,
+}
+NUMBER_WORDS = {
+    "одной": 1, "одного": 1, "двух": 2, "трех": 3, "трёх": 3, "четырех": 4, "четырёх": 4,
+    "пяти": 5, "шести": 6, "семи": 7, "восьми": 8, "девяти": 9, "десяти": 10,
+    "четырнадцати": 14,
+}
+
+STAY_WORDS = ("прожив", "заезд", "отдых", "пребыван", "поездк", "выезд")
+BOOKING_WORDS = ("брониров", "забронир", "покупк", "оплат")
+
+_MONTH_RE = "|".join(MONTHS)
+_NUM_RE = r"\d+|" + "|".join(NUMBER_WORDS)
+# Дата: 01.06 / 01.06.25 / 01.06.2025 / 1 июня / 1 июня 2025 (г., года)
+_DATE_RE = (
+    rf"(?:(?P<{{p}}d>\d{{{{1,2}}}})\.(?P<{{p}}m>\d{{{{1,2}}}})(?:\.(?P<{{p}}y>\d{{{{2,4}}}}))?"
+    rf"|(?P<{{p}}wd>\d{{{{1,2}}}})\s+(?P<{{p}}wm>{_MONTH_RE})(?:\s+(?P<{{p}}wy>\d{{{{4}}}}))?)"
+    r"(?:\s*(?:г\.|года|г)(?![а-я]))?"
+)
+
+
+def _date_re(prefix: str) -> str:
+    return _DATE_RE.format(p=prefix)
+
+
+RANGE_RE = re.compile(rf"(?:с\s+)?{_date_re('a')}\s*(?:по|до|[-–—])\s*{_date_re('b')}", re.IGNORECASE)
+# "с 1 по 10 июня 2025"
+SHORT_RANGE_RE = re.compile(
+    rf"с\s+(?P<ad>\d{{1,2}})\s+(?:по|до)\s+(?P<bd>\d{{1,2}})\s+(?P<m>{_MONTH_RE})(?:\s+(?P<y>\d{{4}}))?",
+    re.IGNORECASE,
+)
+UNTIL_RE = re.compile(rf"(?:до|по)\s+{_date_re('b')}", re.IGNORECASE)
+
+PERCENT_RE = re.compile(
+    r"(?:скидк\w*\s+(?P<upto>до\s+)?(?:в\s+размере\s+)?(?P<p1>\d{1,2})\s*%|(?P<p2>\d{1,2})\s*%\s*скидк)",
+    re.IGNORECASE,
+)
+FIXED_RE = re.compile(
+    r"скидк\w*\s+(?:в\s+размере\s+)?(?P<amount>\d[\d\s  ]*)\s*(?:руб|₽)",
+    re.IGNORECASE,
+)
+NIGHTS_FOR_RE = re.compile(
+    r"(?P<n>\d+)\s*(?:ноч\w*|сут\w*)\s+по\s+цене\s+(?P<m>\d+)|(?P<n2>\d+)\s*=\s*(?P<m2>\d+)",
+    re.IGNORECASE,
+)
+MIN_DAYS_RE = re.compile(
+    rf"(?:от|не\s+менее|минимум|минимальн\w*\s+(?:срок\w*\s+)?(?:прожива\w*\s+)?[-—:]?\s*(?:от\s+)?)"
+    rf"\s*(?P<n>{_NUM_RE})\s*(?:-?х\s+)?(?:ноч|сут|дн|дней)",
+    re.IGNORECASE,
+)
+MIN_DAYS_AND_MORE_RE = re.compile(r"(?P<n>\d+)\s*(?:ноч\w*|сут\w*)\s+и\s+более", re.IGNORECASE)
+NIGHTS_MENTION_RE = re.compile(r"\b(?:ноч|сут)", re.IGNORECASE)
+
+
+@dataclass
+class RuleExtraction:
+    analysis: OfferAnalysis
+    confidence: float
+    notes: List[str] = field(default_factory=list)
+
+
+def _to_int(token: str) -> Optional[int]:
+    token = token.lower()
+    if token.isdigit():
+        return int(token)
+    return NUMBER_WORDS.get(token)
+
+
+def _year(raw: Optional[str]) -> Optional[int]:
+    if not raw:
+        return None
+    value = int(raw)
+    return value + 2000 if value < 100 else value
+
+
+def _date_parts(match: re.Match, prefix: str) -> Tuple[int, int, Optional[int]]:
+    if match.group(f"{prefix}d"):
+        return int(match.group(f"{prefix}d")), int(match.group(f"{prefix}m")), _year(match.group(f"{prefix}y"))
+    return (
+        int(match.group(f"{prefix}wd")),
+        MONTHS[match.group(f"{prefix}wm").lower()],
+        _year(match.group(f"{prefix}wy")),
+    )
+
+
+def _resolve_range(start, end, today: date) -> Optional[Tuple[date, date]]:
+    """Проставляет недостающие годы: год начала берём из конца, без годов — ближайший будущий период."""
+    (sd, sm, sy), (ed, em, ey) = start, end
+    try:
+        if ey is None and sy is None:
+            ey = today.year
+            if date(ey, em, ed) < today:
+                ey += 1
+        elif ey is None:
+            ey = sy if (em, ed) >= (sm, sd) else sy + 1
+        if sy is None:
+            sy = ey if (sm, sd) <= (em, ed) else ey - 1
+        start_dt, end_dt = date(sy, sm, sd), date(ey, em, ed)
+    except ValueError:
+        return None
+    if start_dt > end_dt:
+        return None
+    return start_dt, end_dt
+
+
+def _classify(line: str, pos: int) -> Optional[str]:
+    """Тип периода по ближайшему ключевому слову перед датой, иначе по любому слову в строке."""
+    lowered = line.lower()
+    best: Tuple[int, Optional[str]] = (-1, None)
+    for kind, words in (("stay", STAY_WORDS), ("booking", BOOKING_WORDS)):
+        for word in words:
+            idx = lowered.rfind(word, 0, pos)
+            if idx > best[0]:
+                best = (idx, kind)
+    if best[1]:
+        return best[1]
+    has_stay = any(w in lowered for w in STAY_WORDS)
+    has_booking = any(w in lowered for w in BOOKING_WORDS)
+    if has_stay != has_booking:
+        return "stay" if has_stay else "booking"
+    return None
+
+
+def extract_periods(text: str, today: date) -> Tuple[List[Tuple[date, date]], List[Tuple[date, date]], float, List[str]]:
+    stay: List[Tuple[date, date]] = []
+    booking: List[Tuple[date, date]] = []
+    notes: List[str] = []
+    confidence = 1.0
+
+    for line in text.splitlines():
+        found: List[Tuple[int, int, Tuple[date, date]]] = []
+        for m in SHORT_RANGE_RE.finditer(line):
+            month, year = MONTHS[m.group("m").lower()], _year(m.group("y"))
+            rng = _resolve_range((int(m.group("ad")), month, year), (int(m.group("bd")), month, year), today)
+            if rng:
+                found.append((m.start(), m.end(), rng))
+        for m in RANGE_RE.finditer(line):
+            if any(s <= m.start() < e for s, e, _ in found):
+                continue
+            rng = _resolve_range(_date_parts(m, "a"), _date_parts(m, "b"), today)
+            if rng:
+                found.append((m.start(), m.end(), rng))
+            else:
+                notes.append(f"invalid range: {m.group(0)}")
+                confidence = min(confidence, 0.5)
+        for m in UNTIL_RE.finditer(line):
+            if any(s <= m.start() < e for s, e, _ in found):
+                continue
+            end_dt = _resolve_range((today.day, today.month, today.year), _date_parts(m, "b"), today)
+            if end_dt:
+                found.append((m.start(), m.end(), end_dt))
+
+        for start, _, rng in sorted(found, key=lambda item: item[0]):
+            kind = _classify(line, start)
+            if kind is None:
+                notes.append(f"unclassified period {rng[0]}..{rng[1]}, assumed stay")
+                confidence = min(confidence, 0.6)
+                kind = "stay"
+            (stay if kind == "stay" else booking).append(rng)
+
+    return stay, booking, confidence, notes
+
+
+def extract_formula(core_text: str, offer_text: str) -> Tuple[Optional[str], Optional[int], float, List[str]]:
+    """Формула по сути предложения; возвращает также min_days, если его задаёт сама акция (N ночей по цене M)."""
+    notes: List[str] = []
+    candidates: List[Tuple[str, Optional[int], float]] = []
+
+    for source in (core_text, offer_text):
+        for m in NIGHTS_FOR_RE.finditer(source):
+            n, k = int(m.group("n") or m.group("n2")), int(m.group("m") or m.group("m2"))
+            if 0 < k < n:
+                candidates.append((f"N = C*{k}/{n}", n, 1.0))
+        for m in PERCENT_RE.finditer(source):
+            percent = int(m.group("p1") or m.group("p2"))
+            factor = round((100 - percent) / 100, 4)
+            if m.group("upto"):
+                notes.append(f"discount up to {percent}%")
+            candidates.append((f"N = C*{factor:g}", None, 0.5 if m.group("upto") else 1.0))
+        for m in FIXED_RE.finditer(source):
+            amount = int(re.sub(r"\D", "", m.group("amount")))
+            per_night = re.search(r"за\s+(?:ночь|сутки)|в\s+сутки", source[m.end():m.end() + 40], re.IGNORECASE)
+            if not per_night:
+                notes.append(f"fixed discount {amount} without per-night basis")
+            candidates.append((f"N = C - {amount}", None, 1.0 if per_night else 0.5))
+        if candidates:
+            break
+
+    if not candidates:
+        return None, None, 0.0, ["no discount pattern"]
+
+    formulas = {c[0] for c in candidates}
+    formula, min_days, confidence = max(candidates, key=lambda c: c[2])
+    if len(formulas) > 1:
+        notes.append(f"several discounts: {sorted(formulas)}")
+        confidence = min(confidence, 0.5)
+    return formula, min_days, confidence, notes
+
+
+def extract_min_days(text: str) -> Tuple[Optional[int], float]:
+    values = set()
+    for m in MIN_DAYS_RE.finditer(text):
+        value = _to_int(m.group("n"))
+        if value:
+            values.add(value)
+    for m in MIN_DAYS_AND_MORE_RE.finditer(text):
+        values.add(int(m.group("n")))
+
+    if len(values) == 1:
+        return values.pop(), 1.0
+    if values:
+        return min(values), 0.5
+    # Ночи упоминаются, но минимальный срок не распознан — лучше спросить модель
+    return None, 0.7 if NIGHTS_MENTION_RE.search(text) else 1.0
+
+
+def extract_offer(core_text: str, offer_text: str, today: Optional[date] = None) -> RuleExtraction:
+    today = today or date.today()
+    formula, formula_days, formula_conf, notes = extract_formula(core_text, offer_text)
+    min_days, min_days_conf = extract_min_days(offer_text)
+    if formula_days and not min_days:
+        min_days, min_days_conf = formula_days, 1.0
+    stay, booking, periods_conf, period_notes = extract_periods(offer_text, today)
+    notes.extend(period_notes)
+
+    stay_conf = 1.0 if stay else 0.0
+    if not stay:
+        notes.append("no stay periods")
+
+    analysis = OfferAnalysis(
+        formula=formula,
+        min_days=min_days,
+        living_dates=[[s.strftime("%d.%m.%Y"), e.strftime("%d.%m.%Y")] for s, e in stay],
+        booking_dates=[[s.strftime("%d.%m.%Y"), e.strftime("%d.%m.%Y")] for s, e in booking],
+    )
+    confidence = min(formula_conf, min_days_conf, periods_conf, stay_conf)
+    return RuleExtraction(analysis=analysis, confidence=confidence, notes=notes)
+
+
+class RuleFirstOfferAnalyzer:
+    """
+    Разбирает офферы правилами; в модель (fallback, обычно CachedOfferAnalyzer)
+    уходят только офферы с уверенностью ниже min_confidence.
+    """
+
+    def __init__(self, fallback, min_confidence: float = MIN_CONFIDENCE, run_id: Optional[str] = None):
+        self.fallback = fallback
+        self.min_confidence = min_confidence
+        self.run_id = run_id
+
+    def analyze_all(self, items: Sequence[tuple[str, str]]) -> List[Optional[OfferAnalysis]]:
+        results: List[Optional[OfferAnalysis]] = [None] * len(items)
+        low_idx: List[int] = []
+        for idx, (core, text) in enumerate(items):
+            extraction = extract_offer(core, text)
+            if extraction.confidence >= self.min_confidence:
+                results[idx] = extraction.analysis
+            else:
+                print(
+                    f"[trace] offer {idx + 1}: rules confidence {extraction.confidence:.2f} "
+                    f"({'; '.join(extraction.notes)}), sending to model"
+                )
+                low_idx.append(idx)
+
+        if low_idx:
+            fresh = self.fallback.analyze_all([items[idx] for idx in low_idx])
+            for idx, analysis in zip(low_idx, fresh):
+                results[idx] = analysis
+
+        print(f"[trace] rule extraction: rules={len(items) - len(low_idx)} model={len(low_idx)}")
+        log_event(
+            level="INFO",
+            source="offers_parser",
+            event="rule_extraction",
+            message=f"rules={len(items) - len(low_idx)} model={len(low_idx)}",
+            meta={
+                "rules": len(items) - len(low_idx),
+                "model": len(low_idx),
+                "min_confidence": self.min_confidence,
+            },
+            run_id=self.run_id,
+        )
+        return results
@@ -0,0 +1,143 @@
+# infrastructure/selen/browser_profile.py
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import date
+from typing import Optional
+
+from selenium import webdriver
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from parser.funcs.common_funcs import create_browser_options
+from parser.funcs.prices_funcs import find_btn
+
+# Версия профиля: увеличиваем, если меняются флаги Chrome или список страниц для прогрева
+PROFILE_VERSION = 1
+PROFILE_ROOT = os.getenv(
+    "CHROME_PROFILE_ROOT",
+    os.path.join(tempfile.gettempdir(), "parser_chrome_profiles"),
+)
+WARM_MARKER = ".warm"
+WARMUP_URLS = ["https://mriyaresort.com/offers/"]
+WARMUP_SLEEP = 5
+
+# Файлы-блокировки Chrome, которые нельзя переносить в клон профиля
+_LOCK_FILES = ("SingletonLock", "SingletonSocket", "SingletonCookie", "lockfile")
+
+
+def base_profile_dir(day: Optional[date] = None) -> str:
+    day = day or date.today()
+    return os.path.join(PROFILE_ROOT, f"base-v{PROFILE_VERSION}-{day:%Y%m%d}")
+
+
+def _cleanup_old_profiles(keep: str) -> None:
+    if not os.path.isdir(PROFILE_ROOT):
+        return
+    for name in os.listdir(PROFILE_ROOT):
+        path = os.path.join(PROFILE_ROOT, name)
+        if name.startswith("base-") and path != keep:
+            print(f"[trace] removing stale chrome profile {path}")
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def ensure_warm_profile(day: Optional[date] = None) -> str:
+    """
+    Возвращает путь к базовому профилю Chrome, прогретому сегодня.
+    Если профиля ещё нет — запускает браузер, открывает сайт и виджет бронирования,
+    чтобы статические JS/CSS легли в дисковый кэш. Прогрев выполняется раз в сутки.
+    """
+    path = base_profile_dir(day)
+    if os.path.exists(os.path.join(path, WARM_MARKER)):
+        print(f"[trace] chrome profile already warm: {path}")
+        return path
+
+    os.makedirs(PROFILE_ROOT, exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+
+    started = time.perf_counter()
+    print(f"[trace] warming chrome profile at {tmp_path}")
+    options = create_browser_options(user_data_dir=tmp_path)
+    with webdriver.Chrome(options=options) as browser:
+        # find_btn открывает /booking/ и дожидается загрузки iframe виджета
+        find_btn(browser)
+        browser.switch_to.default_content()
+        for url in WARMUP_URLS:
+            browser.get(url)
+            time.sleep(WARMUP_SLEEP)
+
+    with open(os.path.join(tmp_path, WARM_MARKER), "w", encoding="utf-8") as f:
+        f.write(f"{PROFILE_VERSION}\n")
+
+    if os.path.exists(path):
+        # Профиль успел прогреть параллельный процесс
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    else:
+        os.replace(tmp_path, path)
+
+    _cleanup_old_profiles(keep=path)
+    print(f"[trace] chrome profile warmed in {time.perf_counter() - started:.2f}s")
+    return path
+
+
+def clone_profile(base_dir: str, name: str) -> str:
+    """
+    Делает копию базового профиля для отдельного браузера.
+    На файловых системах с поддержкой reflink (btrfs, xfs, APFS) копия copy-on-write
+    и почти бесплатна, иначе — обычное копирование.
+    """
+    workers_dir = os.path.join(PROFILE_ROOT, "workers")
+    os.makedirs(workers_dir, exist_ok=True)
+    dest = os.path.join(workers_dir, f"{name}-{os.getpid()}")
+    shutil.rmtree(dest, ignore_errors=True)
+
+    try:
+        subprocess.run(["cp", "-a", "--reflink=auto", base_dir, dest], check=True)
+    except (OSError, subprocess.CalledProcessError):
+        shutil.rmtree(dest, ignore_errors=True)
+        shutil.copytree(base_dir, dest, symlinks=True)
+
+    for lock in _LOCK_FILES:
+        lock_path = os.path.join(dest, lock)
+        if os.path.lexists(lock_path):
+            os.remove(lock_path)
+
+    print(f"[trace] cloned chrome profile {base_dir} -> {dest}")
+    return dest
+
+
+def remove_profile(path: Optional[str]) -> None:
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def measure_cache_hit_rate(browser: WebDriver) -> dict:
+    """
+    Считает долю ресурсов текущего документа, отданных из кэша браузера.
+    Ресурс считается попаданием, если transferSize == 0 при ненулевом decodedBodySize.
+    Ресурсы без Timing-Allow-Origin (все размеры равны 0) не учитываются.
+    """
+    entries = browser.execute_script(
+        """
+        return performance.getEntriesByType('resource').map(function (e) {
+            return [e.transferSize, e.decodedBodySize];
+        });
+        """
+    ) or []
+
+    hits = 0
+    total = 0
+    for transfer_size, decoded_size in entries:
+        if not decoded_size:
+            continue
+        total += 1
+        if transfer_size == 0:
+            hits += 1
+
+    return {
+        "hits": hits,
+        "total": total,
+        "hit_rate": round(hits / total, 3) if total else None,
+    }
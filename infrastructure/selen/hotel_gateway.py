@@ -22,7 +22,14 @@ class SeleniumHotelGateway(HotelSiteGateway):
         btn = find_btn(self.browser)
         btn.click()
         time.sleep(5)
-        
+
+    def recover(self):
+        # Перезагружаем страницу бронирования вместе с iframe виджета;
+        # календарь заново откроется в switch_dates при следующей попытке
+        print("[trace] SeleniumHotelGateway.recover start")
+        self.browser.switch_to.default_content()
+        self._open_site()
+
     def get_regular_prices_for_date(self, dt: date) -> list[RegularPrice]:
         print(f"[trace] get_regular_prices_for_date start dt={dt}")
         switch_dates(self.browser, dt)
@@ -0,0 +1,82 @@
+import asyncio
+import os
+from typing import List, Optional
+from urllib.parse import urljoin
+
+import aiohttp
+
+from core.entities import SpecialOffer
+from core.ports import OffersSiteGateway
+from infrastructure.offer_mapping import analyze_raw_offers
+from infrastructure.openai_offer_analyzer import OpenAIOfferAnalyzer
+from parser.funcs.offers_html import parse_offer_links, parse_offer_page
+
+OFFERS_URL = "https://mriyaresort.com/offers/"
+MAX_CONCURRENCY = int(os.getenv("OFFERS_HTTP_CONCURRENCY", "8"))
+REQUEST_TIMEOUT_S = 30
+FETCH_ATTEMPTS = 3
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept-Language": "ru-RU,ru;q=0.9",
+}
+
+
+class HttpOfferGateway(OffersSiteGateway):
+    """
+    Собирает спецпредложения без браузера: страницы офферов отдаются сервером
+    готовой разметкой, поэтому листинг и карточки скачиваются параллельно
+    через одну HTTP-сессию с пулом соединений и разбираются HTML-парсером.
+    """
+
+    def __init__(
+        self,
+        analyzer: Optional[OpenAIOfferAnalyzer] = None,
+        offers_url: str = OFFERS_URL,
+        max_concurrency: int = MAX_CONCURRENCY,
+    ):
+        self.analyzer = analyzer or OpenAIOfferAnalyzer()
+        self.offers_url = offers_url
+        self.max_concurrency = max_concurrency
+
+    def get_all_offers(self) -> List[SpecialOffer]:
+        return analyze_raw_offers(asyncio.run(self._collect_raw_offers()), self.analyzer)
+
+    async def _collect_raw_offers(self) -> List[dict]:
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_S)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=HEADERS) as session:
+            listing = await self._fetch(session, self.offers_url)
+            links = [urljoin(self.offers_url, href) for href in parse_offer_links(listing)]
+            print(f"[trace] HttpOfferGateway: found {len(links)} offers")
+            if not links:
+                # Без карточек в разметке листинг, скорее всего, стал рендериться скриптом
+                raise RuntimeError(f"no offer cards found at {self.offers_url}")
+
+            pages = await asyncio.gather(
+                *(self._fetch_offer(session, idx, len(links), url) for idx, url in enumerate(links))
+            )
+        return [raw for raw in pages if raw is not None]
+
+    async def _fetch_offer(self, session: aiohttp.ClientSession, idx: int, total: int, url: str) -> Optional[dict]:
+        try:
+            raw = parse_offer_page(await self._fetch(session, url), url=url)
+        except Exception as e:
+            print(f"[error] offer {idx + 1}/{total} {url} failed: {e}")
+            return None
+        print(f"[trace] offer {idx + 1}/{total} fetched: {raw['title']}")
+        return raw
+
+    async def _fetch(self, session: aiohttp.ClientSession, url: str) -> str:
+        for attempt in range(1, FETCH_ATTEMPTS + 1):
+            try:
+                async with session.get(url) as resp:
+                    resp.raise_for_status()
+                    return await resp.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == FETCH_ATTEMPTS:
+                    raise
+                print(f"[warn] GET {url} attempt {attempt}/{FETCH_ATTEMPTS} failed: {e}")
+                await asyncio.sleep(attempt)
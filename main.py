@@ -3,6 +3,7 @@ import os
 
 from dotenv import load_dotenv
 
+from app.matching.pricing_service import migrate_pricing_tables
 from app.schedulers.scheduler import create_scheduler
 from bot.bot import run_bot
 from infrastructure.logging_config import setup_logging
@@ -12,6 +13,8 @@ async def main():
     load_dotenv()
     setup_logging()
 
+    # До планировщика и бота: обработчики читают guest_prices.period как daterange
+    migrate_pricing_tables()
     scheduler = create_scheduler(os.getenv("TZ"))
     scheduler.start()
 
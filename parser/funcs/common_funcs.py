@@ -3,8 +3,8 @@ from datetime import datetime
 
 
 # Настройка опций для Chrome
-def create_browser_options():
-    print("[trace] create_browser_options start")
+def create_browser_options(user_data_dir=None):
+    print(f"[trace] create_browser_options start user_data_dir={user_data_dir}")
     options = webdriver.ChromeOptions()
 
     # --- Headless режим ---
@@ -30,6 +30,11 @@ def create_browser_options():
     options.add_argument("--ignore-certificate-errors")
     options.add_argument("--allow-insecure-localhost")
 
+    # --- Общий прогретый профиль с дисковым кэшем (см. infrastructure/selen/browser_profile.py) ---
+    if user_data_dir:
+        options.add_argument(f"--user-data-dir={user_data_dir}")
+        options.add_argument("--disk-cache-size=268435456")
+
     return options
 
 
@@ -1,13 +1,10 @@
-import json
 import time
-import os
 import re
 from datetime import datetime, timedelta
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver import Keys
-from openai import OpenAI
 from typing import Union, List, Tuple
 
 
@@ -63,39 +60,6 @@ def back_to_all_offers(browser):
     link_element.click()
     
 
-# Функция получение формулы расчетка стоимости суток со скидкой по специальному предложению, с помощью openai
-def get_formula(offer: str) -> str:
-    # Создаем промт, который будет вытаскивать формулу из переданной строки, в которой описана суть специального предложения
-    promt = f'''Есть специальное предложение в отеле, вот оно {offer}, 
-                нам известна стоимость номера за сутки.
-                Прочитай специальное предложение, представь что все его условия выполнены, и извлеки суть в виде математической формулы, 
-                которая рассчитывает итоговую стоимость номера за сутки, с учетом скидки.
-                C - это стоимость за сутки без учета скидки, N - это стоимость номера ЗА СУТКИ с учетом скидки,
-                если в формуле необходимо учесть количество дней, то подставь в формулу сразу цифру - минимально необходимое для скидки количество дней.
-                Знак умножения в формуле обозначь так: '*',
-                Ответ дай в виде формулы, БЕЗ ПОЯСНЕНИЙ'''
-    
-    # Здесь создается переменная client, которая будет содержать объект класса OpenAI. Этот объект используется для взаимодействия с API OpenAI.
-    # в объект передается API-ключ, необходимый для аутентификации при обращении к API
-    client = OpenAI(
-        api_key=os.environ.get("OPENAI_API_KEY")
-    )
-
-    # Вызываем метод create для создания завершения (completion) чата. Результат этого вызова сохраняется в переменной completion.
-    completion = client.chat.completions.create(
-        model="gpt-4.1",                                       # указываем модель
-        temperature=0.1,                                       # Параметр temperature контролирует степень случайности в ответах модели. Значение от 0 до 1. 
-        max_tokens=100,                                        # Указывает максимальное количество токенов (слов и символов), которые могут быть сгенерированы в ответе.
-        top_p=0,                                               # Параметр определяет диапазон разнообразия слов (для четкой формулы разнообразие не нужно)
-        frequency_penalty=0,                                   # Параметр определяет частоту использования одних и тех же слов (нам нужен минимум)
-        presence_penalty=0,                                    # Параметр штрафует слова за то, что оно уже встречалось (нам нужен минимум)
-        messages = [{'role': 'system', 'content': promt}]      # Здесь задаются сообщения, которые передаются модели для контекста. 
-    )                                                          # В данном случае передается одно сообщение с ролью system, которое содержит текст из переменной promt
-        
-    # Функция возвращает ответ модели в виде текста
-    return completion.choices[0].message.content
-
-
 # Функция определяющая на какие категории номеров, распространяется спец предложение
 # TODO: оптимизировать функцию
 def get_category(string: str) -> Union[str, List[str], None]:
@@ -116,40 +80,6 @@ def get_category(string: str) -> Union[str, List[str], None]:
             return None     # Ничего не найдено, пропускаем строку
         
 
-# Функция ищет в тексте даты проживания, определяемые специальным предложением 
-def get_living_dates_ai(text: str) -> str:
-    # Создаем соответствующий промт
-    promt = f'''Проанализируй текст спецпредложения и выдели все диапазоны дат проживания гостей.
-                Верни строго JSON-массив, где каждый элемент — массив из двух строк дат в формате ДД.ММ.ГГГГ, например: [["01.06.2024","10.06.2024"], ...].
-                Если дат проживания нет, верни [] без лишнего текста.
-                Текст: {text}'''
-    
-    client = OpenAI(
-        api_key=os.environ.get("OPENAI_API_KEY")
-    )
-
-    # Вызываем метод create для создания завершения (completion) чата. Результат этого вызова сохраняется в переменной completion.
-    completion = client.chat.completions.create(
-        model="gpt-4.1",                                       # указываем модель
-        temperature=0.1,                                       # Параметр temperature контролирует степень случайности в ответах модели. Значение от 0 до 1. 
-        max_tokens=100,                                        # Указывает максимальное количество токенов (слов и символов), которые могут быть сгенерированы в ответе.
-        top_p=0,                                               # Параметр определяет диапазон разнообразия слов 
-        frequency_penalty=0,                                   # Параметр определяет частоту использования одних и тех же слов (нам нужен минимум)
-        presence_penalty=0,                                    # Параметр штрафует слова за то, что оно уже встречалось (нам нужен минимум)
-        messages = [{'role': 'system', 'content': promt}]      # Здесь задаются сообщения, которые передаются модели для контекста. 
-    )                                                          # В данном случае передается одно сообщение с ролью system, которое содержит текст из переменной promt
-    
-    # Функция возвращает ответ модели в виде текста
-    raw = completion.choices[0].message.content
-    try:
-        data = json.loads(raw)
-        if isinstance(data, list):
-            return [pair for pair in data if isinstance(pair, (list, tuple)) and len(pair) == 2]
-    except Exception:
-        pass
-    return []
-        
-
 # Функция для спец предложения "Ранее бронирование", его суть в том, что скидка применяется если гость забронировал номер минимум за 60 суток до заезда
 # таким образом, мы форматируем даты проживания прибавляя 60 суток к сегодняшнему дню и определяя переменную -  начало периода спец предложения
 def early_booking(living_dates: List[list[str]]) -> List[list[str]]:
@@ -158,43 +88,6 @@ def early_booking(living_dates: List[list[str]]) -> List[list[str]]:
     # Возвращаем обновленный список с датами 
     return living_dates
 
-# Функция проверяет есть ли в строке информация о датах возможного бронирования и возвращает период броинрования в виде списка
-# где первая дата это начало (сегодняшний день), а вторая - конец 
-def extract_date_before_ai(text: str) -> str:
-    # Создаем соответствующий промт
-    promt = f'''Проанализируй текст спецпредложения и выдели все диапазоны дат бронирования (период, в который можно забронировать).
-                Верни строго JSON-массив, где каждый элемент — массив из двух строк дат в формате ДД.ММ.ГГГГ, например: [["01.05.2024","31.05.2024"], ...].
-                Не возвращай даты из прошлого относительно сегодняшнего дня. Если из текста получается дата раньше сегодня — опусти её или подбери корректный год так, чтобы конец периода был не раньше начала.
-                Начало периода должно быть <= конца периода.
-                Если дат бронирования нет, верни [] без лишнего текста.
-                Текст: {text}'''
-    
-    client = OpenAI(
-        api_key=os.environ.get("OPENAI_API_KEY")
-    )
-
-    # Вызываем метод create для создания завершения (completion) чата. Результат этого вызова сохраняется в переменной completion.
-    completion = client.chat.completions.create(
-        model="gpt-4.1",                                       # указываем модель
-        temperature=0.1,                                       # Параметр temperature контролирует степень случайности в ответах модели. Значение от 0 до 1. 
-        max_tokens=100,                                        # Указывает максимальное количество токенов (слов и символов), которые могут быть сгенерированы в ответе.
-        top_p=0,                                               # Параметр определяет диапазон разнообразия слов 
-        frequency_penalty=0,                                   # Параметр определяет частоту использования одних и тех же слов (нам нужен минимум)
-        presence_penalty=0,                                    # Параметр штрафует слова за то, что оно уже встречалось (нам нужен минимум)
-        messages = [{'role': 'system', 'content': promt}]      # Здесь задаются сообщения, которые передаются модели для контекста. 
-    )                                                          # В данном случае передается одно сообщение с ролью system, которое содержит текст из переменной promt
-    
-    # Функция возвращает ответ модели в виде текста
-    raw = completion.choices[0].message.content
-    try:
-        data = json.loads(raw)
-        if isinstance(data, list):
-            return [pair for pair in data if isinstance(pair, (list, tuple)) and len(pair) == 2]
-    except Exception:
-        pass
-    return []
-
-
 # Функция определяет суммируется ли специальное предложение с программой лояльности или другими спец предложениями
 # выяснилось, что с другими спецпредложениями никакая акция суммироваться не может, следовательно - нужно удалить данную проверку из функции
 # TODO: оптимизировать функцию
@@ -216,59 +109,18 @@ def analyze_offers(line: str) -> Union[Tuple[bool], Tuple[None]]:
     return summ_loyalty
 
 
-# Функция читает строку спец предложения, и опрделеляет от сколько суток проживания оно действует
-def get_min_days(text: str) -> str:
-    # Создаем соответствующий промт
-    promt = f'''Прочитай текст специального предложения в отеле: {text}
-                и определи минимальное количетсво суток, которое необходимо забронировать гостю
-                чтобы получить скидку.
-                Ответ дай в формате цифры, например: "3"'''
-    
-    client = OpenAI(
-        api_key=os.environ.get("OPENAI_API_KEY")
-    )
+STOP_PHRASE = ' только при обращении в единый контактный центр по номеру 8 800 550 52 71.'
 
-    # Вызываем метод create для создания завершения (completion) чата. Результат этого вызова сохраняется в переменной completion.
-    completion = client.chat.completions.create(
-        model="gpt-4.1",                                       # указываем модель
-        temperature=0.1,                                       # Параметр temperature контролирует степень случайности в ответах модели. Значение от 0 до 1. 
-        max_tokens=100,                                        # Указывает максимальное количество токенов (слов и символов), которые могут быть сгенерированы в ответе.
-        top_p=0,                                               # Параметр определяет диапазон разнообразия слов 
-        frequency_penalty=0,                                   # Параметр определяет частоту использования одних и тех же слов (нам нужен минимум)
-        presence_penalty=0,                                    # Параметр штрафует слова за то, что оно уже встречалось (нам нужен минимум)
-        messages = [{'role': 'system', 'content': promt}]      # Здесь задаются сообщения, которые передаются модели для контекста. 
-    )                                                          # В данном случае передается одно сообщение с ролью system, которое содержит текст из переменной promt
-    
-    # Функция возвращает ответ модели в виде текста
-    return completion.choices[0].message.content
-        
 
-# Функция собирающая данные с карточки спецпредложения и возвращающая словарь
-def collect_offer_data(browser):
-    # Создаем список lines в который будем добавлять все строки, для того чтобы целиком сформироовать весь текст оффера
-    lines = []
-    
-    category = []           
-    living_dates = []       
-    date_before = []        
-    summ_with_loyalty = False     
-    
-    # Находим элемет страницы где вероятно находиться навание оофера и присваиваем его переменной title
-    title = browser.find_element(By.CLASS_NAME, 'f-h1')
-    print(f"Получил название спецпредложения: {title.text}")
-    
-      
-    # Добавляем в список строку
-    lines.append(title.text)
-    # Переменной core присваиваем текст элемента, в котором обычно описывается суть спецпредложения, и указана скидка применимая к стоимости проживания
-    core = browser.find_element(By.XPATH, "//div[contains(@class, 'block--content is_cascade')]/p")
-    # Добавляем суть в список
-    lines.append(core.text)
-    
-    # С помощью функции получаем формулу расчитывающую стоимость суток
-    formula = get_formula(core.text)
-    print(f"Получил формулу расчитывающую стоимость суток")
-            
+# Функция собирающая сырые данные с карточки спецпредложения (без обращений к нейросети)
+def collect_offer_raw(browser) -> dict:
+    # Находим элемет страницы где вероятно находиться навание оофера
+    title = browser.find_element(By.CLASS_NAME, 'f-h1').text
+    print(f"Получил название спецпредложения: {title}")
+
+    # Текст элемента, в котором обычно описывается суть спецпредложения, и указана скидка применимая к стоимости проживания
+    core = browser.find_element(By.XPATH, "//div[contains(@class, 'block--content is_cascade')]/p").text
+
     wait = WebDriverWait(browser, 10)
 
     ul_element = wait.until(EC.presence_of_element_located((
@@ -276,59 +128,54 @@ def collect_offer_data(browser):
         "//*[starts-with(local-name(), 'h') and contains(normalize-space(.), 'Условия')]/following::ul[1]"
     )))
 
-    li_elements = ul_element.find_elements(By.TAG_NAME, "li")
+    conditions = [li.text for li in ul_element.find_elements(By.TAG_NAME, "li")]
 
-    # Получаем текст каждого найденного элемента <li>, записывая его в переменную 's'
-    for li in li_elements:
-        s = li.text
-        # Добавляем строку в общий список
-        lines.append(s)
-        
+    return {"title": title, "core": core, "conditions": conditions, "url": browser.current_url}
+
+
+# Формируем единый текст спецпредложения, удаляя из него не нужные боту строки
+def build_offer_text(raw: dict) -> str:
+    offer_text = '\n'.join([raw["title"], raw["core"], *raw["conditions"]])
+    return offer_text.replace(STOP_PHRASE, '.')
+
+
+# Функция определяет по строкам условий категории номеров и суммирование с программой лояльности
+def extract_conditions(conditions: List[str]) -> Tuple[Union[str, List[str]], bool]:
+    category = []
+    summ_with_loyalty = False
+
+    for s in conditions:
         # Если в строке нашлась категория, присваем ее переменной category
         if get_category(s):
             category = get_category(s)
             print("Получил категории подходящие под спецпредложение")
-                            
-        # Если в строке нашлась информация о суммировании скидок, присваиваем ее перемнной summ_offers
+
+        # Если в строке нашлась информация о суммировании скидок, присваиваем ее перемнной summ_with_loyalty
         if analyze_offers(s):
             summ_with_loyalty = analyze_offers(s)
             print(f"Получил информацию о суммировании скидок")
-                
-        # Формируем единный строку со всей информацией о спецпредложении удаляя из нее не нужные боту строки
-        offer_text = '\n'.join(lines)
-        stop_phrase = ' только при обращении в единый контактный центр по номеру 8 800 550 52 71.'
-        offer_text = offer_text.replace(stop_phrase, '.')
-        print(f"Сформировал единный текст, описывающий спецпредложение")
-        
-        # Передаем весь текст в функцию, где нейросеть находит минимальное количество дней проживания по офферу
-        min_rest_days = get_min_days(offer_text)
-        print(f"Получил минимальное количество дней проживания, по спецпредложению")
-        
-        living_dates = get_living_dates_ai(offer_text)
-        print("Извлек даты проживания")
-        # Если название оффера "ранее бронирование", форматируем даты под условия спецпредложения
-        if title.text == 'Раннее бронирование':
-            living_dates = early_booking(living_dates)
-            print(f"Отредактировал даты проживания под условия спец предложения 'Раннее бронирование'")
-            
-        date_before = extract_date_before_ai(offer_text)
-        print(f"Извлек даты бронирования")
-                   
-        offer = {
-            "Название": title.text,  
-            "Категория": category,
-            "Даты проживания": living_dates,
-            "Даты бронирования": date_before,
-            "Формула расчета": formula,
-            "Минимальное количество дней": min_rest_days,
-            "Суммируется с программой лояльности": summ_with_loyalty,
-            "Текст предложения": offer_text
-        }
-        
-        return offer
 
-
-    
-
-
-        
+    return category, summ_with_loyalty
+
+
+# Функция собирает итоговый словарь оффера из сырых данных и результата разбора нейросетью
+def build_offer_dict(raw: dict, analysis) -> dict:
+    category, summ_with_loyalty = extract_conditions(raw["conditions"])
+
+    living_dates = [list(pair) for pair in analysis.living_dates]
+    # Если название оффера "ранее бронирование", форматируем даты под условия спецпредложения
+    if raw["title"] == 'Раннее бронирование':
+        living_dates = early_booking(living_dates)
+        print(f"Отредактировал даты проживания под условия спец предложения 'Раннее бронирование'")
+
+    return {
+        "Название": raw["title"],
+        "Категория": category,
+        "Даты проживания": living_dates,
+        "Даты бронирования": [list(pair) for pair in analysis.booking_dates],
+        "Формула расчета": analysis.formula,
+        "Минимальное количество дней": analysis.min_days,
+        "Суммируется с программой лояльности": summ_with_loyalty,
+        "Текст предложения": build_offer_text(raw),
+        "Ссылка": raw.get("url"),
+    }
@@ -0,0 +1,158 @@
+import re
+from html.parser import HTMLParser
+from typing import List
+
+# Разбор серверной разметки страниц спецпредложений без браузера.
+# Селекторы те же, что в offers_funcs: карточки .card--action, заголовок .f-h1,
+# суть в первом <p> блока .block--content.is_cascade, условия — первый <ul> после заголовка "Условия".
+
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+}
+BLOCK_TAGS = {"p", "div", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6", "tr", "section"}
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+NOT_OFFER_TITLES = {"Подарочные сертификаты"}
+
+
+class Node:
+    __slots__ = ("tag", "attrs", "children")
+
+    def __init__(self, tag: str, attrs: dict):
+        self.tag = tag
+        self.attrs = attrs
+        self.children: list = []
+
+    @property
+    def classes(self) -> set:
+        return set((self.attrs.get("class") or "").split())
+
+    def iter(self):
+        yield self
+        for child in self.children:
+            if isinstance(child, Node):
+                yield from child.iter()
+
+    def text(self) -> str:
+        """Видимый текст узла примерно как WebElement.text: пробелы схлопнуты, блоки и <br> — переносы."""
+        parts: List[str] = []
+        self._collect_text(parts)
+        lines = (" ".join(line.split()) for line in "".join(parts).split("\n"))
+        return "\n".join(line for line in lines if line)
+
+    def _collect_text(self, parts: List[str]) -> None:
+        if self.tag in ("script", "style"):
+            return
+        for child in self.children:
+            if isinstance(child, Node):
+                if child.tag == "br":
+                    parts.append("\n")
+                    continue
+                block = child.tag in BLOCK_TAGS
+                if block:
+                    parts.append("\n")
+                child._collect_text(parts)
+                if block:
+                    parts.append("\n")
+            else:
+                parts.append(child)
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Node("document", {})
+        self.stack = [self.root]
+
+    def _close_implied(self, tag: str) -> None:
+        # <li> закрывает предыдущий <li> того же списка, блочный тег — открытый <p>
+        if tag == "li":
+            stop, target = {"ul", "ol"}, "li"
+        elif tag in BLOCK_TAGS:
+            stop, target = {"div", "section", "li"}, "p"
+        else:
+            return
+        for idx in range(len(self.stack) - 1, 0, -1):
+            if self.stack[idx].tag in stop:
+                return
+            if self.stack[idx].tag == target:
+                del self.stack[idx:]
+                return
+
+    def handle_starttag(self, tag, attrs):
+        self._close_implied(tag)
+        node = Node(tag, {k: v or "" for k, v in attrs})
+        self.stack[-1].children.append(node)
+        if tag not in VOID_TAGS:
+            self.stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        node = Node(tag, {k: v or "" for k, v in attrs})
+        self.stack[-1].children.append(node)
+
+    def handle_endtag(self, tag):
+        # Незакрытые теги (<p>, <li>) закрываем вместе с родителем
+        for idx in range(len(self.stack) - 1, 0, -1):
+            if self.stack[idx].tag == tag:
+                del self.stack[idx:]
+                return
+
+    def handle_data(self, data):
+        self.stack[-1].children.append(data)
+
+
+def parse_html(html: str) -> Node:
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def parse_offer_links(html: str) -> List[str]:
+    """Ссылки на страницы спецпредложений со страницы /offers/, в порядке карточек, без дублей."""
+    links: List[str] = []
+    for node in parse_html(html).iter():
+        if "card--action" not in node.classes:
+            continue
+        if node.attrs.get("title", "").strip() in NOT_OFFER_TITLES:
+            continue
+        link = node if node.tag == "a" else next((n for n in node.iter() if n.tag == "a"), None)
+        href = link.attrs.get("href") if link is not None else None
+        if href and href not in links:
+            links.append(href)
+    return links
+
+
+def parse_offer_page(html: str, url: str | None = None) -> dict:
+    """Те же сырые данные, что collect_offer_raw: {"title", "core", "conditions", "url"}."""
+    root = parse_html(html)
+    nodes = list(root.iter())
+
+    title_node = next((n for n in nodes if "f-h1" in n.classes), None)
+    if title_node is None:
+        raise ValueError("offer title (.f-h1) not found")
+
+    core = ""
+    for node in nodes:
+        if {"block--content", "is_cascade"} <= node.classes:
+            paragraph = next((n for n in node.iter() if n.tag == "p"), None)
+            if paragraph is not None:
+                core = paragraph.text()
+                break
+    if not core:
+        raise ValueError("offer core paragraph not found")
+
+    # Первый <ul> в порядке документа после заголовка с текстом "Условия"
+    conditions: List[str] = []
+    heading_seen = False
+    for node in nodes:
+        if not heading_seen:
+            heading_seen = node.tag in HEADING_TAGS and "Условия" in re.sub(r"\s+", " ", node.text())
+            continue
+        if node.tag == "ul":
+            conditions = [li.text() for li in node.iter() if li.tag == "li"]
+            break
+    if not heading_seen:
+        raise ValueError("offer conditions heading not found")
+
+    return {"title": title_node.text(), "core": core, "conditions": conditions, "url": url}
@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.matching.models import AggregatedRow
+from benchmarks import legacy_writes
+from infrastructure.db import pricing_repository as repo
+from infrastructure.db.common_db import get_connection
+
+CATEGORIES = ["Делюкс", "Семейный", "Вилла Прибой", "Стандарт"]
+
+
+def make_rows(guests: int, rows_per_guest: int) -> dict[int, list[AggregatedRow]]:
+    start = date.today()
+    # id оффера строкой, как его возвращает fetch_special_offers (psycopg2 без register_uuid)
+    offer_id = str(uuid.uuid4())
+    result = {}
+    for guest_id in range(1, guests + 1):
+        rows = []
+        for i in range(rows_per_guest):
+            begin = start + timedelta(days=3 * i)
+            rows.append(
+                AggregatedRow(
+                    guest_id=guest_id,
+                    category=CATEGORIES[i % len(CATEGORIES)],
+                    period_start=begin,
+                    period_end=begin + timedelta(days=2),
+                    regular_breakfast_price=12000 + i,
+                    new_breakfast_price=10200 + i,
+                    regular_full_pansion_price=15000 + i,
+                    new_full_pansion_price=12750 + i,
+                    applied_special_offer=offer_id if i % 2 else None,
+                    applied_loyalty="gold" if i % 3 else None,
+                    formula_used="N = C*0.85" if i % 2 else None,
+                    is_last_room=begin.isoformat() if i % 5 == 0 else "",
+                )
+            )
+        result[guest_id] = rows
+    return result
+
+
+def use_temp_tables(conn) -> None:
+    """Временная guest_prices в pg_temp перекрывает боевую для этой сессии — реальные цены не трогаем."""
+    with conn.cursor() as cur:
+        cur.execute("CREATE TEMP TABLE guest_prices (LIKE guest_prices INCLUDING ALL)")
+    conn.commit()
+
+
+def truncate(conn) -> None:
+    with conn.cursor() as cur:
+        cur.execute("TRUNCATE pg_temp.guest_prices")
+    conn.commit()
+
+
+def run(guests: int = 300, rows_per_guest: int = 40, batch: int = 500, rounds: int = 3):
+    data = make_rows(guests, rows_per_guest)
+    total = guests * rows_per_guest
+    guest_ids = list(data)
+    with get_connection() as conn:
+        repo.ensure_guest_prices_period(conn)
+        use_temp_tables(conn)
+
+        timings = {"per_guest": [], "copy_batch": []}
+        for _ in range(rounds):
+            truncate(conn)
+            started = time.perf_counter()
+            for guest_id, rows in data.items():
+                legacy_writes.delete_guest_prices(conn, guest_id)
+                legacy_writes.save_guest_prices(conn, rows)
+            timings["per_guest"].append(time.perf_counter() - started)
+
+            truncate(conn)
+            started = time.perf_counter()
+            for i in range(0, guests, batch):
+                ids = guest_ids[i:i + batch]
+                repo.replace_guest_prices(conn, (row for gid in ids for row in data[gid]), ids)
+            timings["copy_batch"].append(time.perf_counter() - started)
+
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM pg_temp.guest_prices")
+            stored = cur.fetchone()[0]
+
+    print(f"[trace] {guests} guests x {rows_per_guest} rows, batches of {batch} guests, best of {rounds}")
+    for mode, values in timings.items():
+        best = min(values)
+        print(f"  {mode:<11} {best * 1000:8.1f} ms  {total / best:9.0f} rows/s")
+    if stored != total:
+        print(f"[error] expected {total} rows after replace, found {stored}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(*(int(arg) for arg in sys.argv[1:5])))
@@ -0,0 +1,130 @@
+import os
+import sys
+import time
+import uuid
+from dataclasses import replace
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core.entities import BookingPeriod, SpecialOffer, StayPeriod
+from infrastructure.db.common_db import get_connection
+from infrastructure.db.postgres_offers_repo import PostgresOfferRepository
+
+
+def make_offers(count: int, periods: int) -> list[SpecialOffer]:
+    start = date.today()
+    offers = []
+    for i in range(count):
+        offers.append(
+            SpecialOffer(
+                id=uuid.uuid4(),
+                title=f"Бенчмарк оффер {i}",
+                text=f"Скидка {i % 30}% при проживании от {i % 5 + 1} ночей",
+                categories=["Делюкс", "Семейный"] if i % 2 else ["Все категории"],
+                stay_periods=[
+                    StayPeriod(start=start + timedelta(days=30 * p), end=start + timedelta(days=30 * p + 20))
+                    for p in range(periods)
+                ],
+                booking_period=BookingPeriod(start=start, end=start + timedelta(days=60)),
+                formula=f"N = C*{(100 - i % 30) / 100:g}",
+                min_days=i % 5 + 1,
+                loyalty_compatible=bool(i % 3),
+            )
+        )
+    return offers
+
+
+def save_offer_per_row(conn, offer: SpecialOffer) -> None:
+    """Сохранение оффера до пакетной записи: INSERT на оффер и на каждый период, commit на оффер."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO special_offers (
+                id, title, text, categories,
+                booking_start, booking_end,
+                min_days, formula, loyalty_compatible
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (id) DO NOTHING
+            """,
+            (
+                str(offer.id),
+                offer.title,
+                offer.text,
+                offer.categories,
+                offer.booking_period.start if offer.booking_period else None,
+                offer.booking_period.end if offer.booking_period else None,
+                offer.min_days,
+                offer.formula,
+                offer.loyalty_compatible,
+            ),
+        )
+        for p in offer.stay_periods:
+            cur.execute(
+                """
+                INSERT INTO special_offer_stay_periods (
+                    offer_id, stay_start, stay_end
+                )
+                VALUES (%s, %s, %s)
+                """,
+                (str(offer.id), p.start, p.end),
+            )
+    conn.commit()
+
+
+def use_temp_tables(conn) -> None:
+    """Временные таблицы в pg_temp перекрывают боевые для этой сессии — реальные офферы не трогаем."""
+    with conn.cursor() as cur:
+        cur.execute("CREATE TEMP TABLE special_offers (LIKE special_offers INCLUDING ALL)")
+        cur.execute("CREATE TEMP TABLE special_offer_stay_periods (LIKE special_offer_stay_periods INCLUDING ALL)")
+    conn.commit()
+
+
+def truncate(conn) -> None:
+    with conn.cursor() as cur:
+        cur.execute("TRUNCATE pg_temp.special_offer_stay_periods, pg_temp.special_offers")
+    conn.commit()
+
+
+def run(count: int = 200, periods: int = 4, rounds: int = 3):
+    offers = make_offers(count, periods)
+    with get_connection() as conn:
+        use_temp_tables(conn)
+        repo = PostgresOfferRepository(conn)
+
+        # per_row — код до пакетной записи, batch и sync — PostgresOfferRepository
+        timings = {"per_row": [], "batch": [], "sync": [], "resync": []}
+        for _ in range(rounds):
+            truncate(conn)
+            started = time.perf_counter()
+            for offer in offers:
+                save_offer_per_row(conn, offer)
+            timings["per_row"].append(time.perf_counter() - started)
+
+            truncate(conn)
+            started = time.perf_counter()
+            repo.save_offers(offers)
+            timings["batch"].append(time.perf_counter() - started)
+
+            truncate(conn)
+            started = time.perf_counter()
+            repo.sync_offers(offers)
+            timings["sync"].append(time.perf_counter() - started)
+
+            # Повторная синхронизация с изменённой половиной офферов: UPDATE и DELETE периодов по id
+            changed = [replace(o, text=o.text + " ") if i % 2 else o for i, o in enumerate(offers)]
+            started = time.perf_counter()
+            repo.sync_offers(changed)
+            timings["resync"].append(time.perf_counter() - started)
+
+    print(f"[trace] {count} offers x {periods} stay periods, best of {rounds}")
+    for mode, values in timings.items():
+        best = min(values)
+        print(f"  {mode:<10} {best * 1000:8.1f} ms  {count / best:8.0f} offers/s")
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:4]))
@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.matching import pricing_service
+from app.matching.models import GuestRow
+from app.matching.parallel_pricing import price_jobs, resolve_workers
+from benchmarks.synthetic import make_context
+
+
+def make_jobs(ctx, names, rng, profiles: int):
+    jobs, seen = [], set()
+    while len(jobs) < profiles:
+        guest = GuestRow(
+            id=len(jobs),
+            first_name="",
+            last_name="",
+            adults=rng.randint(1, 3),
+            teens=rng.randint(0, 1),
+            infant=0,
+            preferred_categories=[n.lower() for n in rng.sample(names, rng.randint(1, 6))],
+            loyalty_status=rng.choice([None, "gold", "platinum", "diamond"]),
+        )
+        matched = pricing_service.match_categories_for_guest(guest, ctx.rooms)
+        key = pricing_service.pricing_profile_key(guest, matched)
+        if matched and key not in seen:
+            seen.add(key)
+            jobs.append((guest, matched, None))
+    return sorted(jobs, key=lambda job: job[1])
+
+
+def run(profiles: int = 2000, categories: int = 60, days: int = 365, offers: int = 40, seed: int = 1):
+    """Serial vs process-pool profile pricing on synthetic data (no database)."""
+    workers = resolve_workers(os.getenv("PRICING_WORKERS", "0"))
+    print(f"[trace] engine={pricing_service.PRICING_ENGINE} workers={workers}")
+
+    ctx, names, rng = make_context(categories, days, offers, seed)
+    jobs = make_jobs(ctx, names, rng, profiles)
+    serial_ctx = make_context(categories, days, offers, seed)[0]
+
+    started = time.perf_counter()
+    serial = list(price_jobs(pricing_service._price_profile, serial_ctx, jobs, 1))
+    serial_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    parallel = list(price_jobs(pricing_service._price_profile, ctx, jobs, workers))
+    parallel_s = time.perf_counter() - started
+
+    rows = sum(len(r) for r in serial)
+    print(f"[trace] {len(jobs)} profiles, {rows} rows")
+    print(f"  serial     {serial_s:8.2f} s")
+    print(f"  parallel   {parallel_s:8.2f} s  speedup x{serial_s / parallel_s:.2f}")
+    if serial != parallel:
+        print("[error] parallel results differ from serial")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(*(int(arg) for arg in sys.argv[1:6])))
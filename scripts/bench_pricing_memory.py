@@ -0,0 +1,57 @@
+import json
+import os
+import resource
+import sys
+import time
+from dataclasses import replace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.matching import pricing_service
+from app.matching.columnar import AggregatedColumns
+from benchmarks.synthetic import make_context, make_guests
+
+
+def run(guests: int = 5000, days: int = 90, categories: int = 40, offers: int = 30, mode: str = "columns"):
+    """
+    Peak RSS of pricing a synthetic run and holding everything that would be written
+    to guest_prices: per-guest AggregatedRow copies (mode=rows) or per-profile
+    AggregatedColumns shared by the profile's guests (mode=columns). No database.
+    """
+    started = time.perf_counter()
+    ctx, names, rng = make_context(categories, days, offers, seed=1)
+    guest_rows = make_guests(rng, names, guests)
+    profiles = pricing_service.group_guests_by_profile(guest_rows, ctx.rooms)
+
+    payload = []
+    written = 0
+    for (matched_categories, _), members in profiles.items():
+        rows = pricing_service._price_profile(ctx, members[0], list(matched_categories))
+        if mode == "rows":
+            payload.extend(replace(row, guest_id=guest.id) for guest in members for row in rows)
+        else:
+            columns = AggregatedColumns.from_rows(rows)
+            payload.extend((guest.id, columns) for guest in members)
+        written += len(rows) * len(members)
+
+    result = {
+        "mode": mode,
+        "engine": pricing_service.PRICING_ENGINE,
+        "guests": guests,
+        "days": days,
+        "profiles": len(profiles),
+        "guest_price_rows": written,
+        "seconds": round(time.perf_counter() - started, 2),
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    print(json.dumps(result))
+    return result
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    mode = args.pop() if args and not args[-1].isdigit() else "columns"
+    run(*(int(arg) for arg in args[:4]), mode=mode)
@@ -0,0 +1,83 @@
+import json
+import os
+import sys
+from datetime import date
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from infrastructure.rule_offer_analyzer import MIN_CONFIDENCE, extract_offer
+from parser.funcs.offers_funcs import extract_conditions
+
+# Сохранённые тексты офферов с ожидаемыми условиями
+CORPUS_PATH = os.path.join(ROOT, "scripts", "offer_rules_corpus.json")
+
+
+def load_corpus(source: str | None) -> list[dict]:
+    """
+    Тексты офферов в формате special_offers.text: название, суть, условия построчно.
+    JSON-корпус — с ожидаемыми условиями, каталог *.txt и "db" (special_offers) — без них.
+    """
+    source = source or CORPUS_PATH
+    if source == "db":
+        from infrastructure.db.common_db import get_connection
+
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT title, text FROM special_offers ORDER BY title")
+                return [{"name": row["title"], "text": row["text"]} for row in cur.fetchall()]
+    if os.path.isdir(source):
+        return [{"name": p.name, "text": p.read_text(encoding="utf-8")} for p in sorted(Path(source).glob("*.txt"))]
+    with open(source, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _mismatches(extraction, conditions: list[str], expected: dict) -> list[str]:
+    categories, loyalty_compatible = extract_conditions(conditions)
+    actual = {
+        "confident": extraction.confidence >= MIN_CONFIDENCE,
+        "categories": categories,
+        "loyalty_compatible": loyalty_compatible,
+        "formula": extraction.analysis.formula,
+        "min_days": extraction.analysis.min_days,
+        "living_dates": extraction.analysis.living_dates,
+        "booking_dates": extraction.analysis.booking_dates,
+    }
+    return [
+        f"{key}: expected {value!r}, got {actual[key]!r}"
+        for key, value in expected.items()
+        if actual[key] != value
+    ]
+
+
+def run(source: str | None = None):
+    """Прогоняет правила по сохранённым текстам офферов без обращения к модели и сверяет с ожидаемым."""
+    corpus = load_corpus(source)
+    confident = failed = 0
+    for item in corpus:
+        text = item["text"]
+        lines = text.splitlines()
+        core = lines[1] if len(lines) > 1 else text
+        today = date.fromisoformat(item["today"]) if item.get("today") else None
+        extraction = extract_offer(core, text, today)
+        ok = extraction.confidence >= MIN_CONFIDENCE
+        confident += ok
+        problems = _mismatches(extraction, lines[2:], item.get("expected", {}))
+        failed += bool(problems)
+        print(f"{'OK ' if ok else 'LLM'} {extraction.confidence:.2f} {item['name']}")
+        print(f"    {extraction.analysis}")
+        for note in extraction.notes:
+            print(f"    - {note}")
+        for problem in problems:
+            print(f"    [error] {problem}")
+    print(
+        f"[trace] rules confident for {confident}/{len(corpus)} offers (threshold {MIN_CONFIDENCE}), "
+        f"mismatches={failed}"
+    )
+    return failed
+
+
+if __name__ == "__main__":
+    sys.exit(1 if run(sys.argv[1] if len(sys.argv) > 1 else None) else 0)
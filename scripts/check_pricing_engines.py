@@ -0,0 +1,160 @@
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.matching.models import GuestRow, RoomRow, SpecialOfferData, StayPeriodData
+from app.matching.offer_index import OfferIndex
+from app.matching.price_cube import PriceCube
+from app.matching.pricing_logic import (
+    build_priced_stays_for_guest,
+    group_stays_into_periods,
+    match_categories_for_guest,
+    stream_priced_periods,
+)
+from app.matching.vector_engine import VectorPricingEngine
+
+CATEGORIES = ["Делюкс", "Делюкс с видом на море", "Семейный", "Вилла Прибой", "Вилла Моно", "Стандарт_1"]
+OFFER_CATEGORIES = CATEGORIES + ["Все категории", "Все виллы", "{Семейный}"]
+FORMULAS = [
+    "N = C*0.85", "N = C*0.9", "N = C - 1500", "N = C*6/7", "N = (C*3 + C*0.5)/4",
+    "N = 5000", "N = C/0", "N = C + 1/0", "N = 0.9C", "N = C**2", None, "",
+]
+LOYALTY = [None, "", "none", "None", "gold", "Gold ", "platinum", "diamond", "bronze"]
+
+
+def random_case(rng: random.Random, guests_count: int):
+    today = date(2025, 5, 1) + timedelta(days=rng.randint(0, 60))
+    rows = []
+    for category in rng.sample(CATEGORIES, rng.randint(1, len(CATEGORIES))):
+        day = today + timedelta(days=rng.randint(-5, 5))
+        price = rng.choice([9000, 12000, 15500, 20001])
+        for _ in range(rng.randint(0, 90)):
+            if rng.random() < 0.25:
+                price = rng.choice([9000, 12000, 15500, 20001, 33333])
+            rows.append((category, day, price, price + rng.choice([0, 3000, 4501]), rng.random() < 0.1))
+            if rng.random() < 0.02:
+                # duplicate date with other prices
+                rows.append((category, day, price + 7, price + 9, False))
+            day += timedelta(days=1 if rng.random() < 0.9 else rng.randint(2, 4))
+    rows.sort(key=lambda r: (r[0], r[1]))
+
+    offers, periods = [], {}
+    for _ in range(rng.randint(0, 10)):
+        offer_id = uuid.uuid4()
+        b_start = today + timedelta(days=rng.randint(-20, 10)) if rng.random() < 0.7 else None
+        b_end = b_start + timedelta(days=rng.randint(-5, 40)) if b_start and rng.random() < 0.8 else None
+        offers.append(
+            SpecialOfferData(
+                id=offer_id,
+                categories=rng.sample(OFFER_CATEGORIES, rng.randint(0, 3)),
+                formula=rng.choice(FORMULAS),
+                min_days=rng.choice([None, 0, 1, 2, 3, 5, 7, 14]),
+                loyalty_compatible=rng.random() < 0.5,
+                booking_start=b_start,
+                booking_end=b_end,
+            )
+        )
+        for _ in range(rng.randint(0, 3)):
+            start = today + timedelta(days=rng.randint(-10, 80))
+            periods.setdefault(offer_id, []).append(
+                StayPeriodData(offer_id=offer_id, stay_start=start, stay_end=start + timedelta(days=rng.randint(-2, 30)))
+            )
+
+    rooms = [RoomRow(id=i, category_name=c, number_of_main_beds=rng.randint(1, 4)) for i, c in enumerate(CATEGORIES)]
+    guests = [
+        GuestRow(
+            id=i,
+            first_name="",
+            last_name="",
+            adults=rng.randint(1, 3),
+            teens=rng.randint(0, 1),
+            infant=0,
+            preferred_categories=rng.sample(["делюкс", "вилла", "семейный", "прибой", ""], rng.randint(0, 2)),
+            loyalty_status=rng.choice(LOYALTY),
+        )
+        for i in range(guests_count)
+    ]
+    loyalty_discounts = {"gold": 5, "platinum": 10, "diamond": 15, "bronze": 0}
+    return today, rows, offers, periods, rooms, guests, loyalty_discounts
+
+
+def reference(guest, rooms, cube, offers, periods, loyalty_discounts, today):
+    matched = match_categories_for_guest(guest, rooms)
+    prices = cube.prices_for(matched)
+    stays = build_priced_stays_for_guest(guest, prices, loyalty_discounts, offers, periods, today)
+    return group_stays_into_periods(stays)
+
+
+def streamed(guest, rooms, cube, offer_index, loyalty_discounts):
+    cat_ids = cube.match_categories(match_categories_for_guest(guest, rooms))
+    rows = stream_priced_periods(guest, cube.iter_rows(cat_ids), loyalty_discounts, offer_index)
+    return sorted(rows, key=lambda r: (r.category, r.period_start, r.period_end))
+
+
+def run(cases: int = 300, guests_count: int = 20, seed: int = 1):
+    """Randomised equivalence check of VectorPricingEngine and stream_priced_periods against pricing_logic."""
+    rng = random.Random(seed)
+    mismatches = stream_mismatches = 0
+    reference_s = engine_s = stream_s = 0.0
+    for case in range(cases):
+        today, rows, offers, periods, rooms, guests, loyalty_discounts = random_case(rng, guests_count)
+        cube = PriceCube(rows)
+
+        started = time.perf_counter()
+        expected = [reference(g, rooms, cube, offers, periods, loyalty_discounts, today) for g in guests]
+        reference_s += time.perf_counter() - started
+
+        started = time.perf_counter()
+        engine = VectorPricingEngine(cube, OfferIndex(offers, periods, today), loyalty_discounts, rooms)
+        actual = [engine.price_guest(g) for g in guests]
+        engine_s += time.perf_counter() - started
+
+        # regular_prices is unique on (category, date): the streaming builder relies on it
+        seen, unique_rows = set(), []
+        for row in rows:
+            if (row[0], row[1]) not in seen:
+                seen.add((row[0], row[1]))
+                unique_rows.append(row)
+        unique_cube = PriceCube(unique_rows)
+        unique_expected = [
+            sorted(
+                reference(g, rooms, unique_cube, offers, periods, loyalty_discounts, today),
+                key=lambda r: (r.category, r.period_start, r.period_end),
+            )
+            for g in guests
+        ]
+        started = time.perf_counter()
+        offer_index = OfferIndex(offers, periods, today)
+        streams = [streamed(g, rooms, unique_cube, offer_index, loyalty_discounts) for g in guests]
+        stream_s += time.perf_counter() - started
+        stream_mismatches += sum(1 for exp, got in zip(unique_expected, streams) if exp != got)
+
+        for guest, exp, act in zip(guests, expected, actual):
+            if exp != act:
+                mismatches += 1
+                if mismatches <= 3:
+                    print(f"[error] case {case} guest {guest.id}: expected {len(exp)} rows, got {len(act)}")
+                    for e, a in zip(exp, act):
+                        if e != a:
+                            print(f"    expected {e}\n    actual   {a}")
+                            break
+
+    print(
+        f"[trace] {cases} cases x {guests_count} guests: mismatches={mismatches} "
+        f"reference={reference_s:.2f}s engine={engine_s:.2f}s"
+    )
+    print(
+        f"[trace] stream: mismatches={stream_mismatches} time={stream_s:.2f}s"
+    )
+    return mismatches + stream_mismatches
+
+
+if __name__ == "__main__":
+    sys.exit(1 if run(*(int(arg) for arg in sys.argv[1:4])) else 0)
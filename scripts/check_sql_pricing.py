@@ -0,0 +1,73 @@
+import os
+import sys
+from dataclasses import astuple, replace
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.matching.pricing_service import _price_profile, group_guests_by_profile, load_pricing_context
+from app.matching.sql_backend import fetch_sql_priced_rows
+from infrastructure.db import pricing_repository as repo
+from infrastructure.db.common_db import get_connection
+
+
+# Каждый N-й гость для проверки пути с guest_ids
+SAMPLE_STEP = 7
+
+
+def _keyed(rows):
+    return {(r.guest_id, r.category, r.period_start): r for r in rows}
+
+
+def _compare(label: str, expected_rows, actual_rows, limit: int) -> bool:
+    expected, actual = _keyed(expected_rows), _keyed(actual_rows)
+    missing = sorted(expected.keys() - actual.keys())
+    extra = sorted(actual.keys() - expected.keys())
+    different = sorted(k for k in expected.keys() & actual.keys() if astuple(expected[k]) != astuple(actual[k]))
+
+    print(
+        f"[trace] {label}: python={len(expected_rows)} sql={len(actual_rows)} rows: "
+        f"missing in sql={len(missing)} extra in sql={len(extra)} different={len(different)}"
+    )
+    for key in missing[:limit]:
+        print(f"  missing  {expected[key]}")
+    for key in extra[:limit]:
+        print(f"  extra    {actual[key]}")
+    for key in different[:limit]:
+        print(f"  python   {expected[key]}\n  sql      {actual[key]}")
+    return bool(missing or extra or different)
+
+
+def run(limit: int = 10):
+    """
+    Сравнивает строки guest_prices, которые дали бы Python-движок и SQL-бэкенд, ничего не записывая:
+    по всем гостям (run_pricing) и по выборке гостей (reprice_guest передаёт guest_ids).
+    """
+    today = date.today()
+    with get_connection() as conn:
+        guests = repo.fetch_guests(conn)
+        ctx = load_pricing_context(conn, today)
+        python_rows = []
+        for (matched_categories, _), members in group_guests_by_profile(guests, ctx.rooms, ctx.categories).items():
+            rows = _price_profile(ctx, members[0], list(matched_categories))
+            for guest in members:
+                python_rows.extend(replace(row, guest_id=guest.id) for row in rows)
+
+        sql_rows = fetch_sql_priced_rows(conn, today)
+        sample = sorted(guest.id for guest in guests)[::SAMPLE_STEP]
+        sql_sample_rows = fetch_sql_priced_rows(conn, today, sample)
+
+    failed = _compare("all guests", python_rows, sql_rows, limit)
+    sampled = set(sample)
+    failed |= _compare(
+        f"{len(sample)} guests by id",
+        [row for row in python_rows if row.guest_id in sampled],
+        sql_sample_rows,
+        limit,
+    )
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(run(*(int(arg) for arg in sys.argv[1:2])))
@@ -0,0 +1,24 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from infrastructure.db.common_db import get_connection
+from infrastructure.db.offer_analysis_cache_repo import (
+    ensure_offer_analysis_cache_table,
+    invalidate_offer_analysis_cache,
+)
+
+
+def run():
+    """Полностью очищает кэш разбора офферов: следующий прогон заново вызовет модель."""
+    with get_connection() as conn:
+        ensure_offer_analysis_cache_table(conn)
+        deleted = invalidate_offer_analysis_cache(conn)
+    print(f"[trace] offer_analysis_cache cleared, removed {deleted} entries")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,27 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.suite import SCALES, run_suite
+
+# JSON lines of successive runs, one per run
+RESULTS_PATH = os.getenv("BENCH_RESULTS", os.path.join(ROOT, "benchmarks", "results.jsonl"))
+
+
+def run(guests: int = 1_000, days: int = 30, offers: int = 5, categories: int = 40, seed: int = 1):
+    """
+    Сквозной бенчмарк расчёта цен на синтетических данных в схеме BENCH_SCHEMA локальной БД.
+    python scripts/run_benchmarks.py small|medium|large или guests days offers [categories seed].
+    """
+    return run_suite(guests, days, offers, categories, seed, output=RESULTS_PATH)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args and args[0] in SCALES:
+        run(*SCALES[args[0]], *(int(arg) for arg in args[1:3]))
+    else:
+        run(*(int(arg) for arg in args[:5]))
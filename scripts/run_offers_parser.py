@@ -13,19 +13,42 @@ from selenium import webdriver
 from app.offers_parsing_service import OfferParsingService
 from infrastructure.db.common_db import get_connection
 from infrastructure.db.postgres_offers_repo import PostgresOfferRepository
+from infrastructure.offer_analysis_cache import CachedOfferAnalyzer
+from infrastructure.rule_offer_analyzer import RuleFirstOfferAnalyzer
 from infrastructure.system_event_logger import log_event
+from infrastructure.selen.browser_profile import clone_profile, ensure_warm_profile, remove_profile
 from infrastructure.selen.offers_gateway import SeleniumOfferGateway
+from infrastructure.web.offers_gateway import HttpOfferGateway
 from parser.funcs.common_funcs import create_browser_options
 
 
-def truncate_offers_tables(conn):
-    print("[trace] clearing special_offers and special_offer_stay_periods")
-    with conn.cursor() as cur:
-        cur.execute(
-            "TRUNCATE TABLE special_offer_stay_periods, special_offers RESTART IDENTITY CASCADE;"
-        )
-    conn.commit()
-    print("[trace] special_offers tables cleared")
+# http — скачивание страниц без браузера, selenium — прежний обход карточек в Chrome
+OFFERS_GATEWAY = os.getenv("OFFERS_GATEWAY", "http")
+
+
+def parse_with_selenium(repo, analyzer):
+    profile_dir = None
+    try:
+        try:
+            profile_dir = clone_profile(ensure_warm_profile(), "offers")
+        except Exception as exc:
+            print(f"[warn] warm chrome profile unavailable, starting cold: {exc}")
+        options = create_browser_options(user_data_dir=profile_dir)
+
+        with webdriver.Chrome(options=options) as browser:
+            print("[trace] Chrome webdriver started")
+            gateway = SeleniumOfferGateway(browser, analyzer=analyzer)
+            print("[trace] SeleniumOfferGateway created")
+
+            return OfferParsingService(gateway, repo).parse_offers()
+    finally:
+        remove_profile(profile_dir)
+
+
+def parse_with_http(repo, analyzer):
+    gateway = HttpOfferGateway(analyzer=analyzer)
+    print("[trace] HttpOfferGateway created")
+    return OfferParsingService(gateway, repo).parse_offers()
 
 
 def run():
@@ -40,23 +63,44 @@ def run():
     )
 
     try:
-        options = create_browser_options()
-
         with get_connection() as conn:
-            truncate_offers_tables(conn)
-
             repo = PostgresOfferRepository(conn)
             print("[trace] PostgresOfferRepository created")
-
-            with webdriver.Chrome(options=options) as browser:
-                print("[trace] Chrome webdriver started")
-                gateway = SeleniumOfferGateway(browser)
-                print("[trace] SeleniumOfferGateway created")
-
-                service = OfferParsingService(gateway, repo)
-                print("[trace] OfferParsingService created")
-
-                service.parse_offers()
+            analyzer = RuleFirstOfferAnalyzer(CachedOfferAnalyzer(conn, run_id=run_id), run_id=run_id)
+
+            if OFFERS_GATEWAY == "selenium":
+                sync_result = parse_with_selenium(repo, analyzer)
+            else:
+                try:
+                    sync_result = parse_with_http(repo, analyzer)
+                except Exception as exc:
+                    print(f"[warn] http offers gateway failed, falling back to selenium: {exc}")
+                    log_event(
+                        level="WARNING",
+                        source="offers_parser",
+                        event="http_gateway_failed",
+                        message=str(exc),
+                        run_id=run_id,
+                    )
+                    sync_result = parse_with_selenium(repo, analyzer)
+
+            if sync_result is not None:
+                log_event(
+                    level="INFO",
+                    source="offers_parser",
+                    event="offers_synced",
+                    message=(
+                        f"inserted={len(sync_result.inserted)} updated={len(sync_result.updated)} "
+                        f"retired={len(sync_result.retired)} unchanged={len(sync_result.unchanged)}"
+                    ),
+                    meta={
+                        "inserted": [str(i) for i in sync_result.inserted],
+                        "updated": [str(i) for i in sync_result.updated],
+                        "retired": [str(i) for i in sync_result.retired],
+                        "unchanged": len(sync_result.unchanged),
+                    },
+                    run_id=run_id,
+                )
 
         elapsed = time.perf_counter() - start_ts
         print(f"[trace] run_offer_parser main done in {elapsed:.2f}s")
@@ -13,12 +13,27 @@ ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
+from psycopg2.extras import Json
 from selenium import webdriver
 
-from app.price_parsing_service import PriceParsingService
+from app.price_parsing_service import DateStatus, PriceParsingService
 from infrastructure.db.common_db import get_connection
+from infrastructure.db.parser_progress_repo import (
+    ensure_parser_progress_table,
+    reset_parser_progress,
+    set_worker_status,
+    start_worker_attempt,
+    update_worker_progress,
+)
 from infrastructure.db.postgres_price_repo import PostgresPriceRepository
+from infrastructure.db.room_categories_repo import ensure_room_categories
 from infrastructure.system_event_logger import log_event
+from infrastructure.selen.browser_profile import (
+    clone_profile,
+    ensure_warm_profile,
+    measure_cache_hit_rate,
+    remove_profile,
+)
 from infrastructure.selen.hotel_gateway import SeleniumHotelGateway
 from parser.funcs.common_funcs import create_browser_options
 
@@ -110,7 +125,9 @@ def capture_prints_to_csv(csv_path, worker_id, attempt, start_date, days):
         sys.stdout = original_stdout
 
 
-def run_parser(worker_id, attempt, start_date, days, csv_path, progress_store):
+def run_parser(
+    worker_id, attempt, start_date, days, csv_path, progress_store, outcome_store, base_profile=None
+):
     """Run parsing for a date range; exceptions bubble up to allow retries."""
     start_str = start_date.isoformat()
     end_str = (start_date + timedelta(days=days - 1)).isoformat()
@@ -120,6 +137,22 @@ def run_parser(worker_id, attempt, start_date, days, csv_path, progress_store):
             progress_store[worker_id] = (start_date + timedelta(days=done - 1)).isoformat()
             print(f"[parser-{worker_id}] progress {done}/{total} ({percent}%)")
 
+        counters = {"done": 0, "failed": 0}
+
+        def outcome_callback(outcome):
+            outcome_store[outcome.date.isoformat()] = (outcome.status.value, outcome.reason)
+            counters["done"] += 1
+            if outcome.status == DateStatus.FAILED:
+                counters["failed"] += 1
+            report_progress(
+                update_worker_progress,
+                worker_id,
+                dates_done=counters["done"],
+                dates_failed=counters["failed"],
+                retries_delta=outcome.attempts - 1,
+                current_day=outcome.date + timedelta(days=1) if counters["done"] < days else None,
+            )
+
         print(
             f"[parser-{worker_id}] attempt {attempt}: starting range {start_str} -> {end_str}"
         )
@@ -132,18 +165,28 @@ def run_parser(worker_id, attempt, start_date, days, csv_path, progress_store):
             "start",
             f"starting range {start_str} -> {end_str}",
         )
+        report_progress(start_worker_attempt, worker_id, attempt)
 
+        profile_dir = None
         try:
-            options = create_browser_options()
+            if base_profile:
+                profile_dir = clone_profile(base_profile, f"price-{worker_id}")
+            options = create_browser_options(user_data_dir=profile_dir)
             with get_connection() as conn:
                 repo = PostgresPriceRepository(conn)
                 with webdriver.Chrome(options=options) as browser:
+                    open_started = time.perf_counter()
                     gateway = SeleniumHotelGateway(browser)
+                    report_browser_cache(browser, worker_id, attempt, profile_dir, open_started)
                     service = PriceParsingService(repo, gateway)
-                    service.parse_period(start_date, days, progress_callback)
+                    summary = service.parse_period(
+                        start_date, days, progress_callback, outcome_cb=outcome_callback
+                    )
 
+            failed_dates = [o.date.isoformat() for o in summary.failed]
             print(
-                f"[parser-{worker_id}] attempt {attempt}: finished range {start_str} -> {end_str}"
+                f"[parser-{worker_id}] attempt {attempt}: finished range {start_str} -> {end_str}, "
+                f"failed dates: {failed_dates or 'none'}"
             )
             log_to_csv(
                 csv_path,
@@ -151,8 +194,8 @@ def run_parser(worker_id, attempt, start_date, days, csv_path, progress_store):
                 attempt,
                 start_date,
                 days,
-                "success",
-                f"completed range {start_str} -> {end_str}",
+                "partial" if failed_dates else "success",
+                f"completed range {start_str} -> {end_str}; failed dates: {', '.join(failed_dates) or '-'}",
             )
         except Exception:
             error_msg = traceback.format_exc()
@@ -169,11 +212,61 @@ def run_parser(worker_id, attempt, start_date, days, csv_path, progress_store):
                 error_msg,
             )
             raise
+        finally:
+            remove_profile(profile_dir)
+
+
+def report_progress(fn, *args, **kwargs):
+    """Пишем живой прогресс в price_parser_progress; ошибки не должны мешать парсингу."""
+    try:
+        with get_connection() as conn:
+            fn(conn, *args, **kwargs)
+    except Exception as exc:
+        print(f"[warn] failed to update parser progress: {exc}")
+
+
+def report_browser_cache(browser, worker_id, attempt, profile_dir, open_started):
+    """Пишем время открытия виджета и долю ресурсов, взятых из кэша профиля."""
+    open_site_ms = int((time.perf_counter() - open_started) * 1000)
+    try:
+        stats = measure_cache_hit_rate(browser)
+    except Exception as exc:
+        print(f"[warn] failed to measure browser cache hit rate: {exc}")
+        stats = {"hits": None, "total": None, "hit_rate": None}
+    print(
+        f"[parser-{worker_id}] widget opened in {open_site_ms} ms, "
+        f"cache hits {stats['hits']}/{stats['total']} (profile={profile_dir or 'empty'})"
+    )
+    log_event(
+        level="INFO",
+        source="price_parser",
+        event="browser_cache",
+        message=f"worker={worker_id} hit_rate={stats['hit_rate']}",
+        meta={
+            "worker_id": worker_id,
+            "attempt": attempt,
+            "warm_profile": bool(profile_dir),
+            **stats,
+        },
+        duration_ms=open_site_ms,
+    )
 
 
-def start_worker(worker_id, attempt, start_date, days, csv_path, progress_store) -> Process:
+def prepare_base_profile():
+    """Прогреваем общий профиль Chrome; при ошибке воркеры стартуют с пустым профилем."""
+    try:
+        return ensure_warm_profile()
+    except Exception:
+        print(f"[warn] failed to warm chrome profile, workers will start cold\n{traceback.format_exc()}")
+        return None
+
+
+def start_worker(
+    worker_id, attempt, start_date, days, csv_path, progress_store, outcome_store, base_profile=None
+) -> Process:
     process = Process(
-        target=run_parser, args=(worker_id, attempt, start_date, days, csv_path, progress_store)
+        target=run_parser,
+        args=(worker_id, attempt, start_date, days, csv_path, progress_store, outcome_store, base_profile),
     )
     process.start()
     return process
@@ -204,6 +297,17 @@ def ensure_parser_status_table():
                 );
                 """
             )
+            # Итоги по датам: сколько дат собрано, пусто или упало (с причинами)
+            cur.execute(
+                """
+                ALTER TABLE price_parser_status
+                    ADD COLUMN IF NOT EXISTS dates_ok INT,
+                    ADD COLUMN IF NOT EXISTS dates_empty INT,
+                    ADD COLUMN IF NOT EXISTS dates_failed INT,
+                    ADD COLUMN IF NOT EXISTS failed_dates JSONB,
+                    ADD COLUMN IF NOT EXISTS attempts_crashed INT;
+                """
+            )
             cur.execute(
                 """
                 INSERT INTO price_parser_status (id, started_at, status, last_completed_date, failed_at, message)
@@ -213,31 +317,94 @@ def ensure_parser_status_table():
                     status = 'running',
                     last_completed_date = NULL,
                     failed_at = NULL,
-                    message = NULL;
+                    message = NULL,
+                    dates_ok = NULL,
+                    dates_empty = NULL,
+                    dates_failed = NULL,
+                    failed_dates = NULL,
+                    attempts_crashed = NULL;
                 """
             )
         conn.commit()
 
 
-def update_parser_status(status: str, last_completed_date=None, failed_at=None, message: str | None = None):
-    """Обновляем статус прогона парсера (ok / partial / failed)."""
+def update_parser_status(
+    status: str,
+    last_completed_date=None,
+    failed_at=None,
+    message: str | None = None,
+    summary: dict | None = None,
+):
+    """Обновляем статус прогона парсера (ok / partial / failed) и итоги по датам."""
+    summary = summary or {}
+    failed_dates = summary.get("failed_dates")
     with get_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
                 """
-                INSERT INTO price_parser_status (id, started_at, status, last_completed_date, failed_at, message)
-                VALUES (1, NOW(), %s, %s, %s, %s)
+                INSERT INTO price_parser_status (
+                    id, started_at, status, last_completed_date, failed_at, message,
+                    dates_ok, dates_empty, dates_failed, failed_dates, attempts_crashed
+                )
+                VALUES (1, NOW(), %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 ON CONFLICT (id) DO UPDATE SET
                     status = EXCLUDED.status,
                     last_completed_date = EXCLUDED.last_completed_date,
                     failed_at = EXCLUDED.failed_at,
-                    message = EXCLUDED.message;
+                    message = EXCLUDED.message,
+                    dates_ok = EXCLUDED.dates_ok,
+                    dates_empty = EXCLUDED.dates_empty,
+                    dates_failed = EXCLUDED.dates_failed,
+                    failed_dates = EXCLUDED.failed_dates,
+                    attempts_crashed = EXCLUDED.attempts_crashed;
                 """,
-                (status, last_completed_date, failed_at, message),
+                (
+                    status,
+                    last_completed_date,
+                    failed_at,
+                    message,
+                    summary.get("dates_ok"),
+                    summary.get("dates_empty"),
+                    summary.get("dates_failed"),
+                    Json(failed_dates) if failed_dates is not None else None,
+                    summary.get("attempts_crashed"),
+                ),
             )
         conn.commit()
 
 
+def summarize_outcomes(chunks, outcome_snapshot, progress_snapshot, failed_workers, crashed_attempts):
+    """
+    Сводим исходы по всем датам прогона. Даты воркеров, так и не завершивших чанк,
+    начиная со следующей после последней обработанной, считаем упавшими.
+    Упавшие попытки воркеров считаем отдельно: даты, записанные до падения, исход
+    прогона не скрывают.
+    """
+    outcomes = dict(outcome_snapshot)
+    for worker_id in failed_workers:
+        chunk_start, chunk_days = next((cs, cd) for wid, cs, cd in chunks if wid == worker_id)
+        last_done = progress_snapshot.get(worker_id)
+        d = (last_done + timedelta(days=1)) if last_done else chunk_start
+        chunk_end = chunk_start + timedelta(days=chunk_days - 1)
+        while d <= chunk_end:
+            outcomes.setdefault(d.isoformat(), (DateStatus.FAILED.value, "worker crashed"))
+            d += timedelta(days=1)
+
+    failed_dates = [
+        {"date": iso, "reason": reason}
+        for iso, (status, reason) in sorted(outcomes.items())
+        if status == DateStatus.FAILED.value
+    ]
+    return {
+        "dates_ok": sum(1 for status, _ in outcomes.values() if status == DateStatus.SUCCESS.value),
+        "dates_empty": sum(1 for status, _ in outcomes.values() if status == DateStatus.EMPTY.value),
+        "dates_failed": len(failed_dates),
+        "failed_dates": failed_dates,
+        "attempts_crashed": sum(crashed_attempts.values()),
+        "failed_workers": list(failed_workers),
+    }
+
+
 def run(start_date=None):
     start_ts = time.perf_counter()
     run_id = str(uuid4())
@@ -259,12 +426,19 @@ def run(start_date=None):
 
     ensure_parser_status_table()
     truncate_regular_prices()
+    base_profile = prepare_base_profile()
 
     chunks = []
     for idx in range(WORKER_COUNT):
         chunk_start = start_date + timedelta(days=idx * CHUNK_DAYS)
         chunks.append((idx + 1, chunk_start, CHUNK_DAYS))
 
+    with get_connection() as conn:
+        ensure_parser_progress_table(conn)
+        # DDL справочника категорий — один раз здесь, а не в каждом воркере параллельно с записью цен
+        ensure_room_categories(conn)
+        reset_parser_progress(conn, run_id, chunks)
+
     csv_paths = {}
     for worker_id, chunk_start, chunk_days in chunks:
         csv_path = os.path.join(ROOT, f"parser_worker_{worker_id}.csv")
@@ -280,10 +454,19 @@ def run(start_date=None):
 
     with Manager() as manager:
         progress_store = manager.dict()
+        outcome_store = manager.dict()
         attempts = {worker_id: 1 for worker_id, _, _ in chunks}
+        crashed_attempts = {worker_id: 0 for worker_id, _, _ in chunks}
         processes = {
             worker_id: start_worker(
-                worker_id, attempts[worker_id], chunk_start, chunk_days, csv_paths[worker_id], progress_store
+                worker_id,
+                attempts[worker_id],
+                chunk_start,
+                chunk_days,
+                csv_paths[worker_id],
+                progress_store,
+                outcome_store,
+                base_profile,
             )
             for worker_id, chunk_start, chunk_days in chunks
         }
@@ -297,10 +480,12 @@ def run(start_date=None):
                 exit_code = process.exitcode
                 if exit_code == 0:
                     print(f"[trace] worker {worker_id} finished successfully")
+                    report_progress(set_worker_status, worker_id, "done")
                     completed.append(worker_id)
                     processes.pop(worker_id, None)
                     continue
 
+                crashed_attempts[worker_id] += 1
                 attempts[worker_id] += 1
                 if attempts[worker_id] > MAX_ATTEMPTS:
                     print(
@@ -308,6 +493,7 @@ def run(start_date=None):
                     )
                     failed.append(worker_id)
                     processes.pop(worker_id, None)
+                    report_progress(set_worker_status, worker_id, "failed")
                     continue
 
                 print(
@@ -320,6 +506,8 @@ def run(start_date=None):
                     CHUNK_DAYS,
                     csv_paths[worker_id],
                     progress_store,
+                    outcome_store,
+                    base_profile,
                 )
 
         progress_snapshot = {}
@@ -328,24 +516,26 @@ def run(start_date=None):
                 progress_snapshot[wid] = datetime.fromisoformat(iso_date).date()
             except Exception:
                 continue
+        outcome_snapshot = dict(outcome_store.items())
 
     last_completed_date = max(progress_snapshot.values()) if progress_snapshot else None
 
-    if failed:
-        failure_dates = []
-        for worker_id in failed:
-            last_done = progress_snapshot.get(worker_id)
-            chunk_start = next(chunk_start for wid, chunk_start, _ in chunks if wid == worker_id)
-            next_failed_date = (last_done + timedelta(days=1)) if last_done else chunk_start
-            failure_dates.append(next_failed_date)
-
-        failed_at = min(failure_dates) if failure_dates else None
-        warn_msg = (
-            f"Парсер собрал не все данные, сломался на дате {failed_at.isoformat()}"
-            if failed_at
-            else "Парсер собрал не все данные."
-        )
-        update_parser_status("partial", last_completed_date, failed_at, warn_msg)
+    summary = summarize_outcomes(chunks, outcome_snapshot, progress_snapshot, failed, crashed_attempts)
+
+    # Воркер, исчерпавший попытки, делает прогон неполным, даже если все его даты успели записаться
+    if summary["dates_failed"] or failed:
+        failed_at = None
+        problems = []
+        if summary["dates_failed"]:
+            failed_at = datetime.fromisoformat(summary["failed_dates"][0]["date"]).date()
+            failed_list = ", ".join(
+                datetime.fromisoformat(item["date"]).strftime("%d.%m.%Y") for item in summary["failed_dates"]
+            )
+            problems.append(f"нет цен на даты: {failed_list}")
+        if failed:
+            problems.append(f"воркеры {', '.join(map(str, failed))} упали после {MAX_ATTEMPTS} попыток")
+        warn_msg = f"Парсер собрал не все данные, {'; '.join(problems)}"
+        update_parser_status("partial", last_completed_date, failed_at, warn_msg, summary)
         log_event(
             level="WARNING",
             source="price_parser",
@@ -355,21 +545,23 @@ def run(start_date=None):
                 "status": "partial",
                 "last_completed_date": str(last_completed_date) if last_completed_date else None,
                 "failed_at": str(failed_at) if failed_at else None,
-                "failed_workers": failed,
+                **summary,
             },
             run_id=run_id,
             duration_ms=int((time.perf_counter() - start_ts) * 1000),
         )
     else:
-        update_parser_status("ok", last_completed_date, None, None)
+        ok_msg = f"Перезапусков воркеров: {summary['attempts_crashed']}" if summary["attempts_crashed"] else None
+        update_parser_status("ok", last_completed_date, None, ok_msg, summary)
         log_event(
             level="INFO",
             source="price_parser",
             event="completed",
-            message="status=ok",
+            message=f"status=ok attempts_crashed={summary['attempts_crashed']}",
             meta={
                 "status": "ok",
                 "last_completed_date": str(last_completed_date) if last_completed_date else None,
+                **summary,
             },
             run_id=run_id,
             duration_ms=int((time.perf_counter() - start_ts) * 1000),
@@ -5,8 +5,11 @@ ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
+from app.matching.parallel_pricing import resolve_workers
 from app.matching.pricing_service import run_pricing
 
 
 if __name__ == "__main__":
-    run_pricing()
+    # --full: пересчитать всех гостей, игнорируя сохранённые отпечатки
+    # PRICING_WORKERS действует только здесь: форк пула безопасен лишь в отдельном однопоточном процессе
+    run_pricing(full="--full" in sys.argv[1:], workers=resolve_workers())